@@ -3,11 +3,16 @@
 Build RFC embeddings with all-mpnet-base-v2 in low-memory mode.
 """
 
-import os, json, glob, argparse, numpy as np
+import os, json, argparse, numpy as np
+from pathlib import Path
 from tqdm import tqdm
 from sentence_transformers import SentenceTransformer
 import torch
 
+from rfc_chronicle.parsed import iter_parsed
+from rfc_chronicle.pending import PendingQueue
+from rfc_chronicle.utils import PENDING_FILE
+
 # === リソース制限 ===
 try: os.nice(10)
 except AttributeError: pass
@@ -27,14 +32,44 @@ def get_device():
     if torch.backends.mps.is_available(): return "mps"
     return "cpu"
 
-def load_documents(text_dir: str) -> dict[int, str]:
-    docs = {}
-    for path in glob.glob(os.path.join(text_dir, "*.txt")):
-        base = os.path.basename(path)[:-4]
-        if base.isdigit():
-            with open(path, encoding="utf-8") as f:
-                docs[int(base)] = f.read()
-    return dict(sorted(docs.items()))
+def load_documents(text_dir: str, numbers=None) -> dict[int, str]:
+    # preprocess 済みのクリーン本文を番号順に読む（未処理の文書はその場でパース）
+    return {num: body for num, _, body in iter_parsed(Path(text_dir), numbers)}
+
+def encode_into(model, texts: list[str], vecs, rows: list[int], batch: int):
+    # texts[i] の埋め込みを vecs[rows[i]] に書く
+    for s in tqdm(range(0, len(texts), batch), desc="Encoding"):
+        e   = min(s + batch, len(texts))
+        emb = model.encode(texts[s:e],
+                           convert_to_numpy=True,
+                           normalize_embeddings=True,  # ← 追加
+                           show_progress_bar=False)
+        vecs[rows[s:e], :] = emb
+
+def write_docmap(path: str, docmap: dict[str, int]):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(docmap, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+def update_pending(model, args, numbers: list[int]) -> list[int]:
+    # 既存の vectors.npy / docmap.json のうち、同期で追加・変更された RFC の行だけを書き直す
+    if not (os.path.exists(args.out_vect) and os.path.exists(args.out_map)):
+        raise SystemExit("No existing embeddings; run a full build first")
+    docs = load_documents(args.textdir, numbers)
+    with open(args.out_map, encoding="utf-8") as f:
+        docmap = json.load(f)
+    old = np.load(args.out_vect, mmap_mode="r")
+    for num in docs:
+        docmap.setdefault(str(num), len(docmap))  # 新しい RFC は末尾に追加
+    tmp = f"{args.out_vect}.tmp.npy"
+    vecs = np.lib.format.open_memmap(tmp, mode="w+", dtype="float32", shape=(len(docmap), old.shape[1]))
+    vecs[:len(old)] = old
+    encode_into(model, list(docs.values()), vecs, [docmap[str(n)] for n in docs], args.batch)
+    vecs.flush(); del vecs, old
+    os.replace(tmp, args.out_vect)
+    write_docmap(args.out_map, docmap)
+    return list(docs)
 
 def main():
     ap = argparse.ArgumentParser(description="Build MPNet embeddings.")
@@ -43,11 +78,27 @@ def main():
     ap.add_argument("--textdir", default=DEFAULT_TEXT_DIR)
     ap.add_argument("--out-vect", default=DEFAULT_VECTORS)
     ap.add_argument("--out-map",  default=DEFAULT_DOCMAP)
+    ap.add_argument("--pending", action="store_true",
+                    help="only re-encode RFCs added/changed by `fetch --incremental`")
     args = ap.parse_args()
 
     device = get_device()
     print(f"[INFO] device={device}, batch={args.batch}")
 
+    queue = PendingQueue(PENDING_FILE)
+    if args.pending:
+        numbers = queue.pending("embeddings")
+        if not numbers:
+            print("[INFO] No pending RFCs."); return
+        print(f"[INFO] Loading model: {args.model}")
+        model = SentenceTransformer(args.model, device=device)
+        model._cpu_count = 0
+        done = update_pending(model, args, numbers)
+        # 本文がまだ無い RFC は未処理のまま残す
+        queue.done("embeddings", done)
+        print(f"[DONE] Re-encoded {len(done)} RFCs; run build_faiss to update the index.")
+        return
+
     docs = load_documents(args.textdir)
     if not docs: raise SystemExit(f"No texts in {args.textdir}")
 
@@ -62,18 +113,11 @@ def main():
     )
 
     rfc_nums, texts = list(docs.keys()), list(docs.values())
-    for s in tqdm(range(0, n, args.batch), desc="Encoding"):
-        e   = min(s + args.batch, n)
-        emb = model.encode(texts[s:e],
-                           convert_to_numpy=True,
-                           normalize_embeddings=True,  # ← 追加
-                           show_progress_bar=False)
-        vecs[s:e, :] = emb
+    encode_into(model, texts, vecs, list(range(n)), args.batch)
 
     print(f"[INFO] Saving docmap → {args.out_map}")
-    with open(args.out_map, "w", encoding="utf-8") as f:
-        json.dump({str(num): i for i, num in enumerate(rfc_nums)},
-                  f, ensure_ascii=False, indent=2)
+    write_docmap(args.out_map, {str(num): i for i, num in enumerate(rfc_nums)})
+    queue.done("embeddings", rfc_nums)
     print("[DONE] Embeddings built with MPNet.")
 
 if __name__ == "__main__":
@@ -1,36 +1,89 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hmac
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.concurrency import run_in_threadpool
 import logging
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
 from pydantic import BaseModel
 from rfc_chronicle.pin import pin_rfc, unpin_rfc, list_pins
 from rfc_chronicle.fetch_rfc import client
-from rfc_chronicle.search import search_metadata, semsearch
-from rfc_chronicle.show import show_rfc_details
-from rfc_chronicle.fulltext import search_fulltext
+from rfc_chronicle.search import query_metadata, semsearch, suggest_metadata, warm_metadata
+from rfc_chronicle.show import show_rfc_details, show_rfc_section, list_rfc_sections
+from rfc_chronicle.fulltext import search_fulltext_page
+from rfc_chronicle.ftsmaint import fts_stats, maintain, maintenance_interval
 
-from api.schemas import SemSearchItem, SemSearchResponse
+from api.schemas import (
+    FulltextResponse, SemSearchItem, SemSearchResponse, SearchResponse, SuggestResponse,
+)
 
 logger = logging.getLogger("uvicorn.error")
 
-async def safe_run(func, *args, not_found: bool = False, **kwargs) -> Any:
+# 管理用ルート（/api/admin/...）は RFC_ADMIN_TOKEN が設定されているときだけ公開し、
+# "Authorization: Bearer <token>" を要求する（CORS が全オリジン許可のため）
+ADMIN_TOKEN_ENV = "RFC_ADMIN_TOKEN"
+
+async def safe_run(func, *args, not_found: bool = False, bad_request: bool = False, **kwargs) -> Any:
     try:
         return await run_in_threadpool(func, *args, **kwargs)
+    except ValueError as exc:
+        if bad_request:
+            raise HTTPException(status_code=400, detail=str(exc))
+        logger.error(f"Error running {func.__name__}: {exc}", exc_info=True)
+        raise HTTPException(status_code=404 if not_found else 500, detail=str(exc))
     except Exception as exc:
         logger.error(f"Error running {func.__name__}: {exc}", exc_info=True)
         status = 404 if not_found else 500
         raise HTTPException(status_code=status, detail=str(exc))
 
+def admin_token() -> Optional[str]:
+    return os.getenv(ADMIN_TOKEN_ENV) or None
+
+def _require_admin(token: str):
+    async def check(authorization: Optional[str] = Header(None)) -> None:
+        scheme, _, given = (authorization or "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(given.encode(), token.encode()):
+            raise HTTPException(status_code=401, detail="Admin token required",
+                                headers={"WWW-Authenticate": "Bearer"})
+    return check
+
 class PinRequest(BaseModel):
     number: str
 
+async def _scheduled_maintenance(interval: float) -> None:
+    # 全文検索 DB の定期保守（WAL なので検索は止まらない）
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(maintain)
+        except FileNotFoundError:
+            pass  # 索引がまだ作られていない
+        except Exception as exc:
+            logger.error(f"Scheduled FTS maintenance failed: {exc}", exc_info=True)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # メタデータの索引と綴り補正の削除辞書を先に作り、最初の検索要求に構築を待たせない
+    try:
+        await run_in_threadpool(warm_metadata)
+    except Exception as exc:
+        logger.error(f"Metadata warm-up failed: {exc}", exc_info=True)
+    interval = maintenance_interval()
+    task = asyncio.create_task(_scheduled_maintenance(interval)) if interval > 0 else None
+    yield
+    if task is not None:
+        task.cancel()
+
 def create_app() -> FastAPI:
     app = FastAPI(
         title="RFC Chronicle API",
         description="HTTP インターフェイスで RFC Chronicle CLI の各種操作を公開",
         version="0.1.0",
+        lifespan=lifespan,
     )
 
     app.add_middleware(
@@ -46,9 +99,33 @@ def create_app() -> FastAPI:
     async def get_metadata(save: bool = False):
         return await safe_run(client.fetch_metadata, save)
 
-    @app.get("/api/search", response_model=Dict[str, List[str]])
-    async def api_search(q: str):
-        return {"results": await safe_run(search_metadata, q)}
+    @app.get("/api/search", response_model=SearchResponse)
+    async def api_search(
+        q: str = "",
+        status: Optional[List[str]] = Query(None, description="Filter by status (repeatable)"),
+        date_from: Optional[str] = Query(None, pattern=r"^\d{4}(-\d{1,2})?$"),
+        date_to: Optional[str] = Query(None, pattern=r"^\d{4}(-\d{1,2})?$"),
+        sort: Literal["number", "-number", "date", "-date"] = "number",
+        limit: Optional[int] = Query(None, ge=0),
+        whole_word: bool = False,
+        fuzzy: bool = True,
+    ):
+        return await safe_run(
+            query_metadata,
+            q,
+            statuses=status,
+            date_from=date_from,
+            date_to=date_to,
+            sort=sort,
+            limit=limit,
+            whole_word=whole_word,
+            fuzzy=fuzzy,
+        )
+
+    @app.get("/api/suggest", response_model=SuggestResponse)
+    async def api_suggest(prefix: str, limit: int = Query(10, ge=1, le=50)):
+        items = await safe_run(suggest_metadata, prefix, limit)
+        return SuggestResponse(prefix=prefix, suggestions=items)
 
     @app.get("/api/semsearch", response_model=SemSearchResponse)
     async def api_semsearch(q: str, topk: int = 10):
@@ -57,13 +134,51 @@ def create_app() -> FastAPI:
         return SemSearchResponse(results=items)
 
     @app.get("/api/show/{rfc_num}", response_model=Dict[str, Any])
-    async def api_show(rfc_num: int):
-        return await safe_run(show_rfc_details, rfc_num, not_found=True)
-
-    @app.get("/api/fulltext", response_model=Dict[str, List[Dict[str, Any]]])
-    async def api_fulltext(q: str, limit: int = 10):
-        raw: List[Tuple[int, str]] = await safe_run(search_fulltext, q, limit=limit)
-        return {"results": [{"number": n, "snippet": s} for n, s in raw]}
+    async def api_show(rfc_num: int, refresh: bool = False):
+        return await safe_run(show_rfc_details, rfc_num, refresh=refresh, not_found=True)
+
+    @app.get("/api/show/{rfc_num}/sections", response_model=List[Dict[str, Any]])
+    async def api_sections(rfc_num: int):
+        return await safe_run(list_rfc_sections, rfc_num, not_found=True)
+
+    @app.get("/api/show/{rfc_num}/sections/{section_id}", response_model=Dict[str, Any])
+    async def api_show_section(rfc_num: int, section_id: str):
+        return await safe_run(show_rfc_section, rfc_num, section_id, not_found=True)
+
+    @app.get("/api/fulltext", response_model=FulltextResponse)
+    async def api_fulltext(
+        q: str,
+        limit: int = Query(10, ge=1, le=100),
+        cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+        snippets: bool = True,
+        mode: Literal["auto", "word", "substring"] = "auto",
+    ):
+        return await safe_run(
+            search_fulltext_page, q, limit=limit, cursor=cursor, snippets=snippets, mode=mode, bad_request=True,
+        )
+
+    # ─── 全文検索 DB の保守（RFC_ADMIN_TOKEN が無ければ公開しない） ─────────
+    token = admin_token()
+    if token:
+        admin = [Depends(_require_admin(token))]
+
+        @app.get("/api/admin/fts", response_model=Dict[str, Any], summary="Full-text index statistics",
+                 dependencies=admin)
+        async def api_fts_stats():
+            return await safe_run(fts_stats, not_found=True)
+
+        @app.post("/api/admin/fts/maintain", response_model=Dict[str, Any],
+                  summary="Merge segments and checkpoint the WAL", dependencies=admin)
+        async def api_fts_maintain(
+            optimize: Optional[bool] = None,
+            automerge: Optional[int] = Query(None, ge=0, le=16),
+            crisismerge: Optional[int] = Query(None, ge=2, le=1000),
+            checkpoint: Literal["PASSIVE", "FULL", "RESTART", "TRUNCATE"] = "PASSIVE",
+        ):
+            return await safe_run(
+                maintain, optimize=optimize, automerge=automerge, crisismerge=crisismerge,
+                checkpoint=checkpoint, not_found=True,
+            )
 
     # ─── ここからピン機能 ──────────────────────────────
     @app.get("/api/pins", response_model=List[str], summary="Get pinned RFC numbers")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List, Optional
 
 class SemSearchItem(BaseModel):
     score: float
@@ -7,3 +7,47 @@ class SemSearchItem(BaseModel):
 
 class SemSearchResponse(BaseModel):
     results: List[SemSearchItem]
+
+class FulltextItem(BaseModel):
+    number: str
+    score: float
+    snippet: Optional[str] = None
+
+class FulltextResponse(BaseModel):
+    results: List[FulltextItem]
+    next_cursor: Optional[str] = None
+    mode: str = "word"
+
+class SearchItem(BaseModel):
+    number: str
+    title: str
+    status: str
+    date: str
+
+class SearchFacets(BaseModel):
+    status: Dict[str, int]
+    year: Dict[str, int]
+
+class Completion(BaseModel):
+    text: str
+    kind: str
+    number: Optional[str] = None
+
+class SuggestResponse(BaseModel):
+    prefix: str
+    suggestions: List[Completion]
+
+class Suggestion(BaseModel):
+    word: str
+    distance: int
+
+class Correction(BaseModel):
+    term: str
+    suggestions: List[Suggestion]
+
+class SearchResponse(BaseModel):
+    total: int
+    results: List[SearchItem]
+    facets: SearchFacets
+    corrections: List[Correction] = []
+    corrected_query: Optional[str] = None
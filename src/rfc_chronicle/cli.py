@@ -1,27 +1,21 @@
 import cmd
+import json
 import textwrap
+import time
 from pathlib import Path
+from typing import Optional
 from importlib.metadata import version
 
 import click
-import numpy as np
-import faiss
-
-from rfc_chronicle.fetch_rfc import RFCClient
-from rfc_chronicle.search import search_metadata, semsearch
-from rfc_chronicle.fulltext import search_fulltext, rebuild_fulltext_index
-from rfc_chronicle.build_faiss import build_faiss_index
-from rfc_chronicle.pin import pin_rfc, unpin_rfc, list_pins
-from rfc_chronicle.show import show_rfc_details
-from rfc_chronicle.formatters import format_json, format_csv, format_md
 
 # ---------------------------------------------------------------------------
 # CLI entry point & interactive shell
 # ---------------------------------------------------------------------------
+# Commands import their dependencies when they run, so that startup (and
+# cheap commands such as `pins` or `--version`) never pays for numpy, faiss,
+# torch or the embedding model.
 __version__ = version("rfc-chronicle")
 
-client = RFCClient()  # shared client instance for the shell
-
 
 class RFCChronicleShell(cmd.Cmd):
     """RFC Chronicle – interactive shell."""
@@ -73,10 +67,14 @@ class RFCChronicleShell(cmd.Cmd):
     # ----------------------------------------------------------- core actions
     def do_fetch(self, _):
         """Fetch and cache *all* RFC metadata from the IETF site."""
-        client.fetch_metadata(save=True)
+        from rfc_chronicle.fetch_rfc import client
+
+        client.fetch_metadata(save=True, max_age=0)
 
     def do_build_faiss(self, _):
         """Build / update FAISS index from the latest saved vectors."""
+        from rfc_chronicle.build_faiss import build_faiss_index
+
         build_faiss_index()
 
     def do_fulltext(self, arg):
@@ -84,19 +82,29 @@ class RFCChronicleShell(cmd.Cmd):
         if not arg:
             print("Usage: fulltext <keyword>")
             return
-        for num, snippet in search_fulltext(arg):
-            print(f"RFC{num}\t…{snippet.strip()}…")
+        from rfc_chronicle.daemon import dispatch
+
+        for item in dispatch("fulltext", query=arg)["results"]:
+            print(f"RFC{item['number']}\t…{item['snippet'].strip()}…")
 
     def do_index_fulltext(self, _):
         """Rebuild the FTS5 index from raw text corpus."""
-        rebuild_fulltext_index()
+        from rfc_chronicle.fulltext import rebuild_fulltext_index
+        from rfc_chronicle.pending import PendingQueue
+        from rfc_chronicle.utils import PENDING_FILE
+
+        stats = rebuild_fulltext_index()
+        PendingQueue(PENDING_FILE).done("fulltext", stats["handled"])
+        print(_format_index_stats(stats))
 
     def do_search(self, arg):
         """Keyword search in cached metadata:  search <keyword>."""
         if not arg:
             print("Usage: search <keyword>")
             return
-        for rfc in search_metadata(arg):
+        from rfc_chronicle.daemon import dispatch
+
+        for rfc in dispatch("search_metadata", keyword=arg):
             print(rfc)
 
     def do_semsearch(self, arg):
@@ -104,32 +112,54 @@ class RFCChronicleShell(cmd.Cmd):
         if not arg:
             print("Usage: semsearch <keyword>")
             return
-        for score, num in semsearch(arg):  # <score, rfc_num>
+        from rfc_chronicle.daemon import dispatch
+
+        for score, num in dispatch("semsearch", query=arg):  # <score, rfc_num>
             print(f"RFC{num}: {score:.4f}")
 
     def do_pin(self, arg):
         """Pin an RFC number:  pin <number>."""
+        from rfc_chronicle.pin import pin_rfc
+
         pin_rfc(arg)
 
     def do_unpin(self, arg):
         """Unpin an RFC number:  unpin <number>."""
+        from rfc_chronicle.pin import unpin_rfc
+
         unpin_rfc(arg)
 
     def do_pins(self, _):
         """List pinned RFC numbers."""
+        from rfc_chronicle.pin import list_pins
+
         pins = list_pins()
         print(", ".join(pins) if pins else "(none pinned)")
 
     def do_show(self, arg):
-        """Show / export RFC details:  show <number> [json|csv|md]."""
+        """Show / export RFC details:  show <number> [json|csv|md] [--section <id>]."""
         parts = arg.split()
+        section = None
+        if "--section" in parts:
+            i = parts.index("--section")
+            if i + 1 >= len(parts):
+                print("Usage: show <number> [json|csv|md] [--section <id>]")
+                return
+            section = parts[i + 1]
+            del parts[i:i + 2]
         if not parts:
-            print("Usage: show <number> [json|csv|md]")
+            print("Usage: show <number> [json|csv|md] [--section <id>]")
             return
         num = parts[0]
         fmt = parts[1].lower() if len(parts) > 1 else "json"
-        save_dir = Path("data") / "texts"
-        records = show_rfc_details(num, save_dir)
+        from rfc_chronicle.formatters import format_csv, format_json, format_md
+        from rfc_chronicle.show import show_rfc_details, show_rfc_section
+
+        try:
+            records = show_rfc_section(num, section) if section else show_rfc_details(num)
+        except KeyError as exc:
+            print(exc.args[0])
+            return
         if fmt == "json":
             print(format_json(records))
         elif fmt == "csv":
@@ -159,6 +189,494 @@ def _shell_cmd():
     RFCChronicleShell().cmdloop()
 
 
+@cli.command("fetch")
+@click.option("--texts", is_flag=True, help="Also download RFC bodies into data/texts")
+@click.option(
+    "--concurrency",
+    default=8,
+    show_default=True,
+    type=click.IntRange(1, 64),
+    help="Number of parallel downloads (with --texts)",
+)
+@click.option(
+    "--rate",
+    default=10.0,
+    show_default=True,
+    type=float,
+    help="Max requests per second per host (0 = unlimited)",
+)
+@click.option(
+    "--refresh",
+    is_flag=True,
+    help="Revalidate already downloaded bodies with ETag/Last-Modified",
+)
+@click.option("--force", is_flag=True, help="Re-download bodies unconditionally")
+@click.option(
+    "--source",
+    type=click.Choice(["html", "xml"]),
+    default="html",
+    show_default=True,
+    help="Metadata source: search page table or rfc-index.xml",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Only merge new/changed RFCs into the stored metadata",
+)
+def _fetch_cmd(
+    texts: bool,
+    concurrency: int,
+    rate: float,
+    refresh: bool,
+    force: bool,
+    source: str,
+    incremental: bool,
+):
+    """Fetch RFC metadata (and optionally all bodies in bulk).
+
+    Without --refresh/--force, bodies already recorded as complete in the
+    download manifest are skipped, so an interrupted run resumes.
+    """
+    from rfc_chronicle.fetch_rfc import client
+    from rfc_chronicle.pending import PendingQueue
+    from rfc_chronicle.utils import PENDING_FILE
+
+    queue = PendingQueue(PENDING_FILE)
+    if incremental:
+        report = client.sync_metadata(source=source)
+        if report["not_modified"]:
+            click.echo("Metadata not modified since last sync")
+        click.echo(
+            f"Added {len(report['added'])}, changed {len(report['changed'])} "
+            f"({report['total']} RFC entries)"
+        )
+        # 今回の差分に加え、前回までの同期で取得できなかった分も取り直す
+        numbers = queue.pending("texts")
+    else:
+        # 明示的な fetch ではキャッシュの鮮度に関わらず再検証する
+        meta_list = client.fetch_metadata(save=True, source=source, max_age=0)
+        click.echo(f"Saved {len(meta_list)} RFC entries")
+        numbers = [m.get("number", "") for m in meta_list if m.get("number")]
+    if not texts:
+        return
+
+    stats = client.fetch_texts(
+        numbers,
+        Path("data") / "texts",
+        concurrency=concurrency,
+        rate=rate,
+        use_conditional=not force,
+        skip_complete=not (refresh or force),
+    )
+    # 失敗した番号は未処理のまま残し、次の fetch --incremental --texts で取り直す
+    queue.done("texts", {client._normalize_number(str(n)) for n in numbers} - set(stats["errors"]))
+    click.echo(
+        f"Downloaded {stats['downloaded']}, not modified {stats['not_modified']}, "
+        f"skipped {stats['skipped']}, failed {stats['failed']} ({stats['bytes'] / 1e6:.1f} MB)"
+    )
+
+
+@cli.command("import")
+@click.argument(
+    "source",
+    type=click.Path(exists=True, path_type=Path),
+)
+@click.option(
+    "--workers",
+    default=4,
+    show_default=True,
+    type=click.IntRange(1, 64),
+    help="Number of parallel normalize/write workers",
+)
+@click.option("--overwrite", is_flag=True, help="Rewrite documents even if unchanged")
+def _import_cmd(source: Path, workers: int, overwrite: bool):
+    """Import RFC texts from a local tar/zip archive or mirror directory."""
+    from rfc_chronicle.importer import import_archive
+
+    stats = import_archive(source, Path("data") / "texts", workers=workers, overwrite=overwrite)
+    click.echo(
+        f"Imported {stats['written']}, unchanged {stats['unchanged']}, failed {stats['failed']}"
+    )
+    for num, error in sorted(stats["errors"].items()):
+        click.echo(f"  RFC {num}: {error}", err=True)
+
+
+@cli.command("pack")
+@click.option(
+    "--keep-loose",
+    is_flag=True,
+    help="Keep data/texts/*.txt after packing them",
+)
+def _pack_cmd(keep_loose: bool):
+    """Pack data/texts/*.txt into a single compressed document store."""
+    from rfc_chronicle.docstore import pack_texts
+
+    stats = pack_texts(Path("data") / "texts", remove_loose=not keep_loose)
+    click.echo(
+        f"Packed {stats['documents']} documents: "
+        f"{stats['raw_bytes'] / 1e6:.1f} MB -> {stats['packed_bytes'] / 1e6:.1f} MB"
+    )
+
+
+@cli.command("preprocess")
+@click.option(
+    "--workers",
+    default=None,
+    type=click.IntRange(1, 256),
+    help="Number of worker processes (default: CPU count)",
+)
+@click.option(
+    "--chunk-size",
+    default=64,
+    show_default=True,
+    type=click.IntRange(1, 10000),
+    help="Documents per worker batch",
+)
+@click.option("--force", is_flag=True, help="Re-parse documents even if cached")
+def _preprocess_cmd(workers: Optional[int], chunk_size: int, force: bool):
+    """Clean and parse every stored RFC text into data/parsed."""
+    from rfc_chronicle.preprocess import preprocess_corpus
+
+    stats = preprocess_corpus(
+        Path("data") / "texts", workers=workers, chunk_size=chunk_size, force=force
+    )
+    click.echo(
+        f"Parsed {stats['parsed']}, skipped {stats['skipped']}, failed {stats['failed']} "
+        f"of {stats['documents']} documents in {stats['seconds']:.1f}s "
+        f"({stats['docs_per_sec']:.0f} docs/sec)"
+    )
+
+
+@cli.command("search")
+@click.argument("keyword", required=False, default="")
+@click.option("--keyword", "keyword_opt", default=None, help="Same as the KEYWORD argument")
+@click.option("--status", "statuses", multiple=True, help="Filter by status (repeatable)")
+@click.option("--from", "--from-date", "date_from", default=None, metavar="YYYY[-MM]", help="Published on or after")
+@click.option("--to", "--to-date", "date_to", default=None, metavar="YYYY[-MM]", help="Published on or before")
+@click.option(
+    "--sort",
+    type=click.Choice(["number", "-number", "date", "-date"]),
+    default="number",
+    show_default=True,
+    help="Sort order",
+)
+@click.option("--limit", type=click.IntRange(min=0), default=None, help="Maximum number of results")
+@click.option("--whole-word", is_flag=True, help="Match whole words instead of substrings")
+@click.option("--facets", is_flag=True, help="Also print per-status and per-year counts")
+@click.option("--no-fuzzy", is_flag=True, help="Do not retry with spelling corrections")
+def _search_cmd(
+    keyword: str,
+    keyword_opt: Optional[str],
+    statuses: tuple,
+    date_from: Optional[str],
+    date_to: Optional[str],
+    sort: str,
+    limit: Optional[int],
+    whole_word: bool,
+    facets: bool,
+    no_fuzzy: bool,
+):
+    """Search cached metadata with status / date filters."""
+    from rfc_chronicle.daemon import dispatch
+
+    if keyword_opt is not None:
+        if keyword:
+            raise click.UsageError("Give the keyword either as an argument or with --keyword, not both")
+        keyword = keyword_opt
+    try:
+        res = dispatch(
+            "search",
+            keyword=keyword,
+            statuses=statuses,
+            date_from=date_from,
+            date_to=date_to,
+            sort=sort,
+            limit=limit,
+            whole_word=whole_word,
+            fuzzy=not no_fuzzy,
+        )
+    except ValueError as exc:
+        raise click.BadParameter(str(exc))
+    if res["corrected_query"]:
+        click.echo(f"Showing results for: {res['corrected_query']}", err=True)
+    elif res["corrections"]:
+        hints = ", ".join(s["word"] for c in res["corrections"] for s in c["suggestions"])
+        click.echo(f"Did you mean: {hints}", err=True)
+    if res["results"]:
+        click.echo("Matched " + ", ".join(f"RFC {item['number']}" for item in res["results"]))
+    for item in res["results"]:
+        click.echo(f"RFC {item['number']}: {item['title']}\t{item['date']}\t{item['status']}")
+    click.echo(f"({len(res['results'])} of {res['total']} results)", err=True)
+    if facets:
+        for name, counts in res["facets"].items():
+            click.echo(f"{name}: " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+
+
+def _format_index_stats(stats: dict) -> str:
+    shards = f" across {stats['shards']} shards" if stats.get("shards", 1) > 1 else ""
+    return (
+        f"Indexed {stats['indexed']}, unchanged {stats['unchanged']}, removed {stats['removed']}, "
+        f"failed {stats['failed']} in {stats['seconds']:.1f}s "
+        f"({stats['docs_per_sec']:.0f} docs/sec, {stats['mb_per_sec']:.1f} MB/s){shards}"
+    )
+
+
+@cli.command("fulltext")
+@click.argument("query")
+@click.option("--limit", default=10, show_default=True, type=click.IntRange(1, 100), help="Results per page")
+@click.option("--cursor", default=None, help="Continue from the cursor printed by the previous page")
+@click.option("--no-snippets", is_flag=True, help="Print only numbers and scores")
+@click.option(
+    "--mode",
+    type=click.Choice(["auto", "word", "substring"]),
+    default="auto",
+    show_default=True,
+    help="word: FTS5 query syntax; substring: trigram index; auto: pick per query",
+)
+def _fulltext_cmd(query: str, limit: int, cursor: Optional[str], no_snippets: bool, mode: str):
+    """Full-text search ranked by BM25 (SQLite FTS5 query syntax)."""
+    from rfc_chronicle.daemon import dispatch
+
+    try:
+        page = dispatch("fulltext", query=query, limit=limit, cursor=cursor, snippets=not no_snippets, mode=mode)
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    for item in page["results"]:
+        line = f"RFC{item['number']}\t{item['score']:.3f}"
+        if item["snippet"] is not None:
+            line += f"\t…{item['snippet'].strip()}…"
+        click.echo(line)
+    if page["next_cursor"]:
+        click.echo(f"Next page: --cursor {page['next_cursor']}")
+
+
+@cli.command("index-fulltext")
+@click.option(
+    "--workers",
+    default=4,
+    show_default=True,
+    type=click.IntRange(1, 64),
+    help="Threads reading and decoding documents",
+)
+@click.option(
+    "--batch-size",
+    default=200,
+    show_default=True,
+    type=click.IntRange(1, 100000),
+    help="Documents per write transaction",
+)
+@click.option(
+    "--trigram/--no-trigram",
+    default=None,
+    help="Create (or drop) the trigram index used for substring and Japanese queries",
+)
+@click.option(
+    "--shards",
+    type=click.IntRange(1, 64),
+    default=None,
+    help="Split the index into N databases by RFC number, built in parallel (1 merges them back)",
+)
+@click.option(
+    "--pending",
+    "pending_only",
+    is_flag=True,
+    help="Only reindex RFCs added or changed by `fetch --incremental` and not indexed yet",
+)
+def _index_fulltext_cmd(
+    workers: int, batch_size: int, trigram: Optional[bool], shards: Optional[int], pending_only: bool
+):
+    """Build or incrementally update the full-text index (data/fulltext.db)."""
+    from rfc_chronicle.fulltext import rebuild_fulltext_index
+    from rfc_chronicle.pending import PendingQueue
+    from rfc_chronicle.utils import PENDING_FILE
+
+    queue = PendingQueue(PENDING_FILE)
+    numbers = None
+    if pending_only:
+        numbers = [str(n) for n in queue.pending("fulltext")]
+        if not numbers:
+            click.echo("No pending RFCs to index")
+            return
+    stats = rebuild_fulltext_index(
+        numbers=numbers, workers=workers, batch_size=batch_size, trigram=trigram, shards=shards
+    )
+    # 本文が無い・読めなかった RFC は未処理のまま残す
+    queue.done("fulltext", stats["handled"])
+    click.echo(_format_index_stats(stats))
+
+
+def _format_fts_stats(stats: dict) -> str:
+    lines = []
+    for db in stats["databases"]:
+        lines.append(
+            f"{db['path']}: {db['file_bytes'] / 1e6:.1f} MB, WAL {db['wal_bytes'] / 1e6:.1f} MB, "
+            f"{db['free_pages']} free pages, fits in cache: {db['cache']['fits_in_cache']}, "
+            f"fits in mmap: {db['cache']['fits_in_mmap']}"
+        )
+        for name, table in db["tables"].items():
+            size = "n/a" if table["index_bytes"] is None else f"{table['index_bytes'] / 1e6:.1f} MB"
+            lines.append(
+                f"  {name}: {table['segments']} segments, index {size}, "
+                f"automerge={table['automerge']} crisismerge={table['crisismerge']}"
+            )
+    return "\n".join(lines)
+
+
+@cli.command("fts-maint")
+@click.option("--stats", "stats_only", is_flag=True, help="Only report index statistics")
+@click.option(
+    "--optimize/--no-optimize",
+    default=None,
+    help="Force (or skip) a full optimize; by default only heavily fragmented tables are optimized",
+)
+@click.option("--automerge", type=click.IntRange(0, 16), default=None, help="Set the FTS5 automerge level")
+@click.option("--crisismerge", type=click.IntRange(2, 1000), default=None, help="Set the FTS5 crisismerge level")
+@click.option(
+    "--checkpoint",
+    type=click.Choice(["passive", "full", "restart", "truncate"], case_sensitive=False),
+    default="passive",
+    show_default=True,
+    help="WAL checkpoint mode (passive never waits for readers)",
+)
+@click.option("--every", type=click.FloatRange(min=1), default=None, metavar="SECONDS",
+              help="Keep running maintenance at this interval")
+@click.option("--json", "as_json", is_flag=True, help="Print raw JSON")
+def _fts_maint_cmd(
+    stats_only: bool,
+    optimize: Optional[bool],
+    automerge: Optional[int],
+    crisismerge: Optional[int],
+    checkpoint: str,
+    every: Optional[float],
+    as_json: bool,
+):
+    """Report and maintain the full-text index (segments, sizes, WAL)."""
+    from rfc_chronicle.ftsmaint import fts_stats, maintain
+
+    while True:
+        try:
+            if not stats_only:
+                result = maintain(optimize=optimize, automerge=automerge, crisismerge=crisismerge,
+                                  checkpoint=checkpoint)
+                if as_json:
+                    click.echo(json.dumps(result, ensure_ascii=False))
+                else:
+                    for db in result["databases"]:
+                        for name, done in db["tables"].items():
+                            click.echo(f"{db['path']} {name}: segments {done['segments_before']} -> "
+                                       f"{done['segments_after']}")
+            stats = fts_stats()
+        except FileNotFoundError as exc:
+            raise click.ClickException(str(exc))
+        click.echo(json.dumps(stats, ensure_ascii=False) if as_json else _format_fts_stats(stats))
+        if every is None:
+            break
+        time.sleep(every)
+
+
+@cli.command("show")
+@click.argument("number")
+@click.option(
+    "--section",
+    default=None,
+    help="Only show this section (e.g. 4.2 or A.1)",
+)
+@click.option(
+    "-f",
+    "--format",
+    "fmt",
+    type=click.Choice(["json", "csv", "md"]),
+    default="json",
+    show_default=True,
+    help="Output format",
+)
+def _show_cmd(number: str, section: Optional[str], fmt: str):
+    """Show RFC details, or a single section of the body."""
+    from rfc_chronicle.formatters import format_csv, format_json, format_md
+    from rfc_chronicle.show import show_rfc_details, show_rfc_section
+
+    try:
+        details = show_rfc_section(number, section) if section else show_rfc_details(number)
+    except KeyError as exc:
+        raise click.ClickException(exc.args[0])
+    if fmt == "csv":
+        click.echo(format_csv(details))
+    elif fmt == "md":
+        click.echo(format_md([details]))
+    else:
+        click.echo(format_json(details))
+
+
+@cli.command("semsearch")
+@click.argument("query")
+@click.option("--topk", default=10, show_default=True, type=click.IntRange(1, 1000), help="Number of results")
+def _semsearch_cmd(query: str, topk: int):
+    """Semantic search over the FAISS index (uses the daemon if it is running)."""
+    from rfc_chronicle.daemon import dispatch
+
+    try:
+        results = dispatch("semsearch", query=query, topk=topk)
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
+    for score, num in results:
+        click.echo(f"RFC{num}: {score:.4f}")
+
+
+@cli.group("daemon")
+def _daemon_group():
+    """Keep the embedding model and indexes loaded in a background process.
+
+    While the daemon is running, search, fulltext and semsearch (CLI and shell)
+    forward their queries to it over a Unix socket; otherwise they run in-process.
+    """
+
+
+@_daemon_group.command("start")
+@click.option("--foreground", is_flag=True, help="Run in this terminal instead of detaching")
+@click.option("--workers", default=4, show_default=True, type=click.IntRange(1, 64), help="Request threads")
+def _daemon_start_cmd(foreground: bool, workers: int):
+    """Start the daemon and wait until the model and indexes are loaded."""
+    from rfc_chronicle import daemon
+
+    try:
+        if foreground:
+            click.echo(f"Listening on {daemon.SOCKET_PATH} (Ctrl-C to stop)")
+            daemon.serve(workers=workers)
+            return
+        info = daemon.start_background()
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(f"Daemon started (pid {info['pid']}) on {daemon.SOCKET_PATH}")
+
+
+@_daemon_group.command("stop")
+def _daemon_stop_cmd():
+    """Stop the running daemon."""
+    from rfc_chronicle import daemon
+
+    click.echo("Daemon stopped" if daemon.stop() else "Daemon is not running")
+
+
+@_daemon_group.command("status")
+@click.option("--json", "as_json", is_flag=True, help="Print the raw status as JSON")
+def _daemon_status_cmd(as_json: bool):
+    """Show whether the daemon is running and what it has loaded."""
+    from rfc_chronicle import daemon
+
+    info = daemon.status()
+    if as_json:
+        click.echo(json.dumps(info, indent=2))
+    elif info is None:
+        click.echo("Daemon is not running")
+    else:
+        warm = info["warm"]
+        click.echo(
+            f"Daemon running (pid {info['pid']}, up {info['uptime']:.0f}s, {info['requests']} requests); "
+            f"semantic index {'loaded' if warm.get('semantic') else 'not loaded'}, "
+            f"{warm.get('fulltext_databases', 0)} full-text database(s) open"
+        )
+
+
 @cli.command("build_faiss")
 @click.option(
     "--vectors",
@@ -180,6 +698,9 @@ def _shell_cmd():
 )
 def _build_faiss_cmd(vectors: Path, index: Path, index_type: str):
     """Build a FAISS index from saved sentence‑transformer vectors."""
+    import faiss
+    import numpy as np
+
     vecs = np.load(vectors)
     d = vecs.shape[1]
 
@@ -200,30 +721,38 @@ def _build_faiss_cmd(vectors: Path, index: Path, index_type: str):
     click.echo(f" FAISS index '{index}' built (type: {index_type}, d={d}).")
 
 
-    @cli.command("pin")
-    @click.argument("number")
-    def _pin_cmd(number: str):
-        """Pin an RFC number for later reference."""
-        pin_rfc(number)
-        click.echo(f"Pinned RFC {number}")
+@cli.command("pin")
+@click.argument("number")
+def _pin_cmd(number: str):
+    """Pin an RFC number for later reference."""
+    from rfc_chronicle.pin import pin_rfc
 
-    @cli.command("unpin")
-    @click.argument("number")
-    def _unpin_cmd(number: str):
-        """Remove an RFC number from your pins."""
-        unpin_rfc(number)
-        click.echo(f"Unpinned RFC {number}")
+    pin_rfc(number)
+    click.echo(f"Pinned RFC {number}")
 
-    @cli.command("pins")
-    def _list_pins_cmd():
-        """List all pinned RFC numbers."""
-        pins = list_pins()
-        if not pins:
-            click.echo("(none pinned)")
-        else:
-            click.echo("Pinned RFCs:")
-            for n in pins:
-                click.echo(f"- RFC {n}")
+
+@cli.command("unpin")
+@click.argument("number")
+def _unpin_cmd(number: str):
+    """Remove an RFC number from your pins."""
+    from rfc_chronicle.pin import unpin_rfc
+
+    unpin_rfc(number)
+    click.echo(f"Unpinned RFC {number}")
+
+
+@cli.command("pins")
+def _list_pins_cmd():
+    """List all pinned RFC numbers."""
+    from rfc_chronicle.pin import list_pins
+
+    pins = list_pins()
+    if not pins:
+        click.echo("(none pinned)")
+    else:
+        click.echo("Pinned RFCs:")
+        for n in pins:
+            click.echo(f"- RFC {n}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,270 @@
+"""
+常駐プロセス（デーモン）による検索の高速化
+- 埋め込みモデル・FAISS インデックス・全文検索 DB の接続を読み込んだまま、
+  Unix ドメインソケットで検索要求を受け付ける
+- プロトコルは 1 行 1 JSON：要求 {"op", "args"} → 応答 {"ok", "result"} / {"ok": false, "error", "type"}
+- CLI / シェルは dispatch() を通して呼び出し、デーモンが動いていればそちらへ転送し、
+  動いていなければ（または RFC_NO_DAEMON=1 なら）同じ関数をプロセス内で実行する
+- 要求は固定数のワーカースレッドで処理する（スレッドごとの SQLite 接続を使い回すため）
+"""
+import importlib
+import json
+import logging
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+BASE_DIR = Path.cwd() / "data"
+SOCKET_PATH = Path(os.getenv("RFC_DAEMON_SOCKET", str(BASE_DIR / "daemon.sock")))
+LOG_PATH = BASE_DIR / "daemon.log"
+CONNECT_TIMEOUT = 0.5
+REQUEST_TIMEOUT = float(os.getenv("RFC_DAEMON_TIMEOUT", "120"))
+DEFAULT_WORKERS = 4
+
+# 転送できる操作 → (モジュール, 関数)。関数は使うときに import する
+OPS: Dict[str, Tuple[str, str]] = {
+    "semsearch": ("rfc_chronicle.search", "semsearch"),
+    "search": ("rfc_chronicle.search", "query_metadata"),
+    "search_metadata": ("rfc_chronicle.search", "search_metadata"),
+    "suggest": ("rfc_chronicle.search", "suggest_metadata"),
+    "fulltext": ("rfc_chronicle.fulltext", "search_fulltext_page"),
+}
+# デーモン側の例外をクライアント側で同じ型として投げ直す
+_ERRORS = {cls.__name__: cls for cls in (ValueError, KeyError, FileNotFoundError, RuntimeError)}
+
+logger = logging.getLogger(__name__)
+
+
+class DaemonUnavailable(ConnectionError):
+    """デーモンが動いていない・応答しない"""
+
+
+def _run_local(op: str, args: Dict[str, Any]) -> Any:
+    if op not in OPS:
+        raise ValueError(f"Unknown operation: {op!r}")
+    module, name = OPS[op]
+    return getattr(importlib.import_module(module), name)(**args)
+
+
+# --- 1. クライアント ---
+
+def call(op: str, socket_path: Optional[Path] = None, **args: Any) -> Any:
+    """デーモンに op を実行させて結果を返す。つながらなければ DaemonUnavailable"""
+    path = socket_path or SOCKET_PATH
+    try:
+        request = (json.dumps({"op": op, "args": args}) + "\n").encode("utf-8")
+    except (TypeError, ValueError) as exc:  # JSON にできない引数はプロセス内で実行させる
+        raise DaemonUnavailable(f"Arguments cannot be sent to the daemon: {exc}") from exc
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    except OSError as exc:
+        raise DaemonUnavailable(f"Cannot create a Unix socket: {exc}") from exc
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(str(path))
+        except OSError as exc:  # 無い・拒否・タイムアウト・パスが長すぎる・権限が無い など
+            raise DaemonUnavailable(f"Daemon not running at {path}: {exc}") from exc
+        sock.settimeout(REQUEST_TIMEOUT)
+        try:
+            sock.sendall(request)
+            line = sock.makefile("rb").readline()
+        except (OSError, socket.timeout) as exc:
+            raise DaemonUnavailable(f"Daemon at {path} did not answer: {exc}") from exc
+    finally:
+        sock.close()
+    if not line:
+        raise DaemonUnavailable(f"Daemon at {path} closed the connection")
+    reply = json.loads(line)
+    if not reply["ok"]:
+        raise _ERRORS.get(reply.get("type"), RuntimeError)(reply["error"])
+    return reply["result"]
+
+
+def dispatch(op: str, **args: Any) -> Any:
+    """デーモンが動いていれば転送し、そうでなければプロセス内で実行する"""
+    if os.getenv("RFC_NO_DAEMON") != "1" and op in OPS:
+        try:
+            return call(op, **args)
+        except DaemonUnavailable:
+            pass
+    return _run_local(op, args)
+
+
+# --- 2. サーバー ---
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for line in self.rfile:
+            reply: Dict[str, Any]
+            try:
+                request = json.loads(line)
+                op, args = request["op"], request.get("args") or {}
+                if op == "ping":
+                    reply = {"ok": True, "result": self.server.status()}
+                elif op == "shutdown":
+                    reply = {"ok": True, "result": None}
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                else:
+                    reply = {"ok": True, "result": _run_local(op, args)}
+                    self.server.requests += 1
+            except Exception as exc:  # 1 件の失敗でデーモンを止めない
+                kind = next((c.__name__ for c in type(exc).__mro__ if c.__name__ in _ERRORS), "RuntimeError")
+                message = exc.args[0] if len(exc.args) == 1 and isinstance(exc.args[0], str) else str(exc)
+                reply = {"ok": False, "error": message, "type": kind}
+            try:
+                data = json.dumps(reply, ensure_ascii=False)
+            except TypeError as exc:  # 結果が JSON にできない
+                data = json.dumps({"ok": False, "error": str(exc), "type": "RuntimeError"})
+            self.wfile.write((data + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """接続を固定数のワーカースレッドで処理する Unix ソケットサーバー"""
+
+    def __init__(self, path: Path, workers: int = DEFAULT_WORKERS) -> None:
+        self.path = path
+        self.started = time.time()
+        self.requests = 0
+        self.warm: Dict[str, Any] = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rfc-daemon")
+        super().__init__(str(path), _Handler)
+
+    def process_request(self, request, client_address) -> None:
+        self._pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._pool.shutdown(wait=False)
+        self.path.unlink(missing_ok=True)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "uptime": time.time() - self.started,
+            "requests": self.requests,
+            "warm": self.warm,
+        }
+
+
+def warm_up() -> Dict[str, Any]:
+    """モデル・FAISS インデックス・全文検索 DB・メタデータの索引を読み込んでおく（無いものは飛ばす）"""
+    from rfc_chronicle.fulltext import _connections, index_paths
+    from rfc_chronicle.search import get_semantic_index, warm_metadata
+
+    warm: Dict[str, Any] = {}
+    semantic = get_semantic_index()
+    try:
+        semantic.index()
+        semantic.model()
+        warm["semantic"] = True
+    except RuntimeError as exc:
+        logger.warning("Semantic index not loaded: %s", exc)
+        warm["semantic"] = False
+    paths = [p for p in index_paths() if p.exists()]
+    for path in paths:
+        _connections(path).connection()
+    warm["fulltext_databases"] = len(paths)
+    # 綴り補正の削除辞書まで作り、最初の 0 件検索に構築を待たせない
+    warm["metadata"] = warm_metadata()
+    return warm
+
+
+def _socket_in_use(path: Path) -> bool:
+    try:
+        call("ping", socket_path=path)
+    except DaemonUnavailable:
+        return False
+    return True
+
+
+def serve(socket_path: Optional[Path] = None, workers: int = DEFAULT_WORKERS, warm: bool = True) -> None:
+    """フォアグラウンドでデーモンを動かす（shutdown 要求か Ctrl-C で終了）"""
+    path = socket_path or SOCKET_PATH
+    if path.exists():
+        if _socket_in_use(path):
+            raise RuntimeError(f"Daemon already running at {path}")
+        path.unlink()  # 前回異常終了したときのソケットファイル
+    path.parent.mkdir(parents=True, exist_ok=True)
+    warmed = warm_up() if warm else {}
+    old_umask = os.umask(0o077)  # ソケットは自分だけが使える
+    try:
+        server = DaemonServer(path, workers)
+    finally:
+        os.umask(old_umask)
+    server.warm = warmed
+    logger.info("Listening on %s", path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def start_background(socket_path: Optional[Path] = None, timeout: float = 300.0) -> Dict[str, Any]:
+    """デーモンを別プロセスで起動し、ウォームアップが終わって応答するまで待つ"""
+    path = socket_path or SOCKET_PATH
+    if _socket_in_use(path):
+        raise RuntimeError(f"Daemon already running at {path}")
+    LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    env = dict(os.environ, RFC_DAEMON_SOCKET=str(path))
+    with open(LOG_PATH, "ab") as log:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "rfc_chronicle.daemon"],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            env=env,
+            start_new_session=True,
+        )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Daemon exited with status {proc.returncode}; see {LOG_PATH}")
+        try:
+            return call("ping", socket_path=path)
+        except DaemonUnavailable:
+            time.sleep(0.2)
+    raise RuntimeError(f"Daemon did not become ready within {timeout:.0f}s; see {LOG_PATH}")
+
+
+def stop(socket_path: Optional[Path] = None) -> bool:
+    """動いているデーモンを止める。動いていなければ False"""
+    try:
+        call("shutdown", socket_path=socket_path)
+    except DaemonUnavailable:
+        return False
+    return True
+
+
+def status(socket_path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """動いていればデーモンの状態、そうでなければ None"""
+    try:
+        return call("ping", socket_path=socket_path)
+    except DaemonUnavailable:
+        return None
+
+
+__all__ = ["dispatch", "call", "serve", "start_background", "stop", "status", "DaemonUnavailable", "DaemonServer"]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    serve()
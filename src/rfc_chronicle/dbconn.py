@@ -0,0 +1,91 @@
+"""
+検索用の読み取り専用 SQLite 接続
+- スレッドごとに 1 本の接続を開いたまま使い回す（API のスレッドプールからも安全）
+- URI の mode=ro で開き、mmap / ページキャッシュ / 一時領域などのプラグマを設定
+- プリペアドステートメントは接続ごとの statement cache に残る
+- DB ファイルが差し替えられたら（inode が変わったら）次の呼び出しで開き直す
+"""
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+# 環境変数で上書き可能なチューニング値
+MMAP_SIZE = int(os.getenv("RFC_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+CACHE_SIZE_KIB = int(os.getenv("RFC_SQLITE_CACHE_KIB", str(64 * 1024)))
+CACHED_STATEMENTS = 64
+
+READONLY_PRAGMAS = (
+    f"PRAGMA mmap_size={MMAP_SIZE}",
+    f"PRAGMA cache_size=-{CACHE_SIZE_KIB}",  # 負数は KiB 指定
+    "PRAGMA query_only=ON",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def _file_key(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+class ReadOnlyConnections:
+    """path の DB に対するスレッドローカルな読み取り専用接続の管理"""
+
+    def __init__(
+        self,
+        path: Path,
+        on_open: Optional[Callable[[sqlite3.Connection], None]] = None,
+    ) -> None:
+        self.path = path
+        self.on_open = on_open
+        self._local = threading.local()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            f"file:{self.path}?mode=ro",
+            uri=True,
+            cached_statements=CACHED_STATEMENTS,
+            check_same_thread=False,
+        )
+        for pragma in READONLY_PRAGMAS:
+            conn.execute(pragma)
+        if self.on_open is not None:
+            self.on_open(conn)
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """このスレッドの接続を返す（DB が差し替えられていれば開き直す）"""
+        key = _file_key(self.path)
+        if key is None:
+            raise FileNotFoundError(f"Database not found: {self.path}")
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.key == key:
+            return conn
+        if conn is not None:
+            conn.close()  # 差し替え前の DB を掴んだままにしない
+        conn = self._open()
+        self._local.conn, self._local.key = conn, key
+        return conn
+
+
+_POOLS: Dict[Path, ReadOnlyConnections] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def readonly_connections(
+    path: Path,
+    on_open: Optional[Callable[[sqlite3.Connection], None]] = None,
+) -> ReadOnlyConnections:
+    """path ごとの共有 ReadOnlyConnections を返す"""
+    key = Path(path).resolve()
+    with _POOLS_LOCK:
+        if key not in _POOLS:
+            _POOLS[key] = ReadOnlyConnections(Path(path), on_open)
+        return _POOLS[key]
+
+
+__all__ = ["ReadOnlyConnections", "readonly_connections", "READONLY_PRAGMAS"]
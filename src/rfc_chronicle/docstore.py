@@ -0,0 +1,248 @@
+"""
+パック形式の RFC 本文ストア
+- data/texts/texts.pack 1 ファイルに、RFC ごとに zlib 圧縮したブロックを番号順に格納
+- ファイル末尾に「RFC番号 = スロット位置」のオフセット表を置き、mmap で O(1) 参照
+- ダウンロード直後の {num}.txt（ルーズファイル）はパックより優先して読む
+  （pack_texts でパックへ取り込む）
+"""
+import os
+import re
+import struct
+import threading
+import zlib
+from mmap import mmap, ACCESS_READ
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+PACK_NAME = "texts.pack"
+LOOSE_RE = re.compile(r"^(\d+)\.txt$")
+
+_MAGIC = b"RFCPACK1"
+_FOOTER = struct.Struct("<8sQI")  # magic, オフセット表の位置, スロット数
+_SLOT = struct.Struct("<QII")     # ブロック位置, 圧縮後サイズ, 元サイズ
+_COMPRESS_LEVEL = 6
+
+
+class _Pack(NamedTuple):
+    """開いているパックの不変スナップショット（mmap とオフセット表を必ず組で使う）"""
+    mm: mmap
+    table_offset: int
+    nslots: int
+    mtime_ns: int
+
+
+def _open_pack(path: Path) -> _Pack:
+    """パックを mmap し、フッターとオフセット表の範囲を検証する"""
+    with path.open("rb") as f:
+        st = os.fstat(f.fileno())
+        if st.st_size < _FOOTER.size:
+            raise RuntimeError(f"Corrupted document pack (too short): {path}")
+        mm = mmap(f.fileno(), 0, access=ACCESS_READ)
+    magic, table_offset, nslots = _FOOTER.unpack_from(mm, len(mm) - _FOOTER.size)
+    if magic != _MAGIC or table_offset + nslots * _SLOT.size != len(mm) - _FOOTER.size:
+        mm.close()
+        raise RuntimeError(f"Corrupted document pack: {path}")
+    return _Pack(mm, table_offset, nslots, st.st_mtime_ns)
+
+
+class DocStore:
+    """パック + ルーズファイルを 1 つのコーパスとして読むリーダ（スレッドセーフ）"""
+
+    def __init__(self, text_dir: Path) -> None:
+        self.text_dir = text_dir
+        self.pack_path = text_dir / PACK_NAME
+        self._lock = threading.Lock()
+        self._stat_key: Optional[Tuple[int, int]] = None
+        self._pack: Optional[_Pack] = None
+
+    # ------------------------------------------------------------ pack access
+    def _current(self) -> Optional[_Pack]:
+        """
+        現在のパックのスナップショットを返す（差し替えられていれば開き直す）。
+        呼び出し側は 1 回の参照の間、同じスナップショットだけを使う
+        """
+        try:
+            st = self.pack_path.stat()
+            key = (st.st_ino, st.st_mtime_ns)
+        except FileNotFoundError:
+            key = None
+        if key == self._stat_key:
+            return self._pack
+        with self._lock:
+            if key != self._stat_key:
+                # 読み取り中のスレッドがあり得るため古い mmap は明示的に閉じない
+                self._pack = _open_pack(self.pack_path) if key is not None else None
+                self._stat_key = key
+            return self._pack
+
+    @staticmethod
+    def _slot(pack: Optional[_Pack], num: int) -> Optional[Tuple[int, int, int]]:
+        if pack is None or not 0 <= num < pack.nslots:
+            return None
+        slot = _SLOT.unpack_from(pack.mm, pack.table_offset + num * _SLOT.size)
+        if not slot[1]:
+            return None
+        if slot[0] + slot[1] > pack.table_offset:
+            raise RuntimeError(f"Corrupted document pack (slot {num} out of range)")
+        return slot
+
+    def _packed_block(self, num: int) -> Optional[Tuple[bytes, int]]:
+        """(圧縮されたままのブロック, 元サイズ) を返す"""
+        pack = self._current()
+        slot = self._slot(pack, num)
+        if slot is None:
+            return None
+        offset, clen, raw_len = slot
+        return pack.mm[offset:offset + clen], raw_len
+
+    def packed_numbers(self) -> List[int]:
+        """パックに格納済みの RFC 番号"""
+        pack = self._current()
+        if pack is None:
+            return []
+        return [
+            num for num in range(pack.nslots)
+            if _SLOT.unpack_from(pack.mm, pack.table_offset + num * _SLOT.size)[1]
+        ]
+
+    # ------------------------------------------------------------ public API
+    def loose_path(self, num: int) -> Path:
+        return self.text_dir / f"{num}.txt"
+
+    def loose_numbers(self) -> List[int]:
+        """パック未取り込みのルーズファイルの RFC 番号"""
+        if not self.text_dir.is_dir():
+            return []
+        nums = []
+        with os.scandir(self.text_dir) as it:
+            for entry in it:
+                m = LOOSE_RE.match(entry.name)
+                if m:
+                    nums.append(int(m.group(1)))
+        return nums
+
+    def numbers(self) -> List[int]:
+        """格納されている全 RFC 番号（昇順）"""
+        return sorted(set(self.packed_numbers()) | set(self.loose_numbers()))
+
+    def size(self, num: int) -> Optional[int]:
+        """本文の元バイト数（存在しなければ None）"""
+        try:
+            return self.loose_path(num).stat().st_size
+        except FileNotFoundError:
+            pass
+        slot = self._slot(self._current(), num)
+        return slot[2] if slot else None
+
+    def version(self, num: int) -> Optional[Tuple[int, int]]:
+        """
+        (元バイト数, 更新時刻 ns)。ルーズファイルはそのファイル、パック内はパックファイルの更新時刻。
+        内容が変われば（同じサイズでも）値が変わる
+        """
+        try:
+            st = self.loose_path(num).stat()
+            return st.st_size, st.st_mtime_ns
+        except FileNotFoundError:
+            pass
+        pack = self._current()
+        slot = self._slot(pack, num)
+        return (slot[2], pack.mtime_ns) if slot else None
+
+    def __contains__(self, num: int) -> bool:
+        return self.size(num) is not None
+
+    def get_bytes(self, num: int) -> Optional[bytes]:
+        """本文のバイト列を返す（ルーズファイル優先）"""
+        try:
+            return self.loose_path(num).read_bytes()
+        except FileNotFoundError:
+            pass
+        packed = self._packed_block(num)
+        if packed is None:
+            return None
+        try:
+            return zlib.decompress(packed[0])
+        except zlib.error as exc:
+            raise RuntimeError(f"Corrupted document pack (RFC {num}): {exc}") from exc
+
+    def get(self, num: int) -> Optional[str]:
+        """本文を文字列で返す（存在しなければ None）"""
+        data = self.get_bytes(num)
+        return data.decode("utf-8") if data is not None else None
+
+    def iter_docs(self) -> Iterator[Tuple[int, str]]:
+        """(RFC番号, 本文) を番号順に返す。パック部分はファイル先頭からの順次読み"""
+        for num in self.numbers():
+            text = self.get(num)
+            if text is not None:
+                yield num, text
+
+
+def pack_texts(text_dir: Path, remove_loose: bool = True) -> Dict[str, int]:
+    """
+    既存パックとルーズファイルをまとめて新しいパックを書き出す。
+    既存パック内のブロックは再圧縮せずにコピーし、書き込みは一時ファイル経由で原子的に置き換える。
+    戻り値は {"documents", "packed_bytes", "raw_bytes"}。
+    """
+    store = open_store(text_dir)
+    loose = set(store.loose_numbers())
+    nums = sorted(set(store.packed_numbers()) | loose)
+    nslots = (nums[-1] + 1) if nums else 0
+    table = bytearray(nslots * _SLOT.size)
+    raw_total = 0
+    loose_stats: Dict[int, Tuple[int, int]] = {}
+
+    tmp = store.pack_path.with_suffix(".tmp")
+    with tmp.open("wb") as out:
+        offset = 0
+        for num in nums:
+            if num in loose:
+                st = store.loose_path(num).stat()
+                loose_stats[num] = (st.st_size, st.st_mtime_ns)
+                raw = store.loose_path(num).read_bytes()
+                block = zlib.compress(raw, _COMPRESS_LEVEL)
+                raw_len = len(raw)
+            else:
+                block, raw_len = store._packed_block(num)
+            out.write(block)
+            _SLOT.pack_into(table, num * _SLOT.size, offset, len(block), raw_len)
+            offset += len(block)
+            raw_total += raw_len
+        out.write(table)
+        out.write(_FOOTER.pack(_MAGIC, offset, nslots))
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp, store.pack_path)
+
+    if remove_loose:
+        for num, key in loose_stats.items():
+            path = store.loose_path(num)
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            # パック作成中に書き換えられたファイルは次回に回す
+            if (st.st_size, st.st_mtime_ns) == key:
+                path.unlink(missing_ok=True)
+    return {
+        "documents": len(nums),
+        "packed_bytes": store.pack_path.stat().st_size,
+        "raw_bytes": raw_total,
+    }
+
+
+# テキストディレクトリごとの共有インスタンス（mmap を使い回す）
+_STORES: Dict[Path, DocStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def open_store(text_dir: Path) -> DocStore:
+    """text_dir に対応する共有 DocStore を返す"""
+    key = Path(text_dir).resolve()
+    with _STORES_LOCK:
+        if key not in _STORES:
+            _STORES[key] = DocStore(Path(text_dir))
+        return _STORES[key]
+
+
+__all__ = ["DocStore", "open_store", "pack_texts", "PACK_NAME"]
@@ -0,0 +1,186 @@
+"""
+セマンティック検索のクエリ埋め込みキャッシュ
+- クエリを正規化（NFKC・連続する空白を 1 つに）してからキーにする
+- メモリ上の LRU（RFC_EMBED_CACHE_SIZE 件）と、任意でディスク上の SQLite（RFC_EMBED_CACHE_DB）の 2 段
+- キーにはモデル名と sentence-transformers のバージョンを含めるので、RFC_EMBED_MODEL を
+  切り替えても別モデルのベクトルが使われることはない
+- ヒットすればモデルの forward を行わない（ディスクでヒットすればモデル自体も読み込まない）
+- ディスク側が使えない（読み取り専用など）ときは警告を出してメモリだけで続ける
+"""
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+BASE_DIR = Path.cwd() / "data"
+# 環境変数で上書き可能。RFC_EMBED_CACHE_DB を空にするとディスク側を使わない
+MEMORY_SIZE = int(os.getenv("RFC_EMBED_CACHE_SIZE", "1024"))
+DISK_PATH = os.getenv("RFC_EMBED_CACHE_DB", str(BASE_DIR / "embed_cache.db"))
+DISK_MAX_ROWS = int(os.getenv("RFC_EMBED_CACHE_DISK_MAX", "100000"))
+PRUNE_EVERY = 100  # この件数を書き込むごとに古いものを消す
+BUSY_TIMEOUT_MS = 5000
+TABLE_NAME = "query_embeddings"
+_SPACE_RE = re.compile(r"\s+")
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """キャッシュのキーにするクエリ（大文字・小文字はモデルによって意味が変わるので区別する）"""
+    return _SPACE_RE.sub(" ", unicodedata.normalize("NFKC", query)).strip()
+
+
+def model_key(model_name: str) -> str:
+    """モデル名 + sentence-transformers のバージョン（どちらかが変われば別のキャッシュ）"""
+    try:
+        st_version = version("sentence-transformers")
+    except PackageNotFoundError:
+        st_version = "unknown"
+    return f"{model_name}|sentence-transformers=={st_version}"
+
+
+class EmbeddingCache:
+    """
+    正規化したクエリ → 埋め込み（形は (1, 次元) の float32、書き換え不可）のキャッシュ。
+    encode はキャッシュに無いときだけ呼ぶ関数（正規化済みのクエリを受け取る）。
+    """
+
+    def __init__(
+        self,
+        model: str,
+        encode: Callable[[str], Any],
+        disk_path: Optional[Path] = None,
+        memory_size: int = MEMORY_SIZE,
+        disk_max_rows: int = DISK_MAX_ROWS,
+    ) -> None:
+        self.model = model
+        self.encode = encode
+        self.disk_path = disk_path
+        self.disk_max_rows = disk_max_rows
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        self.disk_hits = 0
+        self.encoded = 0
+        self._lookup = lru_cache(maxsize=memory_size)(self._lookup_uncached)
+
+    def embed(self, query: str):
+        return self._lookup(normalize_query(query))
+
+    def _lookup_uncached(self, query: str):
+        import numpy as np
+
+        vector = self._disk_get(query)
+        if vector is not None:
+            self.disk_hits += 1
+            return vector
+        vector = np.ascontiguousarray(self.encode(query), dtype="float32").reshape(1, -1)
+        vector.flags.writeable = False
+        self.encoded += 1
+        self._disk_put(query, vector)
+        return vector
+
+    # --- ディスク側 ---
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self.disk_path is None:
+            return None
+        if self._conn is None:
+            try:
+                self.disk_path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(self.disk_path), check_same_thread=False, isolation_level=None)
+                conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {TABLE_NAME} ("
+                    "model TEXT NOT NULL, query TEXT NOT NULL, dim INTEGER NOT NULL, "
+                    "vector BLOB NOT NULL, used REAL NOT NULL, PRIMARY KEY (model, query)"
+                    ") WITHOUT ROWID"
+                )
+            except (OSError, sqlite3.Error) as exc:
+                self._disable(exc)
+                return None
+            self._conn = conn
+        return self._conn
+
+    def _disable(self, exc: Exception) -> None:
+        logger.warning("Embedding cache on disk disabled (%s): %s", self.disk_path, exc)
+        self.disk_path = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _disk_get(self, query: str):
+        import numpy as np
+
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    f"SELECT dim, vector FROM {TABLE_NAME} WHERE model = ? AND query = ?", (self.model, query)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute(
+                    f"UPDATE {TABLE_NAME} SET used = ? WHERE model = ? AND query = ?", (time.time(), self.model, query)
+                )
+            except sqlite3.Error as exc:
+                self._disable(exc)
+                return None
+        dim, blob = row
+        return np.frombuffer(blob, dtype="float32").reshape(1, dim)
+
+    def _disk_put(self, query: str, vector) -> None:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {TABLE_NAME} (model, query, dim, vector, used) VALUES (?, ?, ?, ?, ?)",
+                    (self.model, query, vector.shape[1], vector.tobytes(), time.time()),
+                )
+                self._writes += 1
+                if self._writes % PRUNE_EVERY == 0:
+                    # 最近使われた disk_max_rows 件だけ残す（他モデルの分も含めて）
+                    conn.execute(
+                        f"DELETE FROM {TABLE_NAME} WHERE (model, query) IN ("
+                        f"SELECT model, query FROM {TABLE_NAME} ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                        (self.disk_max_rows,),
+                    )
+            except sqlite3.Error as exc:
+                self._disable(exc)
+
+    def stats(self) -> Dict[str, Any]:
+        info = self._lookup.cache_info()
+        return {
+            "model": self.model,
+            "memory_hits": info.hits,
+            "memory_size": info.currsize,
+            "disk_hits": self.disk_hits,
+            "encoded": self.encoded,
+            "disk_path": str(self.disk_path) if self.disk_path else None,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def default_disk_path() -> Optional[Path]:
+    return Path(DISK_PATH) if DISK_PATH else None
+
+
+__all__ = ["EmbeddingCache", "normalize_query", "model_key", "default_disk_path"]
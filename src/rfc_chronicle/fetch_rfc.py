@@ -1,16 +1,87 @@
+import codecs
+import hashlib
+import os
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import formatdate, parsedate_to_datetime
+from html.parser import HTMLParser
 from pathlib import Path
-from typing import Optional, Any, Dict, List, Union
+from typing import Optional, Any, Dict, Iterable, Iterator, List, Union
+from urllib.parse import urlsplit
+from xml.etree import ElementTree as ET
 
 import requests
 from requests import Response
-from bs4 import BeautifulSoup
-from functools import lru_cache
+from requests.adapters import HTTPAdapter
 from tqdm.auto import tqdm
 
-from rfc_chronicle.utils import ensure_data_dir, write_json, META_FILE
-from rfc_chronicle.utils import clean_rfc_text, parse_rfc_header
+from rfc_chronicle.utils import ensure_data_dir, read_json, write_json, META_FILE, SYNC_FILE, PENDING_FILE
+from rfc_chronicle.utils import DATA_DIR
+from rfc_chronicle.manifest import DownloadManifest, MANIFEST_NAME
+from rfc_chronicle.docstore import open_store
+from rfc_chronicle.metacache import MetadataCache
+from rfc_chronicle.search import warm_metadata
+from rfc_chronicle.pending import PendingQueue
+from rfc_chronicle.parsed import parsed_dir, get_parsed, get_section, get_sections
+
+# リトライ対象のステータスのうち、Retry-After を解釈するもの
+RETRY_AFTER_STATUSES = (429, 503)
+# メタデータ一覧の取得元（html: 検索結果ページ、xml: rfc-index.xml）
+METADATA_SOURCES = ("html", "xml")
+# 本文取得 1 回あたりのタイムアウト（秒）。止まったホストでワーカーが固まらないように
+REQUEST_TIMEOUT = 30
+# メタデータをストリーミング受信する際のチャンクサイズ
+STREAM_CHUNK_SIZE = 64 * 1024
+# rfc-index.xml の名前空間
+RFC_INDEX_NS = "{http://www.rfc-editor.org/rfc-index}"
+
+
+class HostRateLimiter:
+    """
+    ホスト単位の最小リクエスト間隔を保証するスレッドセーフなレートリミッタ。
+    Retry-After を受け取った場合はそのホストへの全リクエストを後ろ倒しにする。
+    """
+
+    def __init__(self, rate: float) -> None:
+        # rate: 1 ホストあたりの最大リクエスト数/秒（0 以下で無制限）
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url: str) -> None:
+        """次のリクエスト枠を予約し、枠の時刻まで待機する"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def defer(self, url: str, seconds: float) -> None:
+        """サーバ指示（Retry-After）に従いホスト全体の再開時刻を遅らせる"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            resume = time.monotonic() + seconds
+            self._next[host] = max(self._next.get(host, 0.0), resume)
+
+
+def _retry_after_seconds(resp: Response) -> Optional[float]:
+    """Retry-After ヘッダ（秒数または HTTP-date）を秒数に変換"""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
 
 
 def _get_with_retry(
@@ -18,16 +89,177 @@ def _get_with_retry(
     session: requests.Session,
     max_retries: int = 3,
     backoff_factor: float = 0.5,
-    headers: Optional[dict] = None
+    headers: Optional[dict] = None,
+    limiter: Optional[HostRateLimiter] = None,
+    timeout: float = REQUEST_TIMEOUT,
 ) -> Response:
     """指定回数リトライしつつGETを実行、最終的に例外を投げる"""
     headers = headers or {}
     for attempt in range(1, max_retries + 1):
-        resp = session.get(url, headers=headers)
+        if limiter is not None:
+            limiter.acquire(url)
+        resp = session.get(url, headers=headers, timeout=timeout)
         if resp.status_code in (200, 304):
             return resp
-        time.sleep(backoff_factor * (2 ** (attempt - 1)))
+        wait = backoff_factor * (2 ** (attempt - 1))
+        if resp.status_code in RETRY_AFTER_STATUSES:
+            retry_after = _retry_after_seconds(resp)
+            if retry_after is not None:
+                wait = max(wait, retry_after)
+                if limiter is not None:
+                    limiter.defer(url, retry_after)
+        if attempt < max_retries:
+            time.sleep(wait)
     resp.raise_for_status()
+    return resp
+
+
+class _MetadataTableParser(HTMLParser):
+    """
+    検索結果ページの HTML を逐次 feed し、対象テーブルの行を
+    確定した順に dict として溜めるストリーミングパーサ。
+    ツリーを構築しないため、ページ全体の大きさに関わらずメモリは一定。
+    """
+
+    def __init__(self, table_index: int) -> None:
+        super().__init__(convert_charrefs=True)
+        self.table_index = table_index
+        self.seen_table = False
+        self._tables_opened = 0
+        self._table_stack: List[int] = []
+        self._cells: Optional[List[str]] = None
+        self._cell: Optional[List[str]] = None
+        self._in_text = False  # チャンク境界で分割されたテキストを 1 断片にまとめる
+        self._records: List[Dict[str, Any]] = []
+
+    def _in_target(self) -> bool:
+        return bool(self._table_stack) and self._table_stack[-1] == self.table_index
+
+    def _close_cell(self) -> None:
+        if self._cell is not None and self._cells is not None:
+            # BeautifulSoup の get_text(strip=True) と同じく断片ごとに strip して連結
+            self._cells.append("".join(part.strip() for part in self._cell))
+        self._cell = None
+
+    def _close_row(self) -> None:
+        self._close_cell()
+        cols, self._cells = self._cells, None
+        if cols is None or len(cols) < 7:
+            return  # ヘッダ行（th のみ）や不完全な行は無視
+        self._records.append({
+            "number": cols[0],
+            "title": cols[2],
+            "date": cols[4],
+            "status": cols[6],
+        })
+
+    def handle_starttag(self, tag, attrs):
+        self._in_text = False
+        if tag == "table":
+            self._table_stack.append(self._tables_opened)
+            if self._tables_opened == self.table_index:
+                self.seen_table = True
+            self._tables_opened += 1
+        elif not self._in_target():
+            return
+        elif tag == "tr":
+            self._close_row()
+            self._cells = []
+        elif tag == "td" and self._cells is not None:
+            self._close_cell()
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        self._in_text = False
+        if tag == "table":
+            if self._in_target():
+                self._close_row()
+            if self._table_stack:
+                self._table_stack.pop()
+        elif not self._in_target():
+            return
+        elif tag == "tr":
+            self._close_row()
+        elif tag == "td":
+            self._close_cell()
+
+    def handle_data(self, data):
+        if self._cell is not None and self._in_target():
+            if self._in_text and self._cell:
+                self._cell[-1] += data
+            else:
+                self._cell.append(data)
+            self._in_text = True
+
+    def pop_records(self) -> List[Dict[str, Any]]:
+        """確定済みの行を取り出す"""
+        records, self._records = self._records, []
+        return records
+
+
+def _iter_html_metadata(resp: Response, table_index: int) -> Iterator[Dict[str, Any]]:
+    """受信したチャンクを順次 HTML パーサへ流し、行が確定するたびに yield"""
+    decoder = codecs.getincrementaldecoder(resp.encoding or "utf-8")(errors="replace")
+    parser = _MetadataTableParser(table_index)
+    for chunk in resp.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+        parser.feed(decoder.decode(chunk))
+        yield from parser.pop_records()
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    yield from parser.pop_records()
+    if not parser.seen_table:
+        raise RuntimeError("RFC-Editor HTML structure changed")
+
+
+def _xml_text(elem: Optional[ET.Element]) -> str:
+    return "".join(elem.itertext()).strip() if elem is not None else ""
+
+
+def _iter_xml_metadata(resp: Response) -> Iterator[Dict[str, Any]]:
+    """rfc-index.xml を XMLPullParser で逐次パースし、rfc-entry ごとに yield"""
+    ns = RFC_INDEX_NS
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root: Optional[ET.Element] = None
+
+    def _drain() -> Iterator[Dict[str, Any]]:
+        nonlocal root
+        for event, elem in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = elem
+                continue
+            if elem.tag != f"{ns}rfc-entry":
+                continue
+            date = elem.find(f"{ns}date")
+            month = _xml_text(date.find(f"{ns}month")) if date is not None else ""
+            year = _xml_text(date.find(f"{ns}year")) if date is not None else ""
+            yield {
+                "number": _xml_text(elem.find(f"{ns}doc-id")),
+                "title": _xml_text(elem.find(f"{ns}title")),
+                "date": f"{month} {year}".strip(),
+                "status": _xml_text(elem.find(f"{ns}current-status")).title(),
+                "authors": [_xml_text(a.find(f"{ns}name")) for a in elem.findall(f"{ns}author")],
+                "abstract": " ".join(
+                    _xml_text(p) for p in elem.findall(f"{ns}abstract/{ns}p")
+                ),
+            }
+            # 処理済みのエントリを捨てて木が育たないようにする
+            root.clear()
+
+    for chunk in resp.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+        parser.feed(chunk)
+        yield from _drain()
+    parser.close()
+    yield from _drain()
+
+
+def _comparable(value: Any) -> Any:
+    """変更判定用にフィールド値を正規化する（空白を除き casefold。リストは要素ごと）"""
+    if isinstance(value, str):
+        return "".join(value.split()).casefold()
+    if isinstance(value, list):
+        return [_comparable(v) for v in value]
+    return value
 
 
 class RFCClient:
@@ -37,6 +269,7 @@ class RFCClient:
 
     BASE_SEARCH_URL = "https://www.rfc-editor.org/search/rfc_search_detail.php"
     BASE_TEXT_URL = "https://www.rfc-editor.org/rfc/rfc{number}.txt"
+    INDEX_XML_URL = "https://www.rfc-editor.org/rfc-index.xml"
     DEFAULT_PARAMS = {
         "pubstatus[]": "Any",
         "pub_date_type": "any",
@@ -46,6 +279,9 @@ class RFCClient:
 
     def __init__(self, session: Optional[requests.Session] = None) -> None:
         self.session = session or requests.Session()
+        self._manifests: Dict[Path, DownloadManifest] = {}
+        self._registry_lock = threading.Lock()
+        self._metadata_caches: Dict[str, MetadataCache] = {}
 
     @staticmethod
     def _normalize_number(num_str: str) -> int:
@@ -55,49 +291,221 @@ class RFCClient:
             raise ValueError(f"Invalid RFC number: {num_str!r}")
         return int(match.group(1))
 
-    @lru_cache(maxsize=1)
-    def fetch_metadata(self, save: bool = False) -> List[Dict[str, Any]]:
+    def _open_metadata(self, source: str, headers: Optional[Dict[str, str]] = None) -> Response:
+        """メタデータ一覧をストリーミングモードで要求し、レスポンスを返す"""
+        if source == "html":
+            url, params = self.BASE_SEARCH_URL, self.DEFAULT_PARAMS
+        elif source == "xml":
+            url, params = self.INDEX_XML_URL, None
+        else:
+            raise ValueError(f"Unknown metadata source: {source!r}")
+        kwargs: Dict[str, Any] = {"params": params, "timeout": 30, "stream": True}
+        if headers:
+            kwargs["headers"] = headers
+        return self.session.get(url, **kwargs)
+
+    def _parse_metadata(self, resp: Response, source: str) -> Iterator[Dict[str, Any]]:
+        """開いたレスポンスから source に応じたパーサでレコードを yield"""
+        if source == "html":
+            return _iter_html_metadata(resp, self.TABLE_INDEX)
+        return _iter_xml_metadata(resp)
+
+    def iter_metadata(self, source: str = "html") -> Iterator[Dict[str, Any]]:
         """
-        RFC-Editorからメタデータ一覧を取得し、必要ならローカル保存
+        RFC-Editor からメタデータをストリーミング取得し、1 件ずつ yield する。
+        受信とパースが重なり、ピークメモリは索引全体の大きさに依存しない。
+        source: "html"（検索結果ページ）または "xml"（rfc-index.xml）
         """
-        ensure_data_dir()
-        resp = self.session.get(
-            self.BASE_SEARCH_URL,
-            params=self.DEFAULT_PARAMS,
-            timeout=30
-        )
-        resp.raise_for_status()
+        with self._open_metadata(source) as resp:
+            resp.raise_for_status()
+            yield from self._parse_metadata(resp, source)
 
-        soup = BeautifulSoup(resp.text, "html.parser")
-        tables = soup.find_all("table")
-        try:
-            rows = tables[self.TABLE_INDEX].find_all("tr")[1:]
-        except IndexError:
-            raise RuntimeError("RFC-Editor HTML structure changed")
-
-        meta_list: List[Dict[str, Any]] = []
-        for tr in tqdm(rows, desc="Parsing RFC metadata", dynamic_ncols=True):
-            cols = tr.find_all("td")
-            if len(cols) < 7:
+    def sync_metadata(self, source: str = "xml") -> Dict[str, Any]:
+        """
+        保存済みメタデータとの差分だけを取り込む増分同期。
+        - 前回同期時のバリデータで条件付き GET し、304 なら何もしない
+        - 既知の最大番号より大きいものは追加、既知の番号はフィールド差分で変更判定
+        - 差分があるときだけ metadata.json を更新し、レポートを SYNC_FILE に保存
+        - added / changed は未処理キュー（PENDING_FILE）に足し込み、本文の取得・全文検索・
+          埋め込みの各利用者が処理し終えるまで残す（レポートは今回の差分だけ）
+        """
+        ensure_data_dir()
+        stored: List[Dict[str, Any]] = read_json(META_FILE) or []
+        by_num: Dict[int, Dict[str, Any]] = {}
+        for entry in stored:
+            try:
+                by_num[self._normalize_number(entry.get("number", ""))] = entry
+            except ValueError:
                 continue
-            # 各カラムを取得
-            number = cols[0].get_text(strip=True)
-            title = cols[2].get_text(strip=True)
-            date = cols[4].get_text(strip=True)
-            status = cols[6].get_text(strip=True)
-            meta_list.append({
-                "number": number,
-                "title": title,
-                "date": date,
-                "status": status,
-            })
+        previous_max = max(by_num, default=0)
+
+        state: Dict[str, Any] = read_json(SYNC_FILE) or {}
+        headers: Dict[str, str] = {}
+        if stored and state.get("source") == source:
+            if state.get("etag"):
+                headers["If-None-Match"] = state["etag"]
+            if state.get("last_modified"):
+                headers["If-Modified-Since"] = state["last_modified"]
+
+        added: List[int] = []
+        changed: List[int] = []
+        filled = 0
+        with self._open_metadata(source, headers) as resp:
+            not_modified = resp.status_code == 304
+            if not not_modified:
+                resp.raise_for_status()
+                for record in self._parse_metadata(resp, source):
+                    try:
+                        num = self._normalize_number(record.get("number", ""))
+                    except ValueError:
+                        continue
+                    current = by_num.get(num)
+                    if current is None:
+                        by_num[num] = record
+                        stored.append(record)
+                        added.append(num)
+                    else:
+                        # 番号の表記や空白・大文字小文字はパーサ（html / xml）ごとに違うので比べない。
+                        # 片方のソースにしか無いフィールド（xml の著者・要約）は補うだけで変更扱いにしない
+                        missing = {k: v for k, v in record.items() if k not in current}
+                        diff = {
+                            k: v for k, v in record.items()
+                            if k != "number" and k not in missing
+                            and _comparable(current[k]) != _comparable(v)
+                        }
+                        if missing:
+                            current.update(missing)
+                            filled += 1
+                        if diff:
+                            current.update(diff)
+                            changed.append(num)
+            etag = resp.headers.get("ETag", state.get("etag") if not_modified else None)
+            last_modified = resp.headers.get(
+                "Last-Modified", state.get("last_modified") if not_modified else None
+            )
+
+        if added or changed or filled:
+            write_json(META_FILE, stored)
+            # 一覧が変わったので全ソースの共有キャッシュを破棄（API などが読む html 側も含め、古い一覧を TTL まで返さない）
+            for cached_source in METADATA_SOURCES:
+                self.metadata_cache(cached_source).invalidate()
+            # 検索インデックスは変わった RFC の分だけ差分更新して保存し、綴り補正の辞書も作り直す
+            warm_metadata(META_FILE)
+        PendingQueue(PENDING_FILE).add(added + changed)
+
+        report: Dict[str, Any] = {
+            "source": source,
+            "etag": etag,
+            "last_modified": last_modified,
+            "synced_at": time.time(),
+            "not_modified": not_modified,
+            "previous_max": previous_max,
+            "added": added,
+            "changed": changed,
+            "filled": filled,  # 他ソースにしか無かったフィールドを補っただけの件数
+            "total": len(stored),
+        }
+        write_json(SYNC_FILE, report)
+        return report
+
+    def metadata_cache(self, source: str = "html") -> MetadataCache:
+        """source ごとのディスク共有メタデータキャッシュ"""
+        with self._registry_lock:
+            if source not in self._metadata_caches:
+                self._metadata_caches[source] = MetadataCache(
+                    DATA_DIR / f"metadata_cache_{source}.json"
+                )
+            return self._metadata_caches[source]
+
+    def _fetch_metadata_conditional(self, source: str, headers: Dict[str, str]):
+        """条件付きで一覧を取得。304 なら None、それ以外は (records, etag, last_modified)"""
+        with self._open_metadata(source, headers) as resp:
+            if resp.status_code == 304:
+                return None
+            resp.raise_for_status()
+            meta_list: List[Dict[str, Any]] = []
+            with tqdm(desc="Parsing RFC metadata", unit="rfc", dynamic_ncols=True) as bar:
+                for record in self._parse_metadata(resp, source):
+                    meta_list.append(record)
+                    bar.update(1)
+            return meta_list, resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+
+    def fetch_metadata(
+        self,
+        save: bool = False,
+        source: str = "html",
+        max_age: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        RFC-Editorからメタデータ一覧を取得し、必要ならローカル保存。
+        結果はディスク共有キャッシュに保存し、TTL（max_age 秒）以内なら再取得しない。
+        """
+        ensure_data_dir()
+        meta_list = self.metadata_cache(source).get(
+            lambda headers: self._fetch_metadata_conditional(source, headers),
+            max_age=max_age,
+        )
 
         if save:
             write_json(META_FILE, meta_list)
         return meta_list
 
+    def _metadata_number(self, metadata: Dict[str, Any]) -> int:
+        """metadata から RFC 番号を求める"""
+        raw_num = metadata.get("number") or metadata.get("rfc_number")
+        return self._normalize_number(raw_num)
+
+    def manifest(self, save_dir: Path) -> DownloadManifest:
+        """保存ディレクトリごとのダウンロードマニフェストを返す"""
+        key = save_dir.resolve()
+        with self._registry_lock:
+            if key not in self._manifests:
+                self._manifests[key] = DownloadManifest(save_dir / MANIFEST_NAME)
+            return self._manifests[key]
 
+    def _download_text(
+        self,
+        num: int,
+        save_dir: Path,
+        use_conditional: bool = False,
+        limiter: Optional[HostRateLimiter] = None,
+        session: Optional[requests.Session] = None,
+    ) -> Response:
+        """RFC本文を1件ダウンロードし、200 の場合のみ保存してマニフェストに記録する"""
+        save_dir.mkdir(parents=True, exist_ok=True)
+        store = open_store(save_dir)
+        target = store.loose_path(num)
+        manifest = self.manifest(save_dir)
 
+        # 条件付きダウンロードヘッダ（マニフェストに記録したサーバのバリデータを使う）
+        headers: Dict[str, str] = {}
+        rec = manifest.get(num)
+        if use_conditional and manifest.is_complete(num, store.size(num)):
+            if rec.get("etag"):
+                headers["If-None-Match"] = rec["etag"]
+            headers["If-Modified-Since"] = (
+                rec.get("last_modified") or formatdate(rec["fetched_at"], usegmt=True)
+            )
+
+        url = self.BASE_TEXT_URL.format(number=num)
+        resp: Response = _get_with_retry(
+            url, session or self.session, headers=headers, limiter=limiter
+        )
+        if resp.status_code == 200:
+            data = resp.text.encode("utf-8")
+            # 書きかけのファイルが完了扱いされないよう一時ファイル経由で置き換える
+            tmp = target.with_suffix(".part")
+            tmp.write_bytes(data)
+            os.replace(tmp, target)
+            manifest.record(
+                num,
+                etag=resp.headers.get("ETag"),
+                last_modified=resp.headers.get("Last-Modified"),
+                length=len(data),
+                sha256=hashlib.sha256(data).hexdigest(),
+                mtime_ns=target.stat().st_mtime_ns,
+            )
+        return resp
 
     def fetch_details(
             self,
@@ -112,37 +520,145 @@ class RFCClient:
             # --- 1. metadata を dict に統一 ---
             if not isinstance(metadata, dict):
                 metadata = {"number": str(metadata)}
+            num = self._metadata_number(metadata)
 
-            raw_num = metadata.get("number") or metadata.get("rfc_number")
-            num = self._normalize_number(raw_num)
-            target = save_dir / f"{num}.txt"
-            save_dir.mkdir(parents=True, exist_ok=True)
-
-            # --- 2. 条件付きダウンロードヘッダ ---
-            headers: Dict[str, str] = {}
-            if use_conditional and target.exists():
-                ts = target.stat().st_mtime
-                headers["If-Modified-Since"] = time.strftime(
-                    "%a, %d %b %Y %H:%M:%S GMT",
-                    time.gmtime(ts)
-                )
-
-            # --- 3. ダウンロード & ファイル保存 ---
-            url = self.BASE_TEXT_URL.format(number=num)
-            resp: Response = _get_with_retry(url, self.session, headers=headers)
-            if resp.status_code == 200:
-                target.write_text(resp.text, encoding="utf-8")
+            # --- 2. ダウンロード & ファイル保存（条件付き GET 対応） ---
+            self._download_text(num, save_dir, use_conditional=use_conditional)
 
-            # --- 4. テキストのクリーン & ヘッダパース ---
-            raw = target.read_text(encoding="utf-8")
-            cleaned = clean_rfc_text(raw)
-            header_dict, body = parse_rfc_header(cleaned)
+            # --- 3. テキストのクリーン & ヘッダパース（パース済みキャッシュを利用） ---
+            header_dict, body = self._parsed_document(num, save_dir)
 
-            # --- 5. metadata 更新 & 返却 ---
+            # --- 4. metadata 更新 & 返却 ---
             metadata.update(header_dict)
             metadata["body"] = body
             return metadata
 
+    def _parsed_document(self, num: int, save_dir: Path) -> tuple:
+        """(header, body) をパース済みキャッシュ経由で返す"""
+        return get_parsed(open_store(save_dir), self.manifest(save_dir), parsed_dir(save_dir), num)
+
+    def load_details(
+        self,
+        metadata: Union[int, str, Dict[str, Any]],
+        save_dir: Path,
+    ) -> Dict[str, Any]:
+        """
+        ローカル優先の fetch_details。本文が保存済みならネットワークに出ず、
+        パース済みキャッシュを読むだけで返す（未取得の場合のみダウンロード）。
+        """
+        if not isinstance(metadata, dict):
+            metadata = {"number": str(metadata)}
+        num = self._metadata_number(metadata)
+        if num not in open_store(save_dir):
+            return self.fetch_details(metadata, save_dir)
+
+        header_dict, body = self._parsed_document(num, save_dir)
+        metadata.update(header_dict)
+        metadata["body"] = body
+        return metadata
+
+    def load_section(
+        self,
+        num: Union[int, str],
+        section_id: str,
+        save_dir: Path,
+    ) -> Dict[str, Any]:
+        """
+        1 節分だけを返す。節インデックスのバイト範囲を seek して読むため、
+        本文全体は読み込まない（未取得の場合のみダウンロード）。
+        """
+        num = self._metadata_number({"number": str(num)})
+        if num not in open_store(save_dir):
+            self._download_text(num, save_dir)
+        store, manifest = open_store(save_dir), self.manifest(save_dir)
+        entry, text = get_section(store, manifest, parsed_dir(save_dir), num, section_id)
+        return {"number": str(num), "section": entry["id"], "title": entry["title"], "body": text}
+
+    def list_sections(self, num: Union[int, str], save_dir: Path) -> List[Dict[str, Any]]:
+        """節インデックス（節番号・見出し・バイト範囲）を返す"""
+        num = self._metadata_number({"number": str(num)})
+        if num not in open_store(save_dir):
+            self._download_text(num, save_dir)
+        return get_sections(open_store(save_dir), self.manifest(save_dir), parsed_dir(save_dir), num)
+
+    def fetch_texts(
+        self,
+        numbers: Iterable[Union[int, str]],
+        save_dir: Path,
+        concurrency: int = 8,
+        rate: float = 10.0,
+        use_conditional: bool = True,
+        skip_complete: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        複数の RFC 本文をスレッドプールで並列ダウンロードする（一括取得モード）。
+        - コネクションプールは concurrency に合わせてサイズ調整
+        - ホスト単位のレート制限（rate 件/秒）と Retry-After を尊重
+        - 進捗バーに件数と転送スループットを表示
+        - skip_complete=True ならマニフェスト上で完了済みの RFC を飛ばす（中断からの再開）
+        戻り値は {"downloaded", "not_modified", "skipped", "failed", "bytes", "errors"} の集計 dict。
+        """
+        concurrency = max(1, concurrency)
+        session = self.session
+        if isinstance(self.session, requests.Session):
+            # 同時接続数ぶんのコネクションを使い回せるプールを、この一括取得専用のセッションに付ける
+            # （共有セッションのプール設定は変えない）
+            session = requests.Session()
+            session.headers.update(self.session.headers)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency, pool_block=True)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+
+        nums = sorted({self._normalize_number(str(n)) for n in numbers})
+        manifest = self.manifest(save_dir)
+        store = open_store(save_dir)
+        limiter = HostRateLimiter(rate)
+        stats: Dict[str, Any] = {
+            "downloaded": 0, "not_modified": 0, "skipped": 0,
+            "failed": 0, "bytes": 0, "errors": {},
+        }
+        if skip_complete:
+            pending = [n for n in nums if not manifest.is_complete(n, store.size(n))]
+            stats["skipped"] = len(nums) - len(pending)
+            nums = pending
+
+        def _task(num: int) -> Response:
+            return self._download_text(
+                num, save_dir, use_conditional=use_conditional, limiter=limiter, session=session,
+            )
+
+        try:
+            started = time.monotonic()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool, tqdm(
+                total=len(nums), desc="Downloading RFC texts", unit="doc", dynamic_ncols=True
+            ) as bar:
+                futures = {pool.submit(_task, num): num for num in nums}
+                for fut in as_completed(futures):
+                    num = futures[fut]
+                    try:
+                        resp = fut.result()
+                    except Exception as exc:  # 1件の失敗で全体を止めない
+                        stats["failed"] += 1
+                        stats["errors"][num] = str(exc)
+                    else:
+                        if resp.status_code == 304:
+                            stats["not_modified"] += 1
+                        else:
+                            stats["downloaded"] += 1
+                            stats["bytes"] += len(resp.content or b"")
+                    elapsed = max(time.monotonic() - started, 1e-6)
+                    bar.set_postfix(
+                        MBps=f"{stats['bytes'] / elapsed / 1e6:.2f}",
+                        failed=stats["failed"],
+                        refresh=False,
+                    )
+                    bar.update(1)
+        finally:
+            if session is not self.session:
+                session.close()
+        manifest.compact()
+        return stats
+
 
 # シングルトンインスタンス
 client = RFCClient()
@@ -0,0 +1,196 @@
+"""
+全文検索 DB（FTS5 索引）の状態確認と保守
+- 状態：FTS5 のセグメント数、索引・DB・WAL のサイズ、automerge / crisismerge の設定、
+  ページキャッシュ・mmap の設定と DB サイズの比較
+- 保守：'merge' による少しずつのセグメント統合（短いトランザクションに分ける）、
+  必要なときだけ 'optimize'、automerge / crisismerge の設定、WAL のチェックポイント
+- WAL モードなので、保守中も読み取り側（検索 API）は止まらない
+- シャード構成ならすべてのシャードに対して行う
+
+sqlite3 モジュールは sqlite3_db_status() を公開していないため、キャッシュのヒット率は
+取れない。代わりにキャッシュ・mmap の上限と DB サイズを並べて返す。
+"""
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from rfc_chronicle import fulltext
+from rfc_chronicle.dbconn import CACHE_SIZE_KIB, MMAP_SIZE
+
+# FTS5 の既定値（%_config に無いとき）
+DEFAULT_AUTOMERGE = 4
+DEFAULT_CRISISMERGE = 16
+# 1 回の 'merge' で書き込むページ数の目安と、1 回の保守で行う最大回数
+MERGE_PAGES = 500
+MAX_MERGE_STEPS = 200
+# セグメントがこれより多ければ、少しずつの merge ではなく optimize で 1 つにまとめる
+OPTIMIZE_SEGMENTS = 64
+CHECKPOINT_MODES = ("PASSIVE", "FULL", "RESTART", "TRUNCATE")
+BUSY_TIMEOUT_MS = 5000
+
+
+def _fts_tables(conn: sqlite3.Connection) -> List[str]:
+    names = (fulltext.TABLE_NAME, fulltext.TRIGRAM_TABLE)
+    return [
+        name for name in names
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+    ]
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def _table_stats(conn: sqlite3.Connection, table: str) -> Dict[str, Any]:
+    config = dict(conn.execute(f"SELECT k, v FROM {table}_config"))
+    # %_idx は各セグメントの葉ページ境界の term を 1 行ずつ持つ（ページ数ではなく行数）
+    segments, idx_rows = conn.execute(f"SELECT count(DISTINCT segid), count(*) FROM {table}_idx").fetchone()
+    try:
+        # dbstat が使えるビルドなら索引（%_data, %_idx）のバイト数も出す
+        index_bytes = conn.execute(
+            "SELECT sum(pgsize) FROM dbstat WHERE name IN (?, ?)", (f"{table}_data", f"{table}_idx")
+        ).fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        index_bytes = None
+    return {
+        "segments": segments,
+        "idx_rows": idx_rows,
+        "index_bytes": index_bytes,
+        "automerge": int(config.get("automerge", DEFAULT_AUTOMERGE)),
+        "crisismerge": int(config.get("crisismerge", DEFAULT_CRISISMERGE)),
+    }
+
+
+def database_stats(path: Path) -> Dict[str, Any]:
+    """1 つの DB ファイルの状態"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        tables = {table: _table_stats(conn, table) for table in _fts_tables(conn)}
+    finally:
+        conn.close()
+    db_bytes = page_size * pages
+    return {
+        "path": str(path),
+        "file_bytes": _file_size(path),
+        "wal_bytes": _file_size(path.with_name(path.name + "-wal")),
+        "page_size": page_size,
+        "pages": pages,
+        "free_pages": free_pages,
+        "tables": tables,
+        "cache": {
+            # 検索用接続（dbconn）の設定。ヒット率は sqlite3 モジュールからは取れない
+            "cache_size_bytes": CACHE_SIZE_KIB * 1024,
+            "mmap_size": MMAP_SIZE,
+            "fits_in_cache": db_bytes <= CACHE_SIZE_KIB * 1024,
+            "fits_in_mmap": db_bytes <= MMAP_SIZE,
+        },
+    }
+
+
+def fts_stats(db_path: Optional[Path] = None) -> Dict[str, Any]:
+    """全文検索 DB（シャード構成なら全シャード）の状態を返す"""
+    paths = [p for p in fulltext.index_paths(db_path) if p.exists()]
+    if not paths:
+        raise FileNotFoundError(f"Full-text index not found: {db_path or fulltext.DB_PATH}")
+    databases = [database_stats(p) for p in paths]
+    return {
+        "databases": databases,
+        "segments": sum(t["segments"] for d in databases for t in d["tables"].values()),
+        "file_bytes": sum(d["file_bytes"] for d in databases),
+        "wal_bytes": sum(d["wal_bytes"] for d in databases),
+    }
+
+
+def _merge(conn: sqlite3.Connection, table: str, pages: int, max_steps: int) -> int:
+    """
+    'merge' を短いトランザクションで繰り返し、統合が進まなくなったら止める。
+    書き込みロックは 1 回分の merge の間しか持たない。実行した回数を返す。
+    """
+    steps = 0
+    while steps < max_steps:
+        before = conn.total_changes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(f"INSERT INTO {table} ({table}, rank) VALUES ('merge', ?)", (pages,))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        steps += 1
+        if conn.total_changes - before <= 1:  # 'merge' の INSERT 自体の 1 件だけなら統合は終わっている
+            break
+    return steps
+
+
+def maintain_database(
+    path: Path,
+    optimize: Optional[bool] = None,
+    automerge: Optional[int] = None,
+    crisismerge: Optional[int] = None,
+    merge_pages: int = MERGE_PAGES,
+    checkpoint: str = "PASSIVE",
+) -> Dict[str, Any]:
+    """
+    1 つの DB ファイルを保守する。
+    optimize=None なら、セグメントが OPTIMIZE_SEGMENTS を超えたテーブルだけ optimize し、
+    それ以外は merge で少しずつ統合する。True / False で強制・抑止。
+    """
+    if checkpoint.upper() not in CHECKPOINT_MODES:
+        raise ValueError(f"Unknown checkpoint mode: {checkpoint!r} (choose from {', '.join(CHECKPOINT_MODES)})")
+    started = time.perf_counter()
+    conn = fulltext._open_writer(path)
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    actions: Dict[str, Any] = {}
+    try:
+        for table in _fts_tables(conn):
+            done: Dict[str, Any] = {}
+            # 設定は %_config に保存され、以後の書き込みにも効く
+            for key, value in (("automerge", automerge), ("crisismerge", crisismerge)):
+                if value is not None:
+                    conn.execute(f"INSERT INTO {table} ({table}, rank) VALUES (?, ?)", (key, value))
+                    done[key] = value
+            segments = conn.execute(f"SELECT count(DISTINCT segid) FROM {table}_idx").fetchone()[0]
+            if optimize or (optimize is None and segments > OPTIMIZE_SEGMENTS):
+                conn.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+                done["optimize"] = True
+            elif segments > 1:
+                done["merge_steps"] = _merge(conn, table, merge_pages, MAX_MERGE_STEPS)
+            done["segments_before"] = segments
+            done["segments_after"] = conn.execute(f"SELECT count(DISTINCT segid) FROM {table}_idx").fetchone()[0]
+            actions[table] = done
+        # PASSIVE は読み取り中の接続を待たない（WAL の中身を書き戻せる分だけ書き戻す）
+        busy, log_frames, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({checkpoint.upper()})").fetchone()
+    finally:
+        conn.close()
+    return {
+        "path": str(path),
+        "tables": actions,
+        "checkpoint": {"mode": checkpoint.upper(), "busy": bool(busy), "log_frames": log_frames,
+                       "checkpointed": checkpointed},
+        "wal_bytes": _file_size(path.with_name(path.name + "-wal")),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def maintain(db_path: Optional[Path] = None, **options) -> Dict[str, Any]:
+    """全文検索 DB（シャード構成なら全シャード）を保守する。options は maintain_database と同じ"""
+    paths = [p for p in fulltext.index_paths(db_path) if p.exists()]
+    if not paths:
+        raise FileNotFoundError(f"Full-text index not found: {db_path or fulltext.DB_PATH}")
+    return {"databases": [maintain_database(p, **options) for p in paths]}
+
+
+def maintenance_interval() -> float:
+    """API で定期的に保守する間隔（秒）。RFC_FTS_MAINT_INTERVAL で指定、0 なら行わない"""
+    return float(os.getenv("RFC_FTS_MAINT_INTERVAL", "0"))
+
+
+__all__ = ["fts_stats", "maintain", "maintain_database", "database_stats", "maintenance_interval"]
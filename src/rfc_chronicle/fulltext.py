@@ -1,15 +1,105 @@
+import base64
+import hashlib
+import heapq
 import json
+import multiprocessing
+import os
 import re
 import sqlite3
+import threading
+import time
+import zlib
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from tqdm.auto import tqdm
+
+from .dbconn import readonly_connections
+from .docstore import open_store
+from .manifest import DownloadManifest, MANIFEST_NAME, compact_manifest
+from .parsed import get_parsed, parsed_dir, source_sha256
+from .utils import META_FILE
 
 # プロジェクト直下の data ディレクトリ
 BASE_DIR = Path.cwd() / "data"
 DB_PATH = BASE_DIR / "fulltext.db"
-META_PATH = BASE_DIR / "metadata.json"
+META_PATH = META_FILE  # fetch / sync と同じ metadata.json
 TEXT_DIR = BASE_DIR / "texts"
 TABLE_NAME = "rfc_text"
+# 部分文字列・日本語向けの trigram 索引（index-fulltext --trigram で作る任意のテーブル）
+TRIGRAM_TABLE = "rfc_text_trigram"
+TRIGRAM_MIN_CHARS = 3
+SEARCH_MODES = ("auto", "word", "substring")
+# 本文は圧縮して 1 か所にだけ保存し、FTS5 テーブルは外部コンテンツとしてビュー経由で参照する
+DOCS_TABLE = "rfc_docs"
+DOCS_VIEW = "rfc_docs_view"
+INFLATE_FUNCTION = "rfc_inflate"
+COMPRESS_LEVEL = 6
+DEFAULT_BATCH_SIZE = 200
+SHARD_LAYOUT_SUFFIX = ".shards.json"
+# bm25 の列ごとの重み（number, title, content）。番号列は順位に使わず、タイトルの一致を重く見る
+BM25_WEIGHTS = (0.0, 10.0, 1.0)
+MAX_PAGE_SIZE = 100
+
+
+def _compress(body: str) -> bytes:
+    return zlib.compress(body.encode("utf-8"), COMPRESS_LEVEL)
+
+
+def _inflate(blob: Optional[bytes]) -> Optional[str]:
+    if blob is None:
+        return None
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def register_functions(conn: sqlite3.Connection) -> None:
+    """
+    ビュー（FTS5 の外部コンテンツ）が使う展開関数を接続に登録する。
+    snippet() や列の読み出しはこの関数が登録された接続でしか動かない。
+    """
+    conn.create_function(INFLATE_FUNCTION, 1, _inflate, deterministic=True)
+
+
+def _connections(path: Optional[Path] = None):
+    return readonly_connections(path or DB_PATH, on_open=register_functions)
+
+
+def _layout_path(db_path: Path) -> Path:
+    return db_path.with_suffix(SHARD_LAYOUT_SUFFIX)
+
+
+def _shard_name(db_path: Path, i: int, count: int) -> str:
+    return f"{db_path.stem}.{i}-of-{count}{db_path.suffix}"
+
+
+def read_shard_layout(db_path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """
+    シャード構成 {"bounds": [...], "shards": [ファイル名, ...]} を返す。単一の DB なら None。
+    シャード i は bounds[i-1] <= RFC番号 < bounds[i] の RFC を持つ。
+    """
+    path = _layout_path(db_path or DB_PATH)
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+def _write_layout(db_path: Path, layout: Dict[str, Any]) -> None:
+    path = _layout_path(db_path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(layout), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def index_paths(db_path: Optional[Path] = None) -> List[Path]:
+    """検索対象の DB ファイル（シャード構成ならシャードの一覧、そうでなければ db_path だけ）"""
+    db_path = db_path or DB_PATH
+    layout = read_shard_layout(db_path)
+    if layout is None:
+        return [db_path]
+    return [db_path.with_name(name) for name in layout["shards"]]
 
 
 def _normalize_num_str(num_str: str) -> str:
@@ -24,106 +114,632 @@ def _normalize_num_str(num_str: str) -> str:
     return m.group(1)
 
 
-def rebuild_fulltext_index() -> None:
+def rebuild_fulltext_index(**kwargs) -> Dict[str, float]:
     """
     全文検索用データベースを再構築（差分更新）する。
     """
-    from .index_fulltext import build_fulltext_db
-    build_fulltext_db()
+    return build_fulltext_db(**kwargs)
 
 
-def search_fulltext(query: str, limit: int = 10) -> List[Tuple[str, str]]:
+# bm25() は小さいほど関連度が高い。(score, rowid) のキーセットで前のページの続きから取る
+_RANK_SQL = {
+    table: (
+        f"SELECT rowid, bm25({table}, {', '.join(map(str, BM25_WEIGHTS))}) AS score "
+        f"FROM {table} "
+        f"WHERE {table} MATCH ? AND (score, rowid) > (?, ?) "
+        f"ORDER BY score, rowid "
+        f"LIMIT ?"
+    )
+    for table in (TABLE_NAME, TRIGRAM_TABLE)
+}
+# 番号は文書テーブルから引く（FTS5 の列を読むと本文の展開が走るため）
+_NUMBERS_SQL = f"SELECT rowid, number FROM {DOCS_TABLE} WHERE rowid IN (SELECT value FROM json_each(?))"
+_SNIPPET_SQL = {
+    table: (
+        f"SELECT snippet({table}, -1, '…', '…', '…', 64) "
+        f"FROM {table} "
+        f"WHERE {table} MATCH ? AND rowid = ?"
+    )
+    for table in (TABLE_NAME, TRIGRAM_TABLE)
+}
+_CONTENT_SQL = f"SELECT content FROM {DOCS_VIEW} WHERE num = ?"
+_HAS_TABLE_SQL = "SELECT 1 FROM sqlite_master WHERE name = ?"
+# porter 側の 1 語として扱える文字（FTS5 の bareword と演算子・前方一致など）
+_WORD_QUERY_RE = re.compile(r'^[A-Za-z0-9_\s"*()^:+]*$')
+# 語を空白で区切らない文字（漢字・かな・ハングル）。porter 索引では文字列の途中が引けない
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff66-\uff9f]")
+# 3 文字未満の語は trigram 索引の MATCH では引けないので、content の LIKE で絞り込む
+# （この条件には索引が使えず、MATCH する語が無ければ全文書を走査する）
+_LIKE_SQL = "content LIKE ? ESCAPE '\\'"
+
+
+def _query_tag(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()[:8]
+
+
+def encode_cursor(query: str, score: float, rowid: int) -> str:
+    """ページの最後の結果から次ページ用の不透明なカーソルを作る"""
+    raw = json.dumps([score, rowid, _query_tag(query)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(query: str, cursor: str) -> Tuple[float, int]:
+    """カーソルを (score, rowid) に戻す。壊れている・別の検索語のものなら ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        score, rowid, tag = json.loads(raw)
+        score, rowid = float(score), int(rowid)
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+    if tag != _query_tag(query):
+        raise ValueError("Cursor does not belong to this query")
+    return score, rowid
+
+
+def _substring_match(query: str) -> str:
     """
-    data/fulltext.db の FTS5 テーブルを使って全文検索を実行し、
-    [(RFC番号, 検出箇所のスニペット), …] を返す。
+    3 文字以上の各語を trigram 索引向けのフレーズ（"..."）にして AND で結ぶ。
+    それより短い語は含めない（_short_terms の LIKE で絞り込む）。該当する語が無ければ空文字列
     """
-    # クエリ文字列をエスケープせずそのまま MATCH 句に渡すことで
+    terms = query.split()
+    if not terms:
+        raise ValueError("Substring search needs at least one term")
+    return " ".join('"' + t.replace('"', '""') + '"' for t in terms if len(t) >= TRIGRAM_MIN_CHARS)
+
+
+def _short_terms(query: str) -> List[str]:
+    """trigram 索引の MATCH では引けない 3 文字未満の語"""
+    return [t for t in query.split() if len(t) < TRIGRAM_MIN_CHARS]
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def plan_query(query: str, mode: str = "auto", has_trigram: bool = True) -> Tuple[str, str]:
+    """
+    検索語をどちらの索引で引くか決め、(テーブル名, MATCH 式) を返す。
+    - word: porter 索引に FTS5 の検索構文のまま渡す
+    - substring: trigram 索引で各語を部分文字列として探す
+    - auto: 非 ASCII 文字や、語の途中に記号を含む検索語（x-forwarded, 1.2.840 など）を
+      trigram 索引へ回す。trigram 索引が無い場合は porter 索引だが、日本語などの
+      空白で区切らない文字を含む検索語は porter 索引では引けないので ValueError
+    trigram 索引の MATCH 式には 3 文字以上の語だけを含める（短い語は検索時に LIKE で絞り込み、
+    「暗号」のように短い語しか無ければ MATCH 式は空文字列）
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode: {mode!r} (choose from {', '.join(SEARCH_MODES)})")
+    if mode == "substring":
+        if not has_trigram:
+            raise ValueError("Trigram index not built; run `index-fulltext --trigram`")
+        return TRIGRAM_TABLE, _substring_match(query)
+    if mode == "auto" and not _WORD_QUERY_RE.match(query):
+        if has_trigram:
+            return TRIGRAM_TABLE, _substring_match(query)
+        if _CJK_RE.search(query):
+            raise ValueError(
+                "Japanese/CJK queries need the trigram index; run `index-fulltext --trigram`"
+            )
+    return TABLE_NAME, query
+
+
+_SEARCH_POOL: Optional[ThreadPoolExecutor] = None
+_SEARCH_POOL_LOCK = threading.Lock()
+
+
+def _search_pool() -> ThreadPoolExecutor:
+    """シャードへの問い合わせに使う共有スレッドプール（sqlite3 は実行中 GIL を手放す）"""
+    global _SEARCH_POOL
+    with _SEARCH_POOL_LOCK:
+        if _SEARCH_POOL is None:
+            _SEARCH_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="fts-shard")
+        return _SEARCH_POOL
+
+
+def _fan_out(func, args_list: List[tuple]) -> list:
+    """args_list の各引数で func を呼ぶ。2 つ以上ならプールで並列に実行する"""
+    if len(args_list) == 1:
+        return [func(*args_list[0])]
+    return list(_search_pool().map(lambda args: func(*args), args_list))
+
+
+def _rank_sql(table: str, match: str, likes: int) -> str:
+    """順位付けの SQL。LIKE で絞り込む語があれば条件を足す（MATCH 式が空なら全件 score 0 の rowid 順）"""
+    if not likes:
+        return _RANK_SQL[table]
+    where = ([f"{table} MATCH ?"] if match else []) + [_LIKE_SQL] * likes
+    score = f"bm25({table}, {', '.join(map(str, BM25_WEIGHTS))})" if match else "0.0"
+    return (
+        f"SELECT rowid, {score} AS score FROM {table} "
+        f"WHERE {' AND '.join(where)} AND (score, rowid) > (?, ?) "
+        f"ORDER BY score, rowid LIMIT ?"
+    )
+
+
+def _rank_shard(
+    path: Path, table: str, match: str, likes: List[str], after: Tuple[float, int], limit: int
+) -> List[Tuple[int, float]]:
+    # 接続はスレッドごとに開いたまま使い回し、同じ SQL 文は statement cache から再利用される
+    conn = _connections(path).connection()
+    params = ([match] if match or not likes else []) + [_like_pattern(t) for t in likes]
+    return conn.execute(_rank_sql(table, match, len(likes)), (*params, after[0], after[1], limit)).fetchall()
+
+
+def _like_snippet(content: str, terms: List[str], width: int = 32) -> str:
+    """MATCH 式が無い（短い語だけの）検索のスニペット。最初に見つかった語の前後を切り出す"""
+    lowered = content.lower()
+    found = [(i, len(t)) for i, t in ((lowered.find(t.lower()), t) for t in terms) if i >= 0]
+    pos, length = min(found, default=(0, 0))
+    start, end = max(0, pos - width), pos + length + width
+    return (
+        ("…" if start else "") + content[start:pos] + "…" + content[pos:pos + length] + "…"
+        + content[pos + length:end] + ("…" if end < len(content) else "")
+    )
+
+
+def _describe_shard(
+    path: Path, table: str, match: str, likes: List[str], rowids: List[int], snippets: bool
+) -> Dict[int, Tuple[str, Optional[str]]]:
+    """rowid ごとの (RFC番号, スニペット)。スニペットはこのページの結果だけについて作る"""
+    conn = _connections(path).connection()
+    numbers = dict(conn.execute(_NUMBERS_SQL, (json.dumps(rowids),)))
+    out = {}
+    for rowid in rowids:
+        snippet = None
+        if snippets and (match or not likes):
+            snippet = conn.execute(_SNIPPET_SQL[table], (match, rowid)).fetchone()[0]
+        elif snippets:
+            content = conn.execute(_CONTENT_SQL, (rowid,)).fetchone()[0]
+            snippet = _like_snippet(content, likes)
+        out[rowid] = (numbers.get(rowid, str(rowid)), snippet)
+    return out
+
+
+def search_fulltext_page(
+    query: str,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    snippets: bool = True,
+    mode: str = "auto",
+) -> Dict[str, Any]:
+    """
+    FTS5 の bm25() で関連度順に並べた全文検索結果の 1 ページを返す。
+    {"results": [{"number", "score", "snippet"}], "next_cursor", "mode"} の形で、
+    score は大きいほど関連度が高い（bm25 の符号を反転した値）。
+    next_cursor を次の呼び出しに渡すと続きのページを返す（OFFSET は使わない）。
+    snippets=False なら snippet() を呼ばず、snippet は None になる。
+    mode は plan_query を参照。戻り値の mode は実際に使った索引（"word" / "substring"）。
+
+    シャード構成の場合は各シャードに同時に問い合わせ、上位 limit 件ずつを
+    スコア順にマージする（bm25 の IDF はシャードごとに計算されるため、単一の DB とは
+    順位がわずかに異なることがある）。
+    """
+    paths = index_paths()
+    conn = _connections(paths[0]).connection()
+    has_trigram = conn.execute(_HAS_TABLE_SQL, (TRIGRAM_TABLE,)).fetchone() is not None
+    table, match = plan_query(query, mode, has_trigram)
+    used = "substring" if table == TRIGRAM_TABLE else "word"
+    tag = f"{used}\0{query}"
+    if limit <= 0:
+        return {"results": [], "next_cursor": None, "mode": used}
+    limit = min(limit, MAX_PAGE_SIZE)
+    after = decode_cursor(tag, cursor) if cursor else (float("-inf"), -1)
+
+    # word の場合はクエリ文字列をエスケープせずそのまま MATCH 句に渡すことで
     # SQLite FTS5 の高度な検索構文を利用可能にする
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = lambda cursor, row: (row[0], row[1])
-    cur = conn.cursor()
-
-    sql = (
-        f"SELECT number, "
-        f"snippet(rfc_text, -1, '…', '…', '…', 64) "
-        f"FROM {TABLE_NAME} "
-        f"WHERE content MATCH ? "
-        f"LIMIT ?"
+    likes = _short_terms(query) if table == TRIGRAM_TABLE else []
+    per_shard = _fan_out(_rank_shard, [(path, table, match, likes, after, limit) for path in paths])
+    # rowid（RFC 番号）はシャード間で重ならないため、(score, rowid) でそのまま全体の順位になる
+    ranked = heapq.nsmallest(
+        limit, ((score, rowid, i) for i, rows in enumerate(per_shard) for rowid, score in rows)
     )
-    cur.execute(sql, (query, limit))
-    results = cur.fetchall()
-    conn.close()
-    return results
+    if not ranked:
+        return {"results": [], "next_cursor": None, "mode": used}
+
+    by_shard: Dict[int, List[int]] = {}
+    for _, rowid, i in ranked:
+        by_shard.setdefault(i, []).append(rowid)
+    described: Dict[int, Tuple[str, Optional[str]]] = {}
+    for part in _fan_out(
+        _describe_shard, [(paths[i], table, match, likes, rowids, snippets) for i, rowids in by_shard.items()]
+    ):
+        described.update(part)
+
+    results = [
+        {"number": described[rowid][0], "score": -score, "snippet": described[rowid][1]}
+        for score, rowid, _ in ranked
+    ]
+    next_cursor = None
+    if len(ranked) == limit:
+        next_cursor = encode_cursor(tag, ranked[-1][0], ranked[-1][1])
+    return {"results": results, "next_cursor": next_cursor, "mode": used}
 
 
-def build_fulltext_db() -> None:
+def search_fulltext(query: str, limit: int = 10) -> List[Tuple[str, str]]:
     """
-    ./data 以下の metadata.json と texts/*.txt を読み込み、
-    fulltext.db に FTS5 テーブルを作成または差分更新する。
+    data/fulltext.db の FTS5 テーブルを使って全文検索を実行し、
+    関連度の高い順に [(RFC番号, 検出箇所のスニペット), …] を返す。
+    limit が 1 ページの上限（MAX_PAGE_SIZE）を超える場合はカーソルでページをたどる。
     """
-    # data ディレクトリを作成
-    BASE_DIR.mkdir(parents=True, exist_ok=True)
+    out: List[Tuple[str, str]] = []
+    cursor: Optional[str] = None
+    while len(out) < limit:
+        page = search_fulltext_page(query, limit=min(limit - len(out), MAX_PAGE_SIZE), cursor=cursor)
+        out += [(r["number"], r["snippet"]) for r in page["results"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    return out
 
-    # DB 接続 & WAL モード設定
-    conn = sqlite3.connect(DB_PATH)
+
+def _open_writer(db_path: Path) -> sqlite3.Connection:
+    """書き込み用の接続（トランザクションは明示的に張る）"""
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    register_functions(conn)
     conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    return conn
+
 
-    # FTS5 仮想テーブルを作成（存在しない場合のみ）
+def _ensure_schema(conn: sqlite3.Connection) -> bool:
+    """
+    文書テーブル・展開ビュー・外部コンテンツの FTS5 テーブルを用意する。
+    本文を FTS5 内に持つ旧形式の DB だった場合は作り直し、True を返す。
+    """
+    has_docs = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = ?", (DOCS_TABLE,)
+    ).fetchone()
+    migrated = False
+    if not has_docs:
+        migrated = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = ?", (TABLE_NAME,)
+        ).fetchone() is not None
+        conn.execute(f"DROP TABLE IF EXISTS {TABLE_NAME}")
+        conn.execute("DROP TABLE IF EXISTS rfc_text_state")
+    # rowid = RFC 番号。digest は元テキストの sha256 とタイトルから求めた値、body は zlib 圧縮した本文
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {DOCS_TABLE} (
+            rowid  INTEGER PRIMARY KEY,
+            number TEXT NOT NULL,
+            title  TEXT NOT NULL,
+            digest TEXT NOT NULL,
+            body   BLOB NOT NULL
+        );
+    """)
+    conn.execute(f"""
+        CREATE VIEW IF NOT EXISTS {DOCS_VIEW} AS
+        SELECT rowid AS num, number, title, {INFLATE_FUNCTION}(body) AS content
+        FROM {DOCS_TABLE};
+    """)
     conn.execute(f"""
         CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE_NAME}
         USING fts5(
             number,
             title,
             content,
+            content = '{DOCS_VIEW}',
+            content_rowid = 'num',
             tokenize = 'porter'
         );
     """)
+    return migrated
+
 
+def _ensure_trigram(conn: sqlite3.Connection, trigram: Optional[bool]) -> Tuple[bool, bool]:
+    """
+    trigram 索引を作成・削除する（None なら今の状態のまま）。
+    (索引があるか, 作ったばかりで全件の投入が必要か) を返す。
+    """
+    exists = conn.execute(_HAS_TABLE_SQL, (TRIGRAM_TABLE,)).fetchone() is not None
+    if trigram is False and exists:
+        conn.execute(f"DROP TABLE {TRIGRAM_TABLE}")
+        return False, False
+    if trigram and not exists:
+        # porter 索引と同じ文書ビューを外部コンテンツとして参照する（本文は持たない）
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE {TRIGRAM_TABLE}
+            USING fts5(
+                number,
+                title,
+                content,
+                content = '{DOCS_VIEW}',
+                content_rowid = 'num',
+                tokenize = 'trigram'
+            );
+        """)
+        return True, True
+    return exists, False
+
+
+def _load_metadata() -> List[dict]:
     # metadata.json がなければ自動取得
     if not META_PATH.exists() or META_PATH.stat().st_size == 0:
         from .fetch_rfc import client as rfc_client
-        meta_list = rfc_client.fetch_metadata(save=True)
-    else:
-        meta_list = json.loads(META_PATH.read_text(encoding="utf-8"))
+        return rfc_client.fetch_metadata(save=True)
+    return json.loads(META_PATH.read_text(encoding="utf-8"))
 
-    # texts ディレクトリを作成
-    TEXT_DIR.mkdir(parents=True, exist_ok=True)
 
-    # 各 RFC 本文を差分更新
+def _doc_digest(source_sha256: str, title: str) -> str:
+    return hashlib.sha256(f"{source_sha256}\0{title}".encode("utf-8")).hexdigest()
+
+
+def _entry_number(entry: dict) -> Optional[int]:
+    try:
+        return int(_normalize_num_str(entry.get("number") or entry.get("rfc_number", "")))
+    except ValueError:
+        return None
+
+
+def _build_index(
+    db_path: Path,
+    meta_list: List[dict],
+    text_dir: Path,
+    targets: Optional[Set[int]],
+    workers: int,
+    batch_size: int,
+    trigram: Optional[bool],
+    progress: bool = True,
+) -> Dict[str, float]:
+    """
+    1 つの DB ファイル（単一の索引またはシャード 1 つ分）を meta_list の RFC で差分更新する。
+    シャードのビルドでは別プロセスから呼ばれるため、パスはすべて引数で受け取る。
+    """
+    started = time.perf_counter()
+    conn = _open_writer(db_path)
+    migrated = _ensure_schema(conn)
+    has_trigram, fill_trigram = _ensure_trigram(conn, trigram)
+    # 差分更新する索引（作ったばかりの trigram 索引は最後にまとめて投入する）
+    indexes = [TABLE_NAME] + ([TRIGRAM_TABLE] if has_trigram and not fill_trigram else [])
+
+    # パック + ルーズファイルのストアを開く
+    store = open_store(text_dir)
+    manifest = DownloadManifest(text_dir / MANIFEST_NAME)
+    cache_dir = parsed_dir(text_dir)
+
+    # --- 1. 対象 RFC と digest の計算（本文は読まない） ---
+    wanted: Dict[int, Tuple[str, str, str]] = {}  # RFC番号 → (表示用番号, タイトル, digest)
+    failed = 0
     for entry in meta_list:
         raw_num = entry.get("number") or entry.get("rfc_number", "")
         try:
             num = _normalize_num_str(raw_num)
         except ValueError:
             continue  # フォーマット不整合はスキップ
+        if targets is not None and int(num) not in targets:
+            continue
+        if int(num) not in store:
+            continue  # 本文が無ければスキップ
+        title = entry.get("title", "")
+        try:
+            source, _ = source_sha256(store, manifest, int(num))
+        except (FileNotFoundError, OSError):
+            failed += 1
+            continue
+        wanted[int(num)] = (num, title, _doc_digest(source, title))
 
-        txt_path = TEXT_DIR / f"{num}.txt"
-        if not txt_path.exists():
-            continue  # 本文ファイルが無ければスキップ
+    # --- 2. 変更検出 ---
+    current = dict(conn.execute(f"SELECT rowid, digest FROM {DOCS_TABLE}"))
+    changed = sorted(n for n, (_, _, digest) in wanted.items() if current.get(n) != digest)
+    removed: List[int] = []
+    if targets is None:
+        removed = sorted(set(current) - set(wanted))
 
-        title = entry.get("title", "")
-        content = txt_path.read_text(encoding="utf-8")
+    def _load(n: int) -> Tuple[int, Optional[str]]:
+        try:
+            return n, get_parsed(store, manifest, cache_dir, n)[1]
+        except Exception:  # 1件の失敗で全体を止めない
+            return n, None
 
-        # 既存 rowid を取得（あれば上書き）
-        cur = conn.execute(
-            f"SELECT rowid FROM {TABLE_NAME} WHERE number = ?",
-            (num,)
-        )
-        row = cur.fetchone()
-        rowid = row[0] if row else None
-
-        # INSERT OR REPLACE で差分更新
-        conn.execute(
-            f"INSERT OR REPLACE INTO {TABLE_NAME} (rowid, number, title, content) "
-            f"VALUES (?, ?, ?, ?)",
-            (rowid, num, title, content)
+    # --- 3. 並列読み込み → 単一ライターでバッチ書き込み ---
+    indexed, nbytes = 0, 0
+    # 外部コンテンツの FTS5 は自動では同期しないため、索引の削除は古い内容を渡して行い、
+    # 文書テーブルと同じトランザクションで書き換える
+    delete_index = [
+        f"INSERT INTO {table} ({table}, rowid, number, title, content) "
+        f"SELECT 'delete', num, number, title, content FROM {DOCS_VIEW} WHERE num = ?"
+        for table in indexes
+    ]
+    delete_doc = f"DELETE FROM {DOCS_TABLE} WHERE rowid = ?"
+    insert_index = [
+        f"INSERT INTO {table} (rowid, number, title, content) VALUES (?, ?, ?, ?)"
+        for table in indexes
+    ]
+    upsert_doc = f"INSERT OR REPLACE INTO {DOCS_TABLE} (rowid, number, title, digest, body) VALUES (?, ?, ?, ?, ?)"
+
+    def _transaction(*statements: Tuple[str, list]) -> None:
+        conn.execute("BEGIN")
+        try:
+            for sql, params in statements:
+                conn.executemany(sql, params)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    if removed:
+        _transaction(
+            *[(sql, [(n,) for n in removed]) for sql in delete_index],
+            (delete_doc, [(n,) for n in removed]),
         )
 
-    conn.commit()
-    conn.close()
+    windows = [changed[i:i + batch_size] for i in range(0, len(changed), max(1, batch_size))]
+    unreadable: Set[int] = set()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool, \
+                tqdm(total=len(changed), desc="Indexing RFC texts", unit="doc", dynamic_ncols=True,
+                     disable=not progress) as bar:
+            # 書き込み中に次のバッチを読み込む（メモリ上に置くのは最大 2 バッチ分）
+            pending = pool.map(_load, windows[0]) if windows else iter(())
+            for i in range(len(windows)):
+                loaded = list(pending)
+                if i + 1 < len(windows):
+                    pending = pool.map(_load, windows[i + 1])
+                batch = [(n, body) for n, body in loaded if body is not None]
+                failed += len(loaded) - len(batch)
+                unreadable.update(n for n, body in loaded if body is None)
+                rows = [(n, wanted[n][0], wanted[n][1], body) for n, body in batch]
+                _transaction(
+                    *[(sql, [(n,) for n, _ in batch if n in current]) for sql in delete_index],
+                    *[(sql, rows) for sql in insert_index],
+                    (upsert_doc, [(n, wanted[n][0], wanted[n][1], wanted[n][2], _compress(body))
+                                  for n, body in batch]),
+                )
+                indexed += len(batch)
+                nbytes += sum(len(body.encode("utf-8")) for _, body in batch)
+                bar.update(len(loaded))
+        if fill_trigram:
+            # 文書テーブルの全件から trigram 索引を作る
+            _transaction((f"INSERT INTO {TRIGRAM_TABLE} ({TRIGRAM_TABLE}) VALUES ('rebuild')", [()]))
+        if migrated:
+            # 旧形式の本文が占めていたページを返す
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "documents": len(wanted),
+        "indexed": indexed,
+        "unchanged": len(wanted) - len(changed),
+        "removed": len(removed),
+        "failed": failed,
+        "bytes": nbytes,
+        "seconds": elapsed,
+        "docs_per_sec": indexed / elapsed if elapsed else 0.0,
+        "mb_per_sec": nbytes / 1e6 / elapsed if elapsed else 0.0,
+        "trigram": has_trigram,
+        # 索引が最新になった RFC（書き直した・変わっていなかった）。同期の未処理キューから消す
+        "handled": sorted(set(wanted) - unreadable),
+    }
+
+
+def _bounds(numbers: List[int], shards: int) -> List[int]:
+    """件数がほぼ均等になる RFC 番号の区切り（shards - 1 個）"""
+    return [numbers[len(numbers) * i // shards] for i in range(1, shards)] if numbers else [0] * (shards - 1)
+
+
+def _remove_db(path: Path) -> None:
+    for p in (path, path.with_name(path.name + "-wal"), path.with_name(path.name + "-shm")):
+        p.unlink(missing_ok=True)
+
+
+def _has_trigram_file(path: Path) -> bool:
+    if not path.exists():
+        return False
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(_HAS_TABLE_SQL, (TRIGRAM_TABLE,)).fetchone() is not None
+    finally:
+        conn.close()
+
+
+def build_fulltext_db(
+    numbers: Optional[Iterable[str]] = None,
+    workers: int = 4,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    trigram: Optional[bool] = None,
+    shards: Optional[int] = None,
+) -> Dict[str, float]:
+    """
+    ./data 以下の metadata.json と texts/*.txt を読み込み、
+    fulltext.db に FTS5 テーブルを作成または差分更新する。
+    本文はパース済みキャッシュ（preprocess の出力）のクリーン済み本文を使う。
+    numbers を渡すと、その RFC 番号（増分同期の added/changed など）だけを更新する。
+
+    - 元テキストの sha256（マニフェストに記録済みなら本文は読まない）とタイトルで
+      変更を検出し、変わった RFC だけを書き直す
+    - 本文の読み込み・デコードは workers スレッドで並列に行い、書き込みは単一スレッドで
+      batch_size 件ずつ executemany + 明示的トランザクションでまとめる
+    - trigram=True で部分文字列検索用の trigram 索引を作り、以後は porter 索引と一緒に
+      差分更新する。False で削除、None なら今の状態のまま
+    - shards=N (N > 1) で RFC 番号の範囲ごとに N 個の DB に分け、シャードごとに別プロセスで
+      並列にビルドする（区切りは fulltext.shards.json に保存し、以後の差分更新でも使う）。
+      1 で単一の DB に戻し、None なら今の構成のまま
+    - 戻り値は {"documents", "indexed", "unchanged", "removed", "failed",
+      "bytes", "seconds", "docs_per_sec", "mb_per_sec", "trigram", "shards", "handled"}
+      （handled は索引が最新になった RFC 番号のリスト）
+    """
+    started = time.perf_counter()
+    meta_list = _load_metadata()
+    # texts ディレクトリを作成
+    TEXT_DIR.mkdir(parents=True, exist_ok=True)
+
+    # 対象番号の絞り込み（比較はゼロ詰めを除いた数値で行う）
+    targets = {int(_normalize_num_str(str(n))) for n in numbers} if numbers is not None else None
+
+    layout = read_shard_layout(DB_PATH)
+    old_paths = index_paths(DB_PATH)
+    count = len(old_paths) if shards is None else shards
+    if trigram is None:
+        # 構成を変える場合も trigram 索引の有無は引き継ぐ
+        trigram = _has_trigram_file(old_paths[0]) or None
+
+    if count <= 1:
+        results = [_build_index(DB_PATH, meta_list, TEXT_DIR, targets, workers, batch_size, trigram)]
+        if layout is not None:
+            _layout_path(DB_PATH).unlink()
+            for path in old_paths:
+                _remove_db(path)
+    else:
+        new_layout = layout is None or len(layout["shards"]) != count
+        if new_layout:
+            ids = sorted({n for n in map(_entry_number, meta_list) if n is not None})
+            layout = {"bounds": _bounds(ids, count), "shards": [_shard_name(DB_PATH, i, count) for i in range(count)]}
+        paths = [DB_PATH.with_name(name) for name in layout["shards"]]
+        if new_layout:
+            for path in paths:
+                _remove_db(path)  # 中断したビルドの残り
+
+        # RFC 番号の範囲でメタデータを分け、シャードごとに別プロセスでビルドする
+        parts: List[List[dict]] = [[] for _ in paths]
+        for entry in meta_list:
+            n = _entry_number(entry)
+            if n is not None:
+                parts[bisect_right(layout["bounds"], n)].append(entry)
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(count, os.cpu_count() or 1), mp_context=ctx) as pool, \
+                tqdm(total=count, desc="Indexing shards", unit="shard", dynamic_ncols=True) as bar:
+            futures = [
+                pool.submit(_build_index, path, part, TEXT_DIR, targets, workers, batch_size, trigram, False)
+                for path, part in zip(paths, parts)
+            ]
+            for _ in as_completed(futures):
+                bar.update(1)
+            results = [f.result() for f in futures]
+
+        if new_layout:
+            # 全シャードができてから構成を差し替え、古い DB を消す
+            _write_layout(DB_PATH, layout)
+            for path in old_paths:
+                if path not in paths:
+                    _remove_db(path)
+
+    # 各ビルド（シャードなら各プロセス）が付け直した記録の古い行をまとめて消す
+    compact_manifest(TEXT_DIR / MANIFEST_NAME)
+
+    elapsed = time.perf_counter() - started
+    stats: Dict[str, float] = {
+        key: sum(r[key] for r in results)
+        for key in ("documents", "indexed", "unchanged", "removed", "failed", "bytes")
+    }
+    stats.update(
+        seconds=elapsed,
+        docs_per_sec=stats["indexed"] / elapsed if elapsed else 0.0,
+        mb_per_sec=stats["bytes"] / 1e6 / elapsed if elapsed else 0.0,
+        trigram=any(r["trigram"] for r in results),
+        shards=len(results),
+        handled=sorted(n for r in results for n in r["handled"]),
+    )
+    return stats
 
 
 if __name__ == "__main__":
     print(f"Rebuilding fulltext DB at {DB_PATH} …")
-    build_fulltext_db()
-    print("Done.")
+    stats = build_fulltext_db()
+    print(
+        f"Done. indexed {stats['indexed']}, unchanged {stats['unchanged']}, "
+        f"removed {stats['removed']} in {stats['seconds']:.1f}s "
+        f"({stats['docs_per_sec']:.0f} docs/sec, {stats['mb_per_sec']:.1f} MB/s)"
+    )
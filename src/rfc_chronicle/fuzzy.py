@@ -0,0 +1,235 @@
+"""
+スペルミスに強い検索のための曖昧一致インデックス
+- SymSpell 方式の削除辞書：語彙の各単語から最大 max_distance 文字を削除した文字列 → 元の単語
+- 問い合わせ語も同様に削除文字列を作り、辞書を引いた候補だけ編集距離を確かめる
+  （語彙全体を走査しない。同じ語の再問い合わせは結果をメモ化して返す）
+- 語彙はメタデータの単語（タイトル・アブストラクト等）と全文検索 DB の fts5vocab
+"""
+import re
+import sqlite3
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from rfc_chronicle.fulltext import index_paths
+from rfc_chronicle.metaindex import MetadataIndex
+
+DEFAULT_MAX_DISTANCE = 2
+# 削除文字列は単語の先頭 PREFIX_LENGTH 文字だけから作る（辞書サイズを抑える）
+PREFIX_LENGTH = 6
+MIN_WORD_LENGTH = 3
+# fts5vocab から取り込む語の条件（ステミング済みの語が入るため、ある程度出現するものに限る）
+FTS_MIN_DOCS = 5
+LOOKUP_CACHE_SIZE = 4096
+_WORD_RE = re.compile(r"^[a-z][a-z0-9\-]{2,31}$")
+_TERM_RE = re.compile(r"\w+")
+
+
+def osa_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    隣接文字の入れ替えを 1 操作とする編集距離（OSA 距離）。
+    max_distance を超えることが確定した時点で max_distance + 1 を返す。
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > max_distance:
+            return max_distance + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """word から最大 max_distance 文字を削除した文字列の集合（word 自身を含む）"""
+    out = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        nxt = set()
+        for w in frontier:
+            for i in range(len(w)):
+                nxt.add(w[:i] + w[i + 1:])
+        nxt -= out
+        out |= nxt
+        frontier = nxt
+    return out
+
+
+class FuzzyIndex:
+    """単語 → 出現数 の語彙から作る SymSpell 方式の削除辞書"""
+
+    def __init__(self, words: Dict[str, int], max_distance: int = DEFAULT_MAX_DISTANCE) -> None:
+        self.max_distance = max_distance
+        self.words = words
+        deletes: Dict[str, List[str]] = defaultdict(list)
+        for word in words:
+            for variant in _deletes(word[:PREFIX_LENGTH], max_distance):
+                deletes[variant].append(word)
+        self._deletes = dict(deletes)
+        self._lookup = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self._lookup_uncached)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.words
+
+    def lookup(
+        self, term: str, max_distance: Optional[int] = None, limit: int = 5
+    ) -> List[Tuple[str, int, int]]:
+        """term に近い単語を (単語, 編集距離, 出現数) で距離の近い順・出現数の多い順に返す"""
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        return self._lookup(term.lower(), max_distance, limit)
+
+    def _lookup_uncached(self, term: str, max_distance: int, limit: int) -> List[Tuple[str, int, int]]:
+        candidates: Set[str] = set()
+        for variant in _deletes(term[:PREFIX_LENGTH], max_distance):
+            candidates.update(self._deletes.get(variant, ()))
+        found = []
+        for word in candidates:
+            dist = osa_distance(term, word, max_distance)
+            if dist <= max_distance:
+                found.append((word, dist, self.words[word]))
+        found.sort(key=lambda x: (x[1], -x[2], x[0]))
+        return found[:limit]
+
+
+def fts_vocabulary(
+    db_path: Path,
+    table: str = "rfc_text",
+    min_docs: int = FTS_MIN_DOCS,
+    known_words: Optional[Set[str]] = None,
+) -> Dict[str, int]:
+    """
+    全文検索 DB の語彙（語 → 含む文書数）。DB が無ければ空。
+    porter で語幹化した索引の語は "kerbero" のような語幹なので、known_words（語幹化していない
+    実在の語）が渡されればそこに含まれる語だけを返す
+    """
+    if not db_path.exists():
+        return {}
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        row = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (table,)).fetchone()
+        stemmed = row is not None and "porter" in (row[0] or "").lower()
+        conn.execute(f"CREATE VIRTUAL TABLE temp.fuzzy_vocab USING fts5vocab(main, '{table}', 'row')")
+        rows = conn.execute("SELECT term, doc FROM temp.fuzzy_vocab WHERE doc >= ?", (min_docs,))
+        return {
+            term: doc for term, doc in rows
+            if _WORD_RE.match(term) and not (stemmed and known_words is not None and term not in known_words)
+        }
+    except sqlite3.Error:
+        return {}
+    finally:
+        conn.close()
+
+
+def build_vocabulary(meta_index: MetadataIndex, db_path: Optional[Path]) -> Dict[str, int]:
+    """
+    メタデータと全文検索 DB（シャード構成なら全シャード）の語彙をまとめる（出現数は合計）。
+    語幹化された全文検索の語はメタデータにもある語だけを使う（補正後の検索語は
+    メタデータの単語一致で検索し直すので、語幹を候補にしても何にも一致しない）
+    """
+    words = {
+        w: n for w, n in meta_index.vocabulary().items()
+        if len(w) >= MIN_WORD_LENGTH and not w.isdigit()
+    }
+    if db_path is not None:
+        known = set(words)
+        for path in index_paths(db_path):
+            for w, n in fts_vocabulary(path, known_words=known).items():
+                words[w] = words.get(w, 0) + n
+    return words
+
+
+class QueryCorrector:
+    """
+    検索語の綴りを補正する。削除辞書は起動時（rebuild）に作っておき、語彙の元
+    （metadata.json / fulltext.db）が更新されたら、作り直す間も前の辞書で答える。
+    """
+
+    def __init__(self, meta_index: MetadataIndex, db_path: Optional[Path] = None) -> None:
+        self.meta_index = meta_index
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._key: Optional[Tuple[Any, ...]] = None
+        self._index: Optional[FuzzyIndex] = None
+        self._refreshing = False
+
+    def _source_key(self) -> Tuple[Any, ...]:
+        db_mtimes = []
+        if self.db_path is not None:
+            for path in index_paths(self.db_path):
+                try:
+                    db_mtimes.append((path, path.stat().st_mtime_ns))
+                except FileNotFoundError:
+                    pass
+        return self.meta_index.digest, tuple(db_mtimes)
+
+    def rebuild(self) -> FuzzyIndex:
+        """語彙の元が変わっていれば削除辞書を作り直す（起動時・同期後に呼ぶ）"""
+        with self._lock:
+            key = self._source_key()
+            if key != self._key:
+                self._index = FuzzyIndex(build_vocabulary(self.meta_index, self.db_path))
+                self._key = key
+            return self._index
+
+    def _rebuild_in_background(self) -> None:
+        try:
+            self.rebuild()
+        finally:
+            self._refreshing = False
+
+    def index(self) -> FuzzyIndex:
+        if self._index is None:
+            return self.rebuild()  # 事前に作られていなければ最初の呼び出しで作る
+        if not self._refreshing and self._source_key() != self._key:
+            # 検索要求に作り直しを待たせない
+            self._refreshing = True
+            threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+        return self._index
+
+    def correct(self, keyword: str, limit: int = 3) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        語彙に無い単語を一番近い単語に置き換えた検索語と、
+        [{"term", "suggestions": [{"word", "distance"}]}] を返す。
+        """
+        index = self.index()
+        corrections = []
+        corrected = keyword.lower()
+        for term in dict.fromkeys(_TERM_RE.findall(keyword.lower())):
+            if term in index or term.isdigit() or len(term) < MIN_WORD_LENGTH:
+                continue
+            matches = [m for m in index.lookup(term, limit=limit) if m[1] > 0]
+            if not matches:
+                continue
+            corrections.append({
+                "term": term,
+                "suggestions": [{"word": w, "distance": d} for w, d, _ in matches],
+            })
+            corrected = re.sub(rf"\b{re.escape(term)}\b", matches[0][0], corrected)
+        return corrected, corrections
+
+
+# (metadata.json, DB) ごとの共有インスタンス（id() をキーにすると解放されたインデックスの分が残る）
+_CORRECTORS: Dict[Tuple[Path, Optional[Path]], QueryCorrector] = {}
+_CORRECTORS_LOCK = threading.Lock()
+
+
+def get_corrector(meta_index: MetadataIndex, db_path: Optional[Path] = None) -> QueryCorrector:
+    """メタデータインデックス・DB ごとの共有 QueryCorrector を返す（同じファイルの別インスタンスなら作り直す）"""
+    key = (Path(meta_index.path).resolve(), db_path)
+    with _CORRECTORS_LOCK:
+        corrector = _CORRECTORS.get(key)
+        if corrector is None or corrector.meta_index is not meta_index:
+            corrector = _CORRECTORS[key] = QueryCorrector(meta_index, db_path)
+        return corrector
+
+
+__all__ = ["FuzzyIndex", "QueryCorrector", "get_corrector", "osa_distance", "fts_vocabulary"]
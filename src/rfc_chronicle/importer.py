@@ -0,0 +1,160 @@
+"""
+ローカルの RFC アーカイブ（tar / zip / rsync ミラー）からの一括取り込み
+- アーカイブのメンバーを一時ディレクトリに展開せず、先頭から順に読み出す
+- 正規化と書き込みは複数ワーカーで並列に行う
+- 書き込んだ本文はダウンロードマニフェストに記録し、後の --refresh で再検証できる
+  （メンバーの更新時刻を Last-Modified として記録し、条件付き GET で古い写しを検出する）
+"""
+import hashlib
+import os
+import re
+import tarfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from tqdm.auto import tqdm
+
+from rfc_chronicle.docstore import DocStore, open_store
+from rfc_chronicle.manifest import DownloadManifest, MANIFEST_NAME
+
+# rfc1234.txt 形式のメンバー名（ディレクトリ付きも可）
+MEMBER_RE = re.compile(r"(?:^|/)rfc(\d+)\.txt$", re.IGNORECASE)
+
+
+def _member_number(name: str):
+    """メンバー名から RFC 番号を取り出す（対象外なら None）"""
+    m = MEMBER_RE.search(name.replace(os.sep, "/"))
+    return int(m.group(1)) if m else None
+
+
+def _iter_members(source: Path) -> Iterator[Tuple[int, bytes, Optional[float]]]:
+    """
+    アーカイブまたはミラーディレクトリから (RFC番号, 生バイト列, 更新時刻) を順に返す。
+    tar はストリームモード（r|*）で開くため、圧縮アーカイブも 1 回の順次読み込みで済む。
+    """
+    if source.is_dir():
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                num = _member_number(name)
+                if num is not None:
+                    path = Path(root) / name
+                    yield num, path.read_bytes(), path.stat().st_mtime
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            for info in zf.infolist():
+                num = _member_number(info.filename)
+                if num is not None and not info.is_dir():
+                    # zip の時刻はタイムゾーンを持たないのでローカル時刻とみなす
+                    yield num, zf.read(info), time.mktime(info.date_time + (0, 0, -1))
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source, mode="r|*") as tf:
+            for member in tf:
+                num = _member_number(member.name)
+                if num is None or not member.isfile():
+                    continue
+                f = tf.extractfile(member)
+                if f is not None:
+                    yield num, f.read(), member.mtime or None
+    else:
+        raise ValueError(f"Unsupported archive: {source}")
+
+
+def iter_archive(source: Path) -> Iterator[Tuple[int, bytes]]:
+    """アーカイブまたはミラーディレクトリから (RFC番号, 生バイト列) を順に返す"""
+    for num, data, _ in _iter_members(source):
+        yield num, data
+
+
+def normalize_document(data: bytes) -> bytes:
+    """文字コードを UTF-8 に、改行を LF に揃える"""
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        text = data.decode("latin-1")  # 古い RFC には非 UTF-8 のものがある
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text.encode("utf-8")
+
+
+def _write_document(
+    num: int,
+    data: bytes,
+    store: DocStore,
+    manifest: DownloadManifest,
+    overwrite: bool,
+    mtime: Optional[float] = None,
+) -> bool:
+    """
+    1 件を正規化して保存する。内容が同じで上書き不要なら False。
+    mtime（アーカイブのメンバーの更新時刻）は HTTP-date にして last_modified に記録する
+    """
+    body = normalize_document(data)
+    digest = hashlib.sha256(body).hexdigest()
+    target = store.loose_path(num)
+    rec = manifest.get(num)
+    version = store.version(num)
+    last_modified = formatdate(mtime, usegmt=True) if mtime else None
+    if not overwrite and rec and rec["sha256"] == digest and version and manifest.is_current(num, *version):
+        if last_modified and not rec.get("last_modified"):
+            # 更新時刻を記録していなかった以前の取り込み分にも付けておく
+            manifest.record(num, rec.get("etag"), last_modified, rec["length"], digest, rec.get("mtime_ns"))
+        return False
+    tmp = target.with_suffix(".part")
+    tmp.write_bytes(body)
+    os.replace(tmp, target)
+    manifest.record(
+        num, etag=None, last_modified=last_modified, length=len(body), sha256=digest,
+        mtime_ns=target.stat().st_mtime_ns,
+    )
+    return True
+
+
+def import_archive(
+    source: Path,
+    save_dir: Path,
+    workers: int = 4,
+    overwrite: bool = False,
+) -> Dict[str, Any]:
+    """
+    source（tar / zip / ディレクトリ）の RFC 本文を save_dir に取り込む。
+    読み出しは単一スレッドで順次、正規化と書き込みは workers 並列。
+    戻り値は {"written", "unchanged", "failed"} の件数と、失敗した RFC の理由 "errors"（{番号: repr(例外)}）。
+    """
+    save_dir.mkdir(parents=True, exist_ok=True)
+    manifest = DownloadManifest(save_dir / MANIFEST_NAME)
+    store = open_store(save_dir)
+    stats: Dict[str, Any] = {"written": 0, "unchanged": 0, "failed": 0, "errors": {}}
+    stats_lock = threading.Lock()
+    # 読み出しが書き込みを追い越してメモリを食わないよう、未処理件数を制限
+    in_flight = threading.BoundedSemaphore(max(1, workers) * 4)
+
+    def _task(num: int, data: bytes, mtime: Optional[float]) -> None:
+        error = None
+        try:
+            written = _write_document(num, data, store, manifest, overwrite, mtime)
+            key = "written" if written else "unchanged"
+        except Exception as exc:  # 1件の失敗で全体を止めない
+            key, error = "failed", repr(exc)
+        finally:
+            in_flight.release()
+        with stats_lock:
+            stats[key] += 1
+            if error is not None:
+                stats["errors"][num] = error
+            bar.update(1)
+
+    with tqdm(desc="Importing RFC texts", unit="doc", dynamic_ncols=True) as bar, \
+            ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for num, data, mtime in _iter_members(source):
+            in_flight.acquire()
+            pool.submit(_task, num, data, mtime)
+
+    manifest.compact()
+    return stats
+
+
+__all__ = ["import_archive", "iter_archive", "normalize_document"]
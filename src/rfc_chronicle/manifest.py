@@ -0,0 +1,127 @@
+"""
+ダウンロードマニフェスト
+- RFC 本文 1 件ごとにサーバのバリデータ（ETag / Last-Modified）、
+  保存サイズ、内容ハッシュ、保存したファイルの更新時刻を記録する
+- 追記型の JSON Lines で保存し、中断しても完了済みの記録は失われない
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+MANIFEST_NAME = "manifest.jsonl"
+
+
+class DownloadManifest:
+    """RFC番号 → ダウンロード記録 の永続マニフェスト（スレッドセーフ）"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._records: Dict[int, Dict[str, Any]] = {}
+        self._lines = 0  # ファイルの行数（同じ番号の古い記録も含む）
+        self._load()
+
+    def _load(self) -> None:
+        """JSON Lines を読み込み、同じ番号は後勝ちで採用する"""
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 中断時の書きかけ行は無視
+                self._records[int(rec["number"])] = rec
+                self._lines += 1
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, num: int) -> Optional[Dict[str, Any]]:
+        """記録を返す（なければ None）"""
+        return self._records.get(num)
+
+    def record(
+        self,
+        num: int,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        length: int,
+        sha256: str,
+        mtime_ns: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """ダウンロード完了を 1 行追記する（mtime_ns は保存したファイルの更新時刻）"""
+        rec = {
+            "number": num,
+            "etag": etag,
+            "last_modified": last_modified,
+            "length": length,
+            "sha256": sha256,
+            "mtime_ns": mtime_ns,
+            "fetched_at": time.time(),
+        }
+        self._append(num, rec)
+        return rec
+
+    def restamp(self, num: int, length: int, sha256: str, mtime_ns: int) -> None:
+        """
+        記録のサイズ・ハッシュ・更新時刻を現在のファイルに合わせる。
+        記録が無い（手で置いた・マニフェスト導入前の）本文はバリデータ無しの記録を作る
+        """
+        rec = self._records.get(num)
+        if rec is None:
+            self.record(num, None, None, length, sha256, mtime_ns)
+            return
+        self._append(num, dict(rec, length=length, sha256=sha256, mtime_ns=mtime_ns))
+
+    def _append(self, num: int, rec: Dict[str, Any]) -> None:
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line)
+            self._records[num] = rec
+            self._lines += 1
+
+    def is_complete(self, num: int, size: Optional[int]) -> bool:
+        """記録があり、ローカルに保存済みの本文サイズ（size）が記録と一致するか"""
+        rec = self._records.get(num)
+        return rec is not None and size is not None and size == rec["length"]
+
+    def is_current(self, num: int, size: Optional[int], mtime_ns: Optional[int]) -> bool:
+        """記録のサイズと更新時刻がどちらもファイルと一致するか（記録の sha256 をそのまま使える）"""
+        rec = self._records.get(num)
+        return (
+            self.is_complete(num, size)
+            and mtime_ns is not None
+            and rec.get("mtime_ns") == mtime_ns
+        )
+
+    def compact(self) -> None:
+        """最新の記録だけを残してファイルを書き直す"""
+        with self._lock:
+            tmp = self.path.with_suffix(".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                for num in sorted(self._records):
+                    f.write(json.dumps(self._records[num], ensure_ascii=False) + "\n")
+            os.replace(tmp, self.path)
+            self._lines = len(self._records)
+
+    def superseded(self) -> int:
+        """新しい記録で置き換えられた古い行の数（compact で消える行）"""
+        return self._lines - len(self._records)
+
+
+def compact_manifest(path: Path) -> None:
+    """
+    ファイルを読み直し、古い行があれば最新の記録だけに書き直す。
+    別プロセス（ワーカー）がそれぞれ追記するビルドでは、全ワーカーの終了後に親プロセスから呼ぶ
+    """
+    if not path.exists():
+        return
+    manifest = DownloadManifest(path)
+    if manifest.superseded():
+        manifest.compact()
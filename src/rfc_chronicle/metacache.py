@@ -0,0 +1,126 @@
+"""
+ディスク共有のメタデータキャッシュ
+- 取得結果を DATA_DIR に保存し、同じホストの全プロセス（uvicorn ワーカー等）で共有
+- TTL（環境変数 RFC_METADATA_TTL 秒）を過ぎたら条件付きリクエストで再検証
+- プロセス内はスレッドロック、プロセス間はファイルロックで single-flight 化し、
+  同時に期限切れを検知しても上流へのリクエストは 1 回だけにする
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows ではプロセス間ロックなし
+    fcntl = None
+
+DEFAULT_TTL = float(os.getenv("RFC_METADATA_TTL", str(24 * 60 * 60)))
+
+# fetcher(headers) -> None（304）または (records, etag, last_modified)
+Fetcher = Callable[[Dict[str, str]], Optional[Tuple[List[Dict[str, Any]], Optional[str], Optional[str]]]]
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """プロセス間の排他ロック（fcntl が無い環境では何もしない）"""
+    if fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class MetadataCache:
+    """TTL 付きのディスクキャッシュ（読み込み結果はファイルの mtime が変わるまでメモリに保持）"""
+
+    def __init__(self, path: Path, ttl: float = DEFAULT_TTL) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._memo: Optional[Dict[str, Any]] = None
+        self._memo_key: Optional[Tuple[int, int]] = None
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        """キャッシュファイルを読み込む（変更がなければメモリ上の内容を返す）"""
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        key = (st.st_mtime_ns, st.st_size)
+        if key != self._memo_key:
+            try:
+                self._memo = json.loads(self.path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                self._memo = None
+            self._memo_key = key
+        return self._memo
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _is_fresh(self, entry: Optional[Dict[str, Any]], max_age: float) -> bool:
+        return entry is not None and time.time() - entry.get("fetched_at", 0) < max_age
+
+    def get(self, fetcher: Fetcher, max_age: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        新しいキャッシュがあればそれを返し、なければ fetcher で取得（再検証）する。
+        max_age を省略すると TTL を使う（0 なら必ず再検証）。
+        """
+        max_age = self.ttl if max_age is None else max_age
+        entry = self._read()
+        if self._is_fresh(entry, max_age):
+            return entry["records"]
+
+        requested = time.time()
+        with self._lock, _file_lock(self.path.with_suffix(".lock")):
+            # ロック待ちの間に他のスレッド/プロセスが取得し直していればそれを使う
+            entry = self._read()
+            if entry is not None and (
+                entry.get("fetched_at", 0) >= requested or self._is_fresh(entry, max_age)
+            ):
+                return entry["records"]
+
+            headers: Dict[str, str] = {}
+            if entry is not None:
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+
+            result = fetcher(headers)
+            if result is None and entry is not None:
+                # 304 Not Modified: 内容はそのまま鮮度だけ更新
+                entry["fetched_at"] = time.time()
+            elif result is None:
+                raise RuntimeError("Metadata source returned 304 without a cached copy")
+            else:
+                records, etag, last_modified = result
+                entry = {
+                    "fetched_at": time.time(),
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "records": records,
+                }
+            self._write(entry)
+            return entry["records"]
+
+    def invalidate(self) -> None:
+        """キャッシュを破棄する（次回は無条件に取得）"""
+        with self._lock:
+            self.path.unlink(missing_ok=True)
+            self._memo, self._memo_key = None, None
+
+
+__all__ = ["MetadataCache", "DEFAULT_TTL"]
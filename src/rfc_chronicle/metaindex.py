@@ -0,0 +1,441 @@
+"""
+プロセス常駐のメタデータ検索インデックス
+- 対象フィールドは title / abstract / authors / status / number
+- 単語の転置インデックスと、部分一致用の 3-gram インデックスを持つ
+  （ポスティングは RFC 番号の昇順 uint32 配列で、複数キーは短い順に積集合を取る）
+- metadata.json の隣（metadata.idx）に保存し、プロセス起動時は読み込むだけで済ませる
+- metadata.json の mtime / サイズが変わったときだけ読み直し、
+  内容が変わった RFC のポスティングだけを差分更新して保存し直す
+- 番号・年月・ステータスは列指向の型付き配列でも持ち、
+  ステータス・期間の絞り込み、並べ替え、ファセット件数をベクトル演算で求める
+"""
+import calendar
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+SEARCH_FIELDS = ("title", "abstract", "authors", "status", "number")
+
+_EMPTY = np.zeros(0, dtype=np.uint32)
+_TERM_RE = re.compile(r"\w+")
+_KEY_SEP = "\x00"  # 保存時のキー区切り（本文には現れない）
+
+Postings = Dict[str, np.ndarray]
+
+SORT_KEYS = ("number", "-number", "date", "-date")
+# "April 1969" / "Apr 1969" → 4
+_MONTHS = {name.lower()[:3]: i for i, name in enumerate(calendar.month_name) if name}
+_DATE_RE = re.compile(r"(?:([A-Za-z]+)\.?\s+)?(\d{4})")
+_YM_RE = re.compile(r"^(\d{4})(?:-(\d{1,2}))?$")
+
+
+def _entry_number(entry: Dict[str, Any]) -> str:
+    """number フィールドの数字部分（"RFC 0001" → "0001"）"""
+    m = re.search(r"(\d+)", entry.get("number", ""))
+    return m.group(1) if m else ""
+
+
+def _search_text(entry: Dict[str, Any]) -> str:
+    """検索対象フィールドを小文字化して改行で連結した文字列"""
+    parts = []
+    for field in SEARCH_FIELDS:
+        value = entry.get(field, "")
+        if isinstance(value, list):
+            value = ", ".join(str(v) for v in value)
+        parts.append(str(value or ""))
+    return "\n".join(parts).lower()
+
+
+def _parse_date(value: str) -> Tuple[int, int]:
+    """メタデータの date（"April 1969"）を (年, 月) にする（不明な部分は 0）"""
+    m = _DATE_RE.search(value or "")
+    if not m:
+        return 0, 0
+    month = _MONTHS.get((m.group(1) or "").lower()[:3], 0)
+    return int(m.group(2)), month
+
+
+def _parse_ym(value: str, end: bool) -> int:
+    """"2015" / "2015-06" を年 * 100 + 月 にする（月省略時は end なら 12 月、そうでなければ 0）"""
+    m = _YM_RE.match(value.strip())
+    if not m or (m.group(2) and not 1 <= int(m.group(2)) <= 12):
+        raise ValueError(f"Invalid date {value!r} (expected YYYY or YYYY-MM)")
+    month = int(m.group(2)) if m.group(2) else (12 if end else 0)
+    return int(m.group(1)) * 100 + month
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _terms(text: str) -> Set[str]:
+    return set(_TERM_RE.findall(text))
+
+
+def _invert(docs: Dict[int, str], tokenize: Callable[[str], Set[str]]) -> Postings:
+    """{RFC番号: 文字列} からポスティングを作る"""
+    lists: Dict[str, List[int]] = defaultdict(list)
+    for doc_id in sorted(docs):
+        for key in tokenize(docs[doc_id]):
+            lists[key].append(doc_id)
+    return {key: np.array(ids, dtype=np.uint32) for key, ids in lists.items()}
+
+
+def _update(
+    postings: Postings,
+    tokenize: Callable[[str], Set[str]],
+    removed: Dict[int, str],
+    added: Dict[int, str],
+) -> None:
+    """removed の旧文字列のキーから外し、added の新文字列のキーへ加える"""
+    rm: Dict[str, List[int]] = defaultdict(list)
+    ad: Dict[str, List[int]] = defaultdict(list)
+    for doc_id, text in removed.items():
+        for key in tokenize(text):
+            rm[key].append(doc_id)
+    for doc_id, text in added.items():
+        for key in tokenize(text):
+            ad[key].append(doc_id)
+    for key in rm.keys() | ad.keys():
+        arr = postings.get(key, _EMPTY)
+        if key in rm:
+            arr = np.setdiff1d(arr, np.array(rm[key], dtype=np.uint32), assume_unique=True)
+        if key in ad:
+            arr = np.union1d(arr, np.array(ad[key], dtype=np.uint32))
+        if len(arr):
+            postings[key] = arr
+        else:
+            postings.pop(key, None)
+
+
+def _intersect(arrays: Iterable[np.ndarray]) -> np.ndarray:
+    """昇順配列の積集合（短い配列から順に絞り込む）"""
+    ordered = sorted(arrays, key=len)
+    if not ordered:
+        return _EMPTY
+    result = ordered[0]
+    for arr in ordered[1:]:
+        if not len(result):
+            break
+        result = np.intersect1d(result, arr, assume_unique=True)
+    return result
+
+
+def _pack_postings(postings: Postings) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    keys = sorted(postings)
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum([len(postings[k]) for k in keys], out=offsets[1:])
+    flat = np.concatenate([postings[k] for k in keys]) if keys else _EMPTY
+    blob = np.frombuffer(_KEY_SEP.join(keys).encode("utf-8"), dtype=np.uint8)
+    return blob, offsets, flat.astype(np.uint32)
+
+
+def _unpack_postings(blob: np.ndarray, offsets: np.ndarray, flat: np.ndarray) -> Postings:
+    if len(offsets) <= 1:
+        return {}
+    keys = blob.tobytes().decode("utf-8").split(_KEY_SEP)
+    return {key: flat[offsets[i]:offsets[i + 1]] for i, key in enumerate(keys)}
+
+
+class MetadataColumns:
+    """
+    番号・年月・ステータスの列指向ストア（行は RFC 番号の昇順）。
+    ステータスは語彙リストへのコードで持ち、並べ替え順は構築時に求めておく。
+    """
+
+    def __init__(self, entries: Dict[int, Dict[str, Any]]) -> None:
+        ids = sorted(entries)
+        n = len(ids)
+        self.ids = np.array(ids, dtype=np.uint32)
+        self.year = np.zeros(n, dtype=np.int16)
+        self.month = np.zeros(n, dtype=np.int8)
+        self.statuses: List[str] = sorted({entries[i].get("status") or "" for i in ids})
+        codes = {name: code for code, name in enumerate(self.statuses)}
+        self.status = np.zeros(n, dtype=np.uint16)
+        self.labels: List[str] = []
+        self.titles: List[str] = []
+        self.dates: List[str] = []
+        for row, doc_id in enumerate(ids):
+            entry = entries[doc_id]
+            self.labels.append(_entry_number(entry))
+            self.year[row], self.month[row] = _parse_date(entry.get("date", ""))
+            self.status[row] = codes[entry.get("status") or ""]
+            self.titles.append(entry.get("title", ""))
+            self.dates.append(entry.get("date", ""))
+        self.ym = self.year.astype(np.int32) * 100 + self.month
+        self.orders = {
+            "number": np.arange(n),
+            "date": np.lexsort((self.ids, self.ym)),
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def status_codes(self, names: Iterable[str]) -> np.ndarray:
+        """ステータス名（大文字小文字は区別しない）をコードにする"""
+        wanted = {n.strip().lower() for n in names}
+        return np.array(
+            [code for code, name in enumerate(self.statuses) if name.lower() in wanted],
+            dtype=np.uint16,
+        )
+
+
+class MetadataIndex:
+    """metadata.json の検索用インデックス（スレッドセーフ）"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.index_path = path.with_suffix(INDEX_SUFFIX)
+        self._lock = threading.Lock()
+        self._stat_key: Optional[Tuple[int, int]] = None
+        self._digest: Optional[str] = None
+        # 検索中に差し替わっても整合するよう、まとめて 1 つのタプルで保持
+        # (texts, labels, 列ストア, 3-gram ポスティング, 単語ポスティング)
+        self._state: Tuple[Dict[int, str], Dict[int, str], MetadataColumns, Postings, Postings] = (
+            {}, {}, MetadataColumns({}), {}, {}
+        )
+        # 直近の読み込み方法（"loaded" / "incremental" / "full"）と更新件数
+        self.last_refresh: Dict[str, Any] = {}
+
+    # ------------------------------------------------------------ persistence
+    def _load_persisted(self) -> Optional[Dict[str, Any]]:
+        try:
+            with np.load(self.index_path, allow_pickle=False) as data:
+                if int(data["version"]) != INDEX_VERSION:
+                    return None
+                ids = data["ids"]
+                texts = data["texts"].tobytes().decode("utf-8").split(_KEY_SEP)
+                labels = data["labels"].tobytes().decode("utf-8").split(_KEY_SEP)
+                return {
+                    "digest": data["digest"].tobytes().decode("ascii"),
+                    "texts": dict(zip(ids.tolist(), texts)),
+                    "labels": dict(zip(ids.tolist(), labels)),
+                    "trigrams": _unpack_postings(data["tri_keys"], data["tri_offsets"], data["tri_postings"]),
+                    "terms": _unpack_postings(data["term_keys"], data["term_offsets"], data["term_postings"]),
+                }
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _save(self) -> None:
+        texts, labels, _, trigrams, terms = self._state
+        ids = sorted(texts)
+        tri = _pack_postings(trigrams)
+        term = _pack_postings(terms)
+
+        def _blob(values: List[str]) -> np.ndarray:
+            return np.frombuffer(_KEY_SEP.join(values).encode("utf-8"), dtype=np.uint8)
+
+        tmp = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with tmp.open("wb") as f:
+                np.savez(
+                    f,
+                    version=np.array(INDEX_VERSION),
+                    digest=np.frombuffer(self._digest.encode("ascii"), dtype=np.uint8),
+                    ids=np.array(ids, dtype=np.uint32),
+                    texts=_blob([texts[i] for i in ids]),
+                    labels=_blob([labels[i] for i in ids]),
+                    tri_keys=tri[0], tri_offsets=tri[1], tri_postings=tri[2],
+                    term_keys=term[0], term_offsets=term[1], term_postings=term[2],
+                )
+            os.replace(tmp, self.index_path)
+        except OSError:
+            tmp.unlink(missing_ok=True)  # 書き込めない環境ではメモリ上のインデックスだけ使う
+
+    # ------------------------------------------------------------ build
+    def _rebuild(self, data: bytes, digest: str) -> None:
+        texts: Dict[int, str] = {}
+        labels: Dict[int, str] = {}
+        entries: Dict[int, Dict[str, Any]] = {}
+        for entry in json.loads(data.decode("utf-8")):
+            label = _entry_number(entry)
+            if label:
+                texts[int(label)] = _search_text(entry)
+                labels[int(label)] = label
+                entries[int(label)] = entry
+
+        persisted = self._load_persisted() if self._digest is None else None
+        if persisted is not None and persisted["digest"] == digest:
+            # 保存済みインデックスがそのまま使える
+            tri, term = persisted["trigrams"], persisted["terms"]
+            self.last_refresh = {"mode": "loaded", "updated": 0}
+        elif persisted is None and self._digest is None:
+            tri, term = _invert(texts, _trigrams), _invert(texts, _terms)
+            self.last_refresh = {"mode": "full", "updated": len(texts)}
+        else:
+            # 内容が変わった RFC だけポスティングを差し替える
+            if persisted is not None:
+                old, tri, term = persisted["texts"], persisted["trigrams"], persisted["terms"]
+            else:
+                old, _, _, tri, term = self._state
+            removed = {i: t for i, t in old.items() if texts.get(i) != t}
+            added = {i: t for i, t in texts.items() if old.get(i) != t}
+            tri, term = dict(tri), dict(term)
+            _update(tri, _trigrams, removed, added)
+            _update(term, _terms, removed, added)
+            self.last_refresh = {"mode": "incremental", "updated": len(removed.keys() | added.keys())}
+
+        self._state = (texts, labels, MetadataColumns(entries), tri, term)
+        self._digest = digest
+        if self.last_refresh["mode"] != "loaded":
+            self._save()
+
+    def refresh(self) -> None:
+        """metadata.json が更新されていれば読み直す"""
+        st = self.path.stat()
+        key = (st.st_mtime_ns, st.st_size)
+        if key == self._stat_key:
+            return
+        with self._lock:
+            if key == self._stat_key:
+                return
+            data = self.path.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            if digest != self._digest:
+                self._rebuild(data, digest)
+            self._stat_key = key
+
+    @property
+    def digest(self) -> Optional[str]:
+        """読み込み済み metadata.json の sha256"""
+        self.refresh()
+        return self._digest
+
+    @property
+    def columns(self) -> MetadataColumns:
+        """列指向ストア（読み込み済みの最新のもの）"""
+        self.refresh()
+        return self._state[2]
+
+    def vocabulary(self) -> Dict[str, int]:
+        """単語 → その単語を含む RFC 数"""
+        self.refresh()
+        return {term: len(ids) for term, ids in self._state[4].items()}
+
+    # ------------------------------------------------------------ query
+    @staticmethod
+    def _match(state, keyword: str, whole_word: bool) -> np.ndarray:
+        """キーワードにマッチする RFC 番号の昇順配列"""
+        texts, _, columns, trigrams, terms = state
+        kw = keyword.lower()
+
+        if whole_word:
+            words = _terms(kw)
+            if not words:
+                return _EMPTY
+            return _intersect(terms.get(w, _EMPTY) for w in words)
+
+        if len(kw) < 3:
+            candidates = columns.ids  # 3-gram が作れない短い語は全件を確認
+        else:
+            candidates = _intersect(trigrams.get(g, _EMPTY) for g in _trigrams(kw))
+        return np.array([i for i in candidates.tolist() if kw in texts[i]], dtype=np.uint32)
+
+    def search(self, keyword: str, whole_word: bool = False) -> List[str]:
+        """
+        キーワードにマッチする RFC 番号を番号順に返す（大文字小文字は区別しない）。
+        既定は部分一致（3-gram で候補を絞ってから文字列で確認）。
+        whole_word=True では単語単位で照合し、複数語はすべてを含むものを返す。
+        """
+        self.refresh()
+        state = self._state
+        labels = state[1]
+        return [labels[i] for i in self._match(state, keyword, whole_word).tolist()]
+
+    def query(
+        self,
+        keyword: str = "",
+        statuses: Optional[Iterable[str]] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        sort: str = "number",
+        limit: Optional[int] = None,
+        whole_word: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        キーワード・ステータス・期間（"YYYY" / "YYYY-MM"）で絞り込み、sort 順に最大 limit 件返す。
+        ファセット件数は同じ走査で求め、各ファセットには自分以外の条件だけを適用する
+        （ステータス別件数は期間とキーワードで絞った件数）。
+        戻り値は {"total", "results": [{number, title, status, date}], "facets": {"status", "year"}}。
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key {sort!r} (choose from {', '.join(SORT_KEYS)})")
+        lo = _parse_ym(date_from, end=False) if date_from else None
+        hi = _parse_ym(date_to, end=True) if date_to else None
+
+        self.refresh()
+        state = self._state
+        columns = state[2]
+        n = len(columns)
+
+        # --- 1. 条件ごとのマスク ---
+        if keyword:
+            kw_mask = np.zeros(n, dtype=bool)
+            kw_mask[np.searchsorted(columns.ids, self._match(state, keyword, whole_word))] = True
+        else:
+            kw_mask = np.ones(n, dtype=bool)
+        status_mask = np.ones(n, dtype=bool)
+        statuses = [s for s in (statuses or []) if s]
+        if statuses:
+            status_mask = np.isin(columns.status, columns.status_codes(statuses))
+        date_mask = np.ones(n, dtype=bool)
+        if lo is not None:
+            date_mask &= columns.ym >= lo
+        if hi is not None:
+            date_mask &= columns.ym <= hi
+
+        # --- 2. ファセット件数 ---
+        status_counts = np.bincount(columns.status[kw_mask & date_mask], minlength=len(columns.statuses))
+        years, year_counts = np.unique(columns.year[kw_mask & status_mask], return_counts=True)
+        facets = {
+            "status": {
+                name or "Unknown": int(c) for name, c in zip(columns.statuses, status_counts) if c
+            },
+            "year": {str(y): int(c) for y, c in zip(years.tolist(), year_counts.tolist()) if y},
+        }
+
+        # --- 3. 並べ替え & 件数制限 ---
+        final = kw_mask & status_mask & date_mask
+        order = columns.orders[sort.lstrip("-")]
+        if sort.startswith("-"):
+            order = order[::-1]
+        rows = order[final[order]]
+        total = len(rows)
+        if limit is not None:
+            rows = rows[:max(0, limit)]
+        results = [
+            {
+                "number": columns.labels[r],
+                "title": columns.titles[r],
+                "status": columns.statuses[columns.status[r]],
+                "date": columns.dates[r],
+            }
+            for r in rows.tolist()
+        ]
+        return {"total": total, "results": results, "facets": facets}
+
+
+# ファイルごとの共有インスタンス
+_INDEXES: Dict[Path, MetadataIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_metadata_index(path: Path) -> MetadataIndex:
+    """path に対応する共有 MetadataIndex を返す"""
+    key = Path(path).resolve()
+    with _INDEXES_LOCK:
+        if key not in _INDEXES:
+            _INDEXES[key] = MetadataIndex(Path(path))
+        return _INDEXES[key]
+
+
+__all__ = ["MetadataIndex", "MetadataColumns", "get_metadata_index", "SEARCH_FIELDS", "SORT_KEYS"]
@@ -0,0 +1,249 @@
+"""
+パース済み RFC 文書のキャッシュ
+- clean_rfc_text / parse_rfc_header の結果を RFC ごとに 1 ファイルへ保存
+- 先頭行がメタ情報の JSON（元テキストの sha256・ヘッダ・節インデックス）、2 行目以降がクリーン済み本文
+- 節インデックスは節番号 → 本文内のバイト範囲で、1 節だけを seek して読み出せる
+- 元テキストのハッシュが変わると自動的に無効になる
+- FTS / 埋め込みの各ビルダーもここを経由してクリーン済み本文を読む
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from rfc_chronicle.docstore import DocStore, open_store
+from rfc_chronicle.manifest import DownloadManifest, MANIFEST_NAME
+from rfc_chronicle.utils import clean_rfc_text, parse_rfc_header
+
+PARSED_DIRNAME = "parsed"
+
+# 行頭から始まる節見出し（"4.2.  Title" / "4.2 Title" / "A.1.  Title" / "Appendix A.  Title"）
+# 本文の "10 Mbps ..." や "A sample ..." を拾わないよう、単一要素の番号には末尾のピリオドを必須にする
+_SECTION_RE = re.compile(
+    r"^(?:Appendix\s+([A-Z])\b\.?|((?:\d{1,2}|[A-Z])(?:\.\d{1,3})+)\.?|(\d{1,2}|[A-Z])\.)"
+    r"(?:\s*[-:]?\s+(\S.*))?\s*$"
+)
+# 目次の行（"1. Introduction ........ 3"）
+_TOC_RE = re.compile(r"\.{3,}\s*\d+$|\.\s\.\s\.")
+
+
+def parsed_dir(text_dir: Path) -> Path:
+    """texts ディレクトリに対応するキャッシュディレクトリ（data/parsed）"""
+    return text_dir.parent / PARSED_DIRNAME
+
+
+def _entry_path(cache_dir: Path, num: int) -> Path:
+    return cache_dir / f"{num}.parsed"
+
+
+def parse_document(raw: str) -> Tuple[Dict[str, str], str]:
+    """生テキストをクリーンしてヘッダと本文に分ける"""
+    return parse_rfc_header(clean_rfc_text(raw))
+
+
+def index_sections(body: str) -> List[Dict[str, Any]]:
+    """
+    本文中の節見出しを探し、[{"id", "title", "start", "end"}, ...] を返す。
+    start / end は UTF-8 本文内のバイト位置で、範囲には下位の節（4 なら 4.1, 4.2 …）も含む。
+    同じ節番号が複数回現れた場合は後の見出しを採用する（前にあるのは目次）。
+    """
+    found: Dict[str, Tuple[int, str]] = {}
+    offset = 0
+    for line in body.split("\n"):
+        m = _SECTION_RE.match(line)
+        if m and not _TOC_RE.search(line):
+            appendix, dotted, single, title = m.groups()
+            if appendix or title:
+                found[appendix or dotted or single] = (offset, (title or "").strip())
+        offset += len(line.encode("utf-8")) + 1
+    total = len(body.encode("utf-8"))
+
+    entries = sorted(found.items(), key=lambda kv: kv[1][0])
+    sections = []
+    for i, (sid, (start, title)) in enumerate(entries):
+        end = total
+        for other, (other_start, _) in entries[i + 1:]:
+            if not other.startswith(sid + "."):
+                end = other_start
+                break
+        sections.append({"id": sid, "title": title, "start": start, "end": end})
+    return sections
+
+
+def _read_meta(f: BinaryIO) -> Optional[Dict[str, Any]]:
+    """エントリ先頭のメタ情報を読む（節インデックスの無い旧形式は None）"""
+    meta = json.loads(f.readline())
+    return meta if "sections" in meta else None
+
+
+def cached_sha256(cache_dir: Path, num: int) -> Optional[str]:
+    """キャッシュ済みエントリの元テキスト sha256（先頭行だけ読む）"""
+    try:
+        with _entry_path(cache_dir, num).open("rb") as f:
+            meta = _read_meta(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return meta["sha256"] if meta else None
+
+
+def source_sha256(store: DocStore, manifest: DownloadManifest, num: int) -> Tuple[str, Optional[bytes]]:
+    """
+    元テキストの sha256 を返す。マニフェストの記録とサイズ・更新時刻が一致すれば本文は読まずに済む。
+    一致しなければ読んでハッシュし、記録の更新時刻を付け直す（次回からはまた読まずに済む）。
+    戻り値は (sha256, 読んだ場合は生バイト列)。
+    """
+    version = store.version(num)
+    if version is not None and manifest.is_current(num, *version):
+        return manifest.get(num)["sha256"], None
+    raw = store.get_bytes(num)
+    if raw is None:
+        raise FileNotFoundError(f"RFC {num} text not found in {store.text_dir}")
+    digest = hashlib.sha256(raw).hexdigest()
+    if version is not None:
+        manifest.restamp(num, len(raw), digest, version[1])
+    return digest, raw
+
+
+def load_parsed(cache_dir: Path, num: int, sha256: str) -> Optional[Tuple[Dict[str, str], str]]:
+    """sha256 が一致するキャッシュがあれば (header, body) を返す"""
+    try:
+        with _entry_path(cache_dir, num).open("rb") as f:
+            meta = _read_meta(f)
+            if meta is None or meta.get("sha256") != sha256:
+                return None
+            body = f.read().decode("utf-8")
+    except (FileNotFoundError, ValueError):
+        return None
+    return meta["header"], body
+
+
+def load_sections(cache_dir: Path, num: int, sha256: str) -> Optional[List[Dict[str, Any]]]:
+    """sha256 が一致するキャッシュがあれば節インデックスを返す（本文は読まない）"""
+    try:
+        with _entry_path(cache_dir, num).open("rb") as f:
+            meta = _read_meta(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if meta is None or meta.get("sha256") != sha256:
+        return None
+    return meta["sections"]
+
+
+def read_section(
+    cache_dir: Path, num: int, sha256: str, section_id: str
+) -> Optional[Tuple[Dict[str, Any], str]]:
+    """
+    1 節分のバイト範囲だけを読み出して (節インデックスのエントリ, 本文) を返す。
+    キャッシュが無効なら None、節が存在しなければ KeyError。
+    """
+    try:
+        with _entry_path(cache_dir, num).open("rb") as f:
+            meta = _read_meta(f)
+            if meta is None or meta.get("sha256") != sha256:
+                return None
+            body_start = f.tell()
+            key = section_id.strip().rstrip(".")
+            entry = next((s for s in meta["sections"] if s["id"] == key), None)
+            if entry is None:
+                raise KeyError(f"RFC {num} has no section {section_id}")
+            f.seek(body_start + entry["start"])
+            text = f.read(entry["end"] - entry["start"]).decode("utf-8")
+    except (FileNotFoundError, ValueError):
+        return None
+    return entry, text.rstrip("\n")
+
+
+def save_parsed(
+    cache_dir: Path,
+    num: int,
+    sha256: str,
+    header: Dict[str, str],
+    body: str,
+) -> None:
+    """パース結果を保存する（一時ファイル経由で原子的に置き換え）"""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    meta = {"sha256": sha256, "header": header, "sections": index_sections(body)}
+    line = json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    path = _entry_path(cache_dir, num)
+    tmp = path.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")
+    with tmp.open("wb") as f:
+        f.write(line + b"\n")
+        f.write(body.encode("utf-8"))
+    os.replace(tmp, path)
+
+
+def get_parsed(
+    store: DocStore,
+    manifest: DownloadManifest,
+    cache_dir: Path,
+    num: int,
+) -> Tuple[Dict[str, str], str]:
+    """キャッシュが有効ならそれを、無効ならパースして保存した (header, body) を返す"""
+    digest, raw = source_sha256(store, manifest, num)
+    cached = load_parsed(cache_dir, num, digest)
+    if cached is not None:
+        return cached
+    if raw is None:
+        raw = store.get_bytes(num)
+    header, body = parse_document(raw.decode("utf-8"))
+    save_parsed(cache_dir, num, digest, header, body)
+    return header, body
+
+
+def get_section(
+    store: DocStore,
+    manifest: DownloadManifest,
+    cache_dir: Path,
+    num: int,
+    section_id: str,
+) -> Tuple[Dict[str, Any], str]:
+    """1 節分を返す。キャッシュが無効ならパースし直してから読む"""
+    digest, _ = source_sha256(store, manifest, num)
+    result = read_section(cache_dir, num, digest, section_id)
+    if result is None:
+        get_parsed(store, manifest, cache_dir, num)
+        result = read_section(cache_dir, num, digest, section_id)
+    return result
+
+
+def get_sections(
+    store: DocStore,
+    manifest: DownloadManifest,
+    cache_dir: Path,
+    num: int,
+) -> List[Dict[str, Any]]:
+    """節インデックスを返す。キャッシュが無効ならパースし直す"""
+    digest, _ = source_sha256(store, manifest, num)
+    sections = load_sections(cache_dir, num, digest)
+    if sections is None:
+        get_parsed(store, manifest, cache_dir, num)
+        sections = load_sections(cache_dir, num, digest)
+    return sections
+
+
+def iter_parsed(
+    text_dir: Path, numbers: Optional[Iterable[int]] = None
+) -> Iterator[Tuple[int, Dict[str, str], str]]:
+    """
+    コーパス全体の (RFC番号, header, body) を番号順に返す。
+    numbers を渡すと、そのうち本文がある RFC だけを返す
+    """
+    store = open_store(text_dir)
+    manifest = DownloadManifest(text_dir / MANIFEST_NAME)
+    cache_dir = parsed_dir(text_dir)
+    wanted = None if numbers is None else {int(n) for n in numbers}
+    for num in store.numbers():
+        if wanted is not None and num not in wanted:
+            continue
+        header, body = get_parsed(store, manifest, cache_dir, num)
+        yield num, header, body
+
+
+__all__ = [
+    "parsed_dir", "parse_document", "load_parsed", "save_parsed",
+    "cached_sha256", "source_sha256", "get_parsed", "iter_parsed", "PARSED_DIRNAME",
+    "index_sections", "load_sections", "read_section", "get_section", "get_sections",
+]
@@ -0,0 +1,71 @@
+"""
+増分同期で追加・変更された RFC の未処理キュー
+- sync_metadata のたびに added / changed を利用者（本文の取得・全文検索・埋め込み）ごとの
+  未処理集合に足し込む。304 や差分なしの同期でも前回までの分は消えない
+- 利用者は処理し終えた番号だけを done() で消す（失敗した番号は次回に持ち越す）
+- 読み書きはファイルロックで直列化し、書き込みは一時ファイル + os.replace で行う
+"""
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from rfc_chronicle.metacache import _file_lock
+
+# 未処理集合を持つ利用者（本文の取得・全文検索・埋め込み）
+CONSUMERS = ("texts", "fulltext", "embeddings")
+
+
+class PendingQueue:
+    """利用者ごとの未処理 RFC 番号の集合（JSON ファイルに保存）"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock_path = path.with_suffix(".lock")
+
+    def _read(self) -> Dict[str, List[int]]:
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return {c: data.get(c, []) for c in CONSUMERS}
+
+    def _write(self, data: Dict[str, List[int]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def add(self, numbers: Iterable[int]) -> None:
+        """全利用者の未処理集合に numbers を足す"""
+        new = {int(n) for n in numbers}
+        if not new:
+            return
+        with _file_lock(self._lock_path):
+            data = self._read()
+            self._write({c: sorted(set(data.get(c, [])) | new) for c in CONSUMERS})
+
+    def pending(self, consumer: str) -> List[int]:
+        """consumer がまだ処理していない番号（昇順）"""
+        if consumer not in CONSUMERS:
+            raise ValueError(f"Unknown consumer: {consumer!r}")
+        return self._read().get(consumer, [])
+
+    def done(self, consumer: str, numbers: Iterable[int]) -> None:
+        """consumer が処理し終えた numbers を未処理集合から消す"""
+        if consumer not in CONSUMERS:
+            raise ValueError(f"Unknown consumer: {consumer!r}")
+        handled = {int(n) for n in numbers}
+        if not handled:
+            return
+        with _file_lock(self._lock_path):
+            data = self._read()
+            remaining = [n for n in data.get(consumer, []) if n not in handled]
+            if len(remaining) != len(data.get(consumer, [])):
+                data[consumer] = remaining
+                self._write(data)
+
+
+__all__ = ["PendingQueue", "CONSUMERS"]
@@ -0,0 +1,123 @@
+"""
+コーパス全体の前処理（clean_rfc_text / parse_rfc_header）
+- プロセスプールでチャンク単位に並列実行し、結果をパース済みキャッシュ（data/parsed）へ書き出す
+- ワーカーへ渡すのは RFC 番号だけで、本文は各ワーカーがストアから直接読む
+- 投入中のチャンク数を制限し、コーパスの大きさに関わらずメモリ使用量を一定に保つ
+- FTS / 埋め込みのビルダーはこのキャッシュのクリーン済み本文をそのまま読む
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from tqdm.auto import tqdm
+
+from rfc_chronicle.docstore import DocStore, open_store
+from rfc_chronicle.manifest import DownloadManifest, MANIFEST_NAME, compact_manifest
+from rfc_chronicle.parsed import (
+    cached_sha256,
+    parse_document,
+    parsed_dir,
+    save_parsed,
+    source_sha256,
+)
+
+DEFAULT_CHUNK_SIZE = 64
+
+# ワーカープロセスごとの状態（initializer で 1 回だけ作る）
+_worker_store: Optional[DocStore] = None
+_worker_manifest: Optional[DownloadManifest] = None
+_worker_cache_dir: Optional[Path] = None
+
+
+def _init_worker(text_dir: str) -> None:
+    global _worker_store, _worker_manifest, _worker_cache_dir
+    path = Path(text_dir)
+    _worker_store = open_store(path)
+    _worker_manifest = DownloadManifest(path / MANIFEST_NAME)
+    _worker_cache_dir = parsed_dir(path)
+
+
+def _process_chunk(nums: List[int], force: bool) -> Tuple[int, int, int, int]:
+    """1 チャンク分を処理して (parsed, skipped, failed, 元バイト数) を返す"""
+    parsed = skipped = failed = nbytes = 0
+    for num in nums:
+        try:
+            digest, raw = source_sha256(_worker_store, _worker_manifest, num)
+            if not force and cached_sha256(_worker_cache_dir, num) == digest:
+                skipped += 1
+                continue
+            if raw is None:
+                raw = _worker_store.get_bytes(num)
+            header, body = parse_document(raw.decode("utf-8"))
+            save_parsed(_worker_cache_dir, num, digest, header, body)
+            parsed += 1
+            nbytes += len(raw)
+        except Exception:  # 1件の失敗で全体を止めない
+            failed += 1
+    return parsed, skipped, failed, nbytes
+
+
+def _chunks(nums: List[int], size: int) -> Iterator[List[int]]:
+    for i in range(0, len(nums), size):
+        yield nums[i:i + size]
+
+
+def preprocess_corpus(
+    text_dir: Path,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    force: bool = False,
+) -> Dict[str, float]:
+    """
+    text_dir の全文書をパースしてキャッシュへ書き出す。
+    キャッシュが元テキストと一致する文書は force=True でない限りスキップする。
+    戻り値は {"documents", "parsed", "skipped", "failed", "bytes", "seconds", "docs_per_sec"}。
+    """
+    workers = workers or os.cpu_count() or 1
+    nums = open_store(text_dir).numbers()
+    stats: Dict[str, float] = {"documents": len(nums), "parsed": 0, "skipped": 0, "failed": 0, "bytes": 0}
+    # 未完了のチャンクはワーカー数の 2 倍まで
+    max_pending = workers * 2
+
+    started = time.perf_counter()
+    with tqdm(total=len(nums), desc="Preprocessing RFC texts", unit="doc", dynamic_ncols=True) as bar, \
+            ProcessPoolExecutor(
+                max_workers=workers,
+                # スレッドを持つ親プロセスを fork しないよう spawn で起動
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(str(text_dir),),
+            ) as pool:
+        pending = set()
+
+        def _collect(done) -> None:
+            for fut in done:
+                parsed, skipped, failed, nbytes = fut.result()
+                stats["parsed"] += parsed
+                stats["skipped"] += skipped
+                stats["failed"] += failed
+                stats["bytes"] += nbytes
+                bar.update(parsed + skipped + failed)
+            elapsed = time.perf_counter() - started
+            bar.set_postfix(docs_s=f"{bar.n / elapsed:.0f}" if elapsed else "-", failed=stats["failed"])
+
+        for chunk in _chunks(nums, max(1, chunk_size)):
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                _collect(done)
+            pending.add(pool.submit(_process_chunk, chunk, force))
+        done, _ = wait(pending)
+        _collect(done)
+    # ワーカーが終わってから、各ワーカーが付け直した記録の古い行をまとめて消す
+    compact_manifest(text_dir / MANIFEST_NAME)
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = elapsed
+    stats["docs_per_sec"] = len(nums) / elapsed if elapsed else 0.0
+    return stats
+
+
+__all__ = ["preprocess_corpus", "DEFAULT_CHUNK_SIZE"]
@@ -1,16 +1,18 @@
 import os
 import json
-import re
+import threading
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-import torch
-import faiss
-from sentence_transformers import SentenceTransformer
+from . import utils
+from .embedcache import EmbeddingCache, default_disk_path, model_key
+from .fulltext import DB_PATH as FTS_DB_PATH
+from .fuzzy import get_corrector
+from .metaindex import get_metadata_index
+from .suggest import get_suggester
 
 # --- データディレクトリとファイルパスの定義 ---
 BASE_DIR    = Path.cwd() / "data"
-META_PATH   = BASE_DIR / "metadata.json"
 INDEX_PATH  = BASE_DIR / "faiss_index.bin"
 DOCMAP_PATH = BASE_DIR / "docmap.json"
 
@@ -18,75 +20,201 @@ DOCMAP_PATH = BASE_DIR / "docmap.json"
 # 環境変数 RFC_EMBED_MODEL が設定されていればそちらを使い、未設定時は MPNet をデフォルトに
 DEFAULT_MODEL = os.getenv("RFC_EMBED_MODEL", "all-mpnet-base-v2")
 
-# --- デバイス判定 ---
-if torch.cuda.is_available():
-    DEVICE = "cuda"
-elif torch.backends.mps.is_available():
-    DEVICE = "mps"
-else:
-    DEVICE = "cpu"
 
-# --- モデルとインデックスをモジュールロード時に一度だけ初期化 ---
-_MODEL = SentenceTransformer(DEFAULT_MODEL, device=DEVICE)
-_INDEX = faiss.read_index(str(INDEX_PATH)) if INDEX_PATH.exists() else None
+def _meta_path() -> Path:
+    """fetch / sync が書き込む metadata.json（utils.META_FILE）。呼び出し時に参照する"""
+    return utils.META_FILE
+
+
+def detect_device() -> str:
+    """埋め込みモデルを載せるデバイス（torch はここで初めて import する）"""
+    import torch
+
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def _file_key(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class SemanticIndex:
+    """
+    セマンティック検索用のモデル・FAISS インデックス・docmap をまとめて持つ。
+    - どれも最初の検索で読み込む（torch / sentence_transformers / faiss の import もそのとき）
+    - 複数スレッドから同時に呼ばれても読み込みは 1 回だけ
+    - インデックス・docmap のファイルが更新されたら次の検索で読み直す（モデルはそのまま）
+    - クエリ埋め込みは EmbeddingCache に残す（cache_path を渡せばディスクにも）
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        index_path: Path,
+        docmap_path: Path,
+        cache_path: Optional[Path] = None,
+    ) -> None:
+        self.model_name = model_name
+        self.index_path = index_path
+        self.docmap_path = docmap_path
+        self.cache = EmbeddingCache(model_key(model_name), self._encode, cache_path)
+        self._lock = threading.Lock()
+        self._model = None
+        self._index = None
+        self._docmap: Dict[str, str] = {}
+        self._key: Optional[Tuple[Any, ...]] = None
+
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    self._model = SentenceTransformer(self.model_name, device=detect_device())
+        return self._model
+
+    def index(self) -> Tuple[Any, Dict[str, str]]:
+        """(FAISS インデックス, docmap) を返す。まだ作られていなければ RuntimeError"""
+        key = (_file_key(self.index_path), _file_key(self.docmap_path))
+        if key != self._key:
+            with self._lock:
+                if key != self._key:
+                    if None in key:
+                        raise RuntimeError("FAISS index or docmap not found. Please build index first.")
+                    import faiss
+
+                    index = faiss.read_index(str(self.index_path))
+                    docmap = json.loads(self.docmap_path.read_text(encoding="utf-8"))
+                    self._index, self._docmap, self._key = index, docmap, key
+        return self._index, self._docmap
+
+    def _encode(self, query: str):
+        # クエリ埋め込みを生成（バッチサイズ=1）。キャッシュに無いときだけ呼ばれる
+        return self.model().encode([query], convert_to_numpy=True)
+
+    def search(self, query: str, topk: int = 10) -> List[Tuple[float, str]]:
+        index, docmap = self.index()
+        q_vec = self.cache.embed(query)
+        # 次元チェック
+        if q_vec.shape[1] != index.d:
+            raise RuntimeError(f"Query dimension {q_vec.shape[1]} != index dimension {index.d}")
+
+        # FAISS 検索（内積距離で類似度を取得）
+        distances, indices = index.search(q_vec.astype('float32'), topk)
+
+        # 結果組み立て
+        results: List[Tuple[float, str]] = []
+        for dist, idx in zip(distances[0], indices[0]):
+            rfc_num = docmap.get(str(idx), "")
+            results.append((float(dist), rfc_num))
+        return results
+
+
+_SEMANTIC: Dict[Tuple[str, Path, Path], SemanticIndex] = {}
+_SEMANTIC_LOCK = threading.Lock()
+
+
+def get_semantic_index(
+    model_name: str = DEFAULT_MODEL,
+    index_path: Path = INDEX_PATH,
+    docmap_path: Path = DOCMAP_PATH,
+) -> SemanticIndex:
+    """モデル名・ファイルごとの共有 SemanticIndex を返す（この時点では何も読み込まない）"""
+    key = (model_name, Path(index_path), Path(docmap_path))
+    with _SEMANTIC_LOCK:
+        if key not in _SEMANTIC:
+            _SEMANTIC[key] = SemanticIndex(*key, cache_path=default_disk_path())
+        return _SEMANTIC[key]
 
-# --- docmap を読み込んで辞書化 ---
-_DOCMAP: Dict[str, str] = {}
-if DOCMAP_PATH.exists():
-    _DOCMAP = json.loads(DOCMAP_PATH.read_text(encoding="utf-8"))
 
 def semsearch(query: str, topk: int = 10) -> List[Tuple[float, str]]:
     """
     FAISS インデックスを用いたセマンティック検索。
     クエリをベクトル化し、類似度上位 topk 件の (スコア, RFC番号) を返す。
+    モデルとインデックスは最初の呼び出しで読み込む。同じクエリの埋め込みはキャッシュから使う。
     """
-    if _INDEX is None or not _DOCMAP:
-        raise RuntimeError("FAISS index or docmap not found. Please build index first.")
-
-    # クエリ埋め込みを生成（バッチサイズ=1）
-    q_vec = _MODEL.encode([query], convert_to_numpy=True)
-    # 次元チェック
-    if q_vec.shape[1] != _INDEX.d:
-        raise RuntimeError(f"Query dimension {q_vec.shape[1]} != index dimension {_INDEX.d}")
-
-    # FAISS 検索（内積距離で類似度を取得）
-    distances, indices = _INDEX.search(q_vec.astype('float32'), topk)
-
-    # 結果組み立て
-    results: List[Tuple[float, str]] = []
-    for dist, idx in zip(distances[0], indices[0]):
-        rfc_num = _DOCMAP.get(str(idx), "")
-        results.append((float(dist), rfc_num))
-    return results
-
-def search_metadata(keyword: str) -> List[str]:
+    return get_semantic_index().search(query, topk)
+
+def search_metadata(keyword: str, whole_word: bool = False) -> List[str]:
+    """
+    metadata.json のタイトル・アブストラクト・著者・ステータス・番号から
+    キーワードにマッチする RFC 番号のリストを返す（whole_word=True で単語単位）。
+    検索は metadata.idx の転置 / 3-gram インデックスで行い、ファイル更新時のみ差分更新する。
+    """
+    meta_path = _meta_path()
+    if not meta_path.exists():
+        raise RuntimeError(f"Metadata file not found at {meta_path}")
+    return get_metadata_index(meta_path).search(keyword, whole_word=whole_word)
+
+
+def query_metadata(
+    keyword: str = "",
+    statuses: Optional[Iterable[str]] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    sort: str = "number",
+    limit: Optional[int] = None,
+    whole_word: bool = False,
+    fuzzy: bool = True,
+) -> Dict[str, Any]:
+    """
+    キーワード・ステータス・期間で絞り込んだメタデータを並べ替えて返す。
+    戻り値は {"total", "results", "facets", "corrections", "corrected_query"}
+    （ファセット件数はステータス別・年別）。
+    fuzzy=True で 1 件もヒットしなければ、綴りを補正した検索語で検索し直す。
+    """
+    meta_path = _meta_path()
+    if not meta_path.exists():
+        raise RuntimeError(f"Metadata file not found at {meta_path}")
+    index = get_metadata_index(meta_path)
+    options = dict(
+        statuses=statuses,
+        date_from=date_from,
+        date_to=date_to,
+        sort=sort,
+        limit=limit,
+        whole_word=whole_word,
+    )
+    res = index.query(keyword, **options)
+    res["corrections"], res["corrected_query"] = [], None
+    if fuzzy and keyword.strip() and res["total"] == 0:
+        corrected, corrections = get_corrector(index, FTS_DB_PATH).correct(keyword)
+        res["corrections"] = corrections
+        if corrections:
+            res.update(index.query(corrected, **options))
+            res["corrected_query"] = corrected
+    return res
+
+
+def warm_metadata(meta_path: Optional[Path] = None) -> bool:
+    """
+    メタデータの検索インデックス・補完インデックス・綴り補正の削除辞書を作っておく
+    （デーモン・API の起動時と増分同期の後に呼び、検索要求には構築を待たせない）。
+    metadata.json が無ければ何もせず False
+    """
+    meta_path = meta_path or _meta_path()
+    if not meta_path.exists():
+        return False
+    index = get_metadata_index(meta_path)
+    index.refresh()
+    get_suggester(index).index()
+    get_corrector(index, FTS_DB_PATH).rebuild()
+    return True
+
+
+def suggest_metadata(prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
     """
-    metadata.json をロードし、タイトル・アブストラクト・その他フィールドから
-    キーワードにマッチする RFC 番号のリストを返す。
+    入力途中の文字列に対する補完候補（RFC 番号・単語・タイトル）を返す。
+    候補は構築済みの前方一致インデックスから引き、メタデータ本体は走査しない。
     """
-    if not META_PATH.exists():
-        raise RuntimeError(f"Metadata file not found at {META_PATH}")
-
-    entries = json.loads(META_PATH.read_text(encoding="utf-8"))
-    kw = keyword.lower()
-    results: List[str] = []
-
-    for entry in entries:
-        # タイトル・アブストラクト・全フィールドJSONを結合して検索
-        text_blob = " ".join([
-            entry.get("title", ""),
-            entry.get("abstract", ""),
-            json.dumps(entry, ensure_ascii=False)
-        ]).lower()
-
-        if kw not in text_blob:
-            continue
-
-        # RFC番号を抽出して追加
-        num = ""
-        match = re.search(r"(\d+)", entry.get("number", ""))
-        if match:
-            num = match.group(1)
-        results.append(num)
-
-    return results
+    meta_path = _meta_path()
+    if not meta_path.exists():
+        raise RuntimeError(f"Metadata file not found at {meta_path}")
+    return get_suggester(get_metadata_index(meta_path)).suggest(prefix, limit)
@@ -1,15 +1,36 @@
 from pathlib import Path
+from typing import Any, Dict, List
+
 from rfc_chronicle.fetch_rfc import client
 
 
-DATA_DIR = Path(__file__).parent.parent / "data" / "texts"
+# the same ./data/texts tree that fetch / import / pack / preprocess write
+DATA_DIR = Path.cwd() / "data" / "texts"
 
-def show_rfc_details(rfc_num: int) -> dict:
+def show_rfc_details(rfc_num: int, refresh: bool = False) -> dict:
     """
     Download (if needed) and return the full metadata + body for RFC {rfc_num}.
     """
     # ensure the directory exists
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-    # fetch_details will pull from the network once and then cache locally
-    return client.fetch_details(rfc_num, save_dir=DATA_DIR, use_conditional=True)
+    if refresh:
+        # revalidate against rfc-editor.org with the stored ETag/Last-Modified
+        return client.fetch_details(rfc_num, save_dir=DATA_DIR, use_conditional=True)
+    # local-first: a stored text is served from the pre-parsed cache without network I/O
+    return client.load_details(rfc_num, save_dir=DATA_DIR)
+
+
+def show_rfc_section(rfc_num: int, section_id: str) -> Dict[str, Any]:
+    """
+    Return only section {section_id} (e.g. "4.2", "A.1") of RFC {rfc_num}.
+    The slice is read via the section index, so the rest of the body is never loaded.
+    """
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    return client.load_section(rfc_num, section_id, save_dir=DATA_DIR)
+
+
+def list_rfc_sections(rfc_num: int) -> List[Dict[str, Any]]:
+    """Return the section index (id, title, byte range) of RFC {rfc_num}."""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    return client.list_sections(rfc_num, save_dir=DATA_DIR)
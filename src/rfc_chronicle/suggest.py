@@ -0,0 +1,166 @@
+"""
+入力補完（typeahead）用の前方一致インデックス
+- タイトル（各単語の先頭から始まる部分文字列）、RFC 番号、よく使われる単語を
+  それぞれ昇順ソートした配列で持ち、二分探索で前方一致範囲を求める
+- 順位はタイトル・番号が新しい順（発行年月）、単語が出現数の多い順
+- 1〜2 文字の前方一致は範囲が広いため、構築時に上位 N 件を求めておく
+- メタデータインデックスが更新されたら次の呼び出しで作り直す
+"""
+import heapq
+import re
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from rfc_chronicle.metaindex import MetadataIndex
+
+DEFAULT_LIMIT = 10
+PRECOMPUTE_PREFIX = 2     # この長さまでの前方一致は上位件数を構築時に求める
+PRECOMPUTE_TOP = 20
+MAX_TERM_SUGGESTIONS = 3  # 単語の補完は最大 3 件（残りはタイトル）
+MIN_TERM_DOCS = 2
+_WORD_START_RE = re.compile(r"\b\w")
+_NUMBER_RE = re.compile(r"^(?:rfc\s*)?(\d+)$")
+
+
+class _SortedKeys:
+    """昇順キー配列 + 各キーの項目・スコア（前方一致で上位を返す）"""
+
+    def __init__(self, pairs: List[Tuple[str, int, float]]) -> None:
+        # pairs: (キー, 項目番号, スコア)
+        pairs.sort(key=lambda p: p[0])
+        self.keys = [p[0] for p in pairs]
+        self.items = [p[1] for p in pairs]
+        self.scores = [p[2] for p in pairs]
+        self._top: Dict[str, List[int]] = {}
+        groups: Dict[str, List[int]] = {}
+        for pos, key in enumerate(self.keys):
+            for n in range(1, min(PRECOMPUTE_PREFIX, len(key)) + 1):
+                groups.setdefault(key[:n], []).append(pos)
+        for prefix, positions in groups.items():
+            self._top[prefix] = self._best(positions, PRECOMPUTE_TOP)
+
+    def _best(self, positions, limit: int) -> List[int]:
+        """スコア上位の項目番号（同じ項目は 1 回だけ）"""
+        key = self.scores.__getitem__
+        # まず上位 2 倍を取り、重複除去で足りなくなったときだけ全件を並べ替える
+        ranked = heapq.nlargest(limit * 2, positions, key=key)
+        out = list(dict.fromkeys(self.items[pos] for pos in ranked))
+        if len(out) < limit and len(ranked) == limit * 2:
+            ranked = sorted(positions, key=key, reverse=True)
+            out = list(dict.fromkeys(self.items[pos] for pos in ranked))
+        return out[:limit]
+
+    def top(self, prefix: str, limit: int) -> List[int]:
+        if len(prefix) <= PRECOMPUTE_PREFIX and limit <= PRECOMPUTE_TOP:
+            return self._top.get(prefix, [])[:limit]
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\uffff", lo)
+        return self._best(range(lo, hi), limit)
+
+
+class SuggestIndex:
+    """タイトル・RFC 番号・単語の前方一致補完"""
+
+    def __init__(
+        self,
+        labels: List[str],
+        titles: List[str],
+        recency: List[int],
+        vocabulary: Dict[str, int],
+    ) -> None:
+        self.labels = labels
+        self.titles = titles
+        self.terms = sorted(w for w, n in vocabulary.items() if n >= MIN_TERM_DOCS and not w.isdigit())
+        term_pos = {w: i for i, w in enumerate(self.terms)}
+
+        # 同じ年月のものは番号の大きい方を新しいとみなす
+        recency = [ym * 100000 + int(label) for ym, label in zip(recency, labels)]
+        title_keys = []
+        for i, title in enumerate(titles):
+            lowered = title.lower()
+            for m in _WORD_START_RE.finditer(lowered):
+                title_keys.append((lowered[m.start():], i, recency[i]))
+        self._titles = _SortedKeys(title_keys)
+        self._numbers = _SortedKeys([(str(int(label)), i, recency[i]) for i, label in enumerate(labels)])
+        self._terms = _SortedKeys([(w, term_pos[w], vocabulary[w]) for w in self.terms])
+
+    @classmethod
+    def from_metadata(cls, meta_index: MetadataIndex) -> "SuggestIndex":
+        columns = meta_index.columns
+        return cls(
+            columns.labels,
+            columns.titles,
+            columns.ym.tolist(),
+            meta_index.vocabulary(),
+        )
+
+    def suggest(self, prefix: str, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+        """
+        前方一致の候補を返す。数字なら RFC 番号、それ以外は単語（最大 3 件）とタイトル。
+        各要素は {"text", "kind", "number"}（kind は "number" / "term" / "title"）。
+        """
+        key = " ".join(prefix.lower().split())
+        if not key or limit <= 0:
+            return []
+        m = _NUMBER_RE.match(key)
+        if m:
+            digits = str(int(m.group(1)))
+            return [
+                {"text": f"RFC {int(self.labels[i])}: {self.titles[i]}", "kind": "number", "number": self.labels[i]}
+                for i in self._numbers.top(digits, limit)
+            ]
+
+        out: List[Dict[str, Any]] = []
+        if " " not in key:
+            out += [
+                {"text": self.terms[i], "kind": "term", "number": None}
+                for i in self._terms.top(key, min(MAX_TERM_SUGGESTIONS, limit))
+            ]
+        out += [
+            {"text": self.titles[i], "kind": "title", "number": self.labels[i]}
+            for i in self._titles.top(key, limit - len(out))
+        ]
+        return out
+
+
+class Suggester:
+    """メタデータインデックスに追従する SuggestIndex のホルダー"""
+
+    def __init__(self, meta_index: MetadataIndex) -> None:
+        self.meta_index = meta_index
+        self._lock = threading.Lock()
+        self._digest: Optional[str] = None
+        self._index: Optional[SuggestIndex] = None
+
+    def index(self) -> SuggestIndex:
+        digest = self.meta_index.digest
+        if digest != self._digest:
+            with self._lock:
+                if digest != self._digest:
+                    self._index = SuggestIndex.from_metadata(self.meta_index)
+                    self._digest = digest
+        return self._index
+
+    def suggest(self, prefix: str, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+        return self.index().suggest(prefix, limit)
+
+
+# metadata.json ごとの共有インスタンス（id() をキーにすると、解放されたインデックスの分が
+# 残り続け、同じ id が再利用されると別のインデックスの候補を返してしまう）
+_SUGGESTERS: Dict[Path, Suggester] = {}
+_SUGGESTERS_LOCK = threading.Lock()
+
+
+def get_suggester(meta_index: MetadataIndex) -> Suggester:
+    """メタデータインデックスの共有 Suggester を返す（同じファイルの別インスタンスなら作り直す）"""
+    key = Path(meta_index.path).resolve()
+    with _SUGGESTERS_LOCK:
+        suggester = _SUGGESTERS.get(key)
+        if suggester is None or suggester.meta_index is not meta_index:
+            suggester = _SUGGESTERS[key] = Suggester(meta_index)
+        return suggester
+
+
+__all__ = ["SuggestIndex", "Suggester", "get_suggester"]
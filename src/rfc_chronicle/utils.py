@@ -4,11 +4,14 @@
 - JSON ファイル読み書き
 """
 import json
+import os
 from pathlib import Path
 
 DATA_DIR = Path.home() / ".rfc_data"
 META_FILE = DATA_DIR / "metadata.json"
 PINS_FILE = DATA_DIR / "pins.json"
+SYNC_FILE = DATA_DIR / "last_sync.json"  # 直近の増分同期レポート
+PENDING_FILE = DATA_DIR / "sync_pending.json"  # 同期後まだ下流で処理していない RFC
 
 
 def ensure_data_dir():
@@ -25,12 +28,22 @@ def read_json(file_path: Path):
 
 
 def write_json(file_path: Path, data):
-    """Python オブジェクトを JSON ファイルに書き込む"""
-    with file_path.open("w", encoding="utf-8") as f:
+    """
+    Python オブジェクトを JSON ファイルに書き込む。
+    一時ファイルに書いてから置き換えるので、同時に読むプロセス（デーモン・API）が書きかけを読むことはない
+    """
+    tmp = file_path.with_name(f"{file_path.name}.{os.getpid()}.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, file_path)
 
 import re
 
+# ページフッター / ページヘッダ / ヘッダフィールドの行パターン（モジュール読み込み時に 1 度だけコンパイル）
+_PAGE_FOOTER_RE = re.compile(r'^[A-Za-z].+\[Page \d+\]$')
+_PAGE_HEADER_RE = re.compile(r'^RFC\s+\d+')
+_HEADER_FIELD_RE = re.compile(r'^([^:]+):\s*(.+)$')
+
 def clean_rfc_text(raw: str) -> str:
     """
     フォームフィード／フッターを除去し、
@@ -40,9 +53,9 @@ def clean_rfc_text(raw: str) -> str:
     for line in raw.splitlines():
         if line == "\f":
             continue
-        if re.match(r'^[A-Za-z].+\[Page \d+\]$', line):
+        if _PAGE_FOOTER_RE.match(line):
             continue
-        if re.match(r'^RFC\s+\d+', line):
+        if _PAGE_HEADER_RE.match(line):
             continue
         lines.append(line.rstrip())
     cleaned = []
@@ -70,7 +83,7 @@ def parse_rfc_header(cleaned: str) -> tuple[dict, str]:
             if not line.strip():
                 in_header = False
                 continue
-            m = re.match(r'^([^:]+):\s*(.+)$', line)
+            m = _HEADER_FIELD_RE.match(line)
             if m:
                 key = m.group(1).lower()
                 val = m.group(2).strip()
@@ -29,3 +29,21 @@ def test_search_command(monkeypatch, tmp_path):
     assert result.exit_code == 0
     assert 'Matched RFC 1' in result.output
     assert 'RFC 1: Test' in result.output
+
+
+def test_search_command_reports_counts_and_filters(monkeypatch, tmp_path):
+    meta_file = tmp_path / 'metadata.json'
+    content = [
+        {'number': '1', 'title': 'Test', 'date': 'January 2020', 'status': 'Active'},
+        {'number': '2', 'title': 'Test again', 'date': 'March 2021', 'status': 'Historic'},
+    ]
+    meta_file.write_text(json.dumps(content), encoding='utf-8')
+    monkeypatch.setattr(utils, 'META_FILE', meta_file)
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ['search', 'Test', '--limit', '1', '--facets'])
+    assert result.exit_code == 0
+    # 一致した RFC の要約に加え、"(表示件数 of 総件数 results)" とファセットを出す
+    assert 'Matched RFC 1\n' in result.output
+    assert '(1 of 2 results)' in result.output
+    assert 'status: ' in result.output
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from rfc_chronicle import daemon
+
+
+@pytest.fixture
+def ops(monkeypatch):
+    # 検索の代わりに標準ライブラリの関数を転送対象にする
+    monkeypatch.setitem(daemon.OPS, "shorten", ("textwrap", "shorten"))
+    monkeypatch.setitem(daemon.OPS, "ip", ("ipaddress", "ip_address"))
+    monkeypatch.delenv("RFC_NO_DAEMON", raising=False)
+
+
+@pytest.fixture
+def running(tmp_path, monkeypatch, ops):
+    path = tmp_path / "daemon.sock"
+    monkeypatch.setattr(daemon, "SOCKET_PATH", path)
+    thread = threading.Thread(target=daemon.serve, kwargs={"warm": False}, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while daemon.status() is None:
+        assert time.monotonic() < deadline, "daemon did not start"
+        time.sleep(0.05)
+    yield path
+    daemon.stop()
+    thread.join(timeout=10)
+
+
+def test_dispatch_forwards_to_running_daemon(running):
+    assert daemon.dispatch("shorten", text="warm model loaded", width=12) == "warm [...]"
+    assert daemon.status()["requests"] == 1
+
+    # デーモン側の例外は同じ型でクライアントに届き、デーモンは動き続ける
+    with pytest.raises(ValueError):
+        daemon.dispatch("ip", address="not-an-address")
+    # JSON にできない結果もエラーとして返る
+    with pytest.raises(RuntimeError):
+        daemon.dispatch("ip", address="127.0.0.1")
+    assert daemon.dispatch("shorten", text="still running", width=20) == "still running"
+
+
+def test_stop_removes_socket(running):
+    assert daemon.stop() is True
+    deadline = time.monotonic() + 10
+    while running.exists():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert daemon.status() is None
+    assert daemon.stop() is False
+
+
+def test_dispatch_falls_back_in_process(tmp_path, monkeypatch, ops):
+    # ソケットが無い・前回の異常終了で残っただけのときはプロセス内で実行する
+    path = tmp_path / "daemon.sock"
+    monkeypatch.setattr(daemon, "SOCKET_PATH", path)
+    assert daemon.dispatch("shorten", text="a b", width=10) == "a b"
+
+    path.write_text("")
+    with pytest.raises(daemon.DaemonUnavailable):
+        daemon.call("shorten", text="a b", width=10)
+    assert daemon.dispatch("shorten", text="a b", width=10) == "a b"
+
+    with pytest.raises(ValueError):
+        daemon.dispatch("no-such-op")
+
+
+def test_dispatch_falls_back_on_unusable_socket_path(tmp_path, monkeypatch, ops):
+    # パスが長すぎる（AF_UNIX の上限超え）・読めないディレクトリの下にある場合もプロセス内で実行する
+    too_long = tmp_path / ("d" * 200) / "daemon.sock"
+    monkeypatch.setattr(daemon, "SOCKET_PATH", too_long)
+    with pytest.raises(daemon.DaemonUnavailable):
+        daemon.call("shorten", text="a b", width=10)
+    assert daemon.dispatch("shorten", text="a b", width=10) == "a b"
+
+    locked = tmp_path / "locked"
+    locked.mkdir()
+    (locked / "daemon.sock").write_text("")
+    locked.chmod(0)
+    try:
+        monkeypatch.setattr(daemon, "SOCKET_PATH", locked / "daemon.sock")
+        assert daemon.dispatch("shorten", text="a b", width=10) == "a b"
+    finally:
+        locked.chmod(0o700)
+
+    # JSON にできない引数もデーモンには送らない
+    with pytest.raises(daemon.DaemonUnavailable):
+        daemon.call("shorten", text=object(), width=10)
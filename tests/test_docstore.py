@@ -0,0 +1,63 @@
+import pytest
+
+from rfc_chronicle.docstore import DocStore, pack_texts, PACK_NAME
+
+
+@pytest.fixture
+def text_dir(tmp_path):
+    d = tmp_path / "texts"
+    d.mkdir()
+    (d / "1.txt").write_text("Host Software\n", encoding="utf-8")
+    (d / "2119.txt").write_text("Key words " * 10000, encoding="utf-8")
+    (d / "manifest.jsonl").write_text("", encoding="utf-8")
+    return d
+
+
+def test_pack_roundtrip_and_removes_loose(text_dir):
+    stats = pack_texts(text_dir)
+    assert stats["documents"] == 2
+    assert stats["packed_bytes"] < stats["raw_bytes"]
+    assert not (text_dir / "1.txt").exists()
+    assert (text_dir / "manifest.jsonl").exists()
+
+    store = DocStore(text_dir)
+    assert store.numbers() == [1, 2119]
+    assert store.get(1) == "Host Software\n"
+    assert store.size(2119) == len("Key words " * 10000)
+    assert store.get(3) is None and 3 not in store
+    assert [n for n, _ in store.iter_docs()] == [1, 2119]
+
+
+def test_loose_file_overrides_pack_until_repacked(text_dir):
+    pack_texts(text_dir)
+    store = DocStore(text_dir)
+    (text_dir / "1.txt").write_text("updated", encoding="utf-8")
+    (text_dir / "9110.txt").write_text("HTTP Semantics", encoding="utf-8")
+    assert store.get(1) == "updated"
+    assert store.numbers() == [1, 2119, 9110]
+
+    # 再パック後も同じ内容が読め、既存ブロックはそのまま引き継がれる
+    pack_texts(text_dir, remove_loose=True)
+    assert store.loose_numbers() == []
+    assert store.get(1) == "updated"
+    assert store.get(9110) == "HTTP Semantics"
+    assert store.get(2119).startswith("Key words")
+
+
+def test_corrupted_pack_is_rejected(text_dir):
+    (text_dir / PACK_NAME).write_bytes(b"\x00" * 64)
+    with pytest.raises(RuntimeError):
+        DocStore(text_dir).get(5)
+
+
+def test_truncated_or_short_pack_is_rejected(text_dir):
+    (text_dir / "5.txt").write_text("Five", encoding="utf-8")
+    pack_texts(text_dir, remove_loose=True)
+    pack = text_dir / PACK_NAME
+    data = pack.read_bytes()
+
+    # フッターより短い・途中で切れたパックは struct.error ではなく RuntimeError
+    for broken in (data[:5], b"", data[:-3], data[:8] + data[-20:]):
+        pack.write_bytes(broken)
+        with pytest.raises(RuntimeError):
+            DocStore(text_dir).get(5)
@@ -0,0 +1,67 @@
+import numpy as np
+
+from rfc_chronicle.embedcache import EmbeddingCache, normalize_query
+
+
+class _Encoder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, query):
+        self.queries.append(query)
+        return np.array([[len(query), 1.0, 0.5]], dtype="float32")
+
+
+def test_normalized_queries_share_one_encode():
+    encoder = _Encoder()
+    cache = EmbeddingCache("m", encoder)
+
+    # 全角・連続する空白は同じクエリとみなす（大文字・小文字は区別する）
+    assert normalize_query("  ＴＬＳ　 1.3 ") == "TLS 1.3"
+    first = cache.embed("TLS 1.3")
+    again = cache.embed("  ＴＬＳ　 1.3 ")
+    cache.embed("tls 1.3")
+    assert encoder.queries == ["TLS 1.3", "tls 1.3"]
+    assert again is first
+    assert first.shape == (1, 3) and first.dtype == np.float32
+    assert not first.flags.writeable
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_disk_tier_is_keyed_by_model(tmp_path):
+    path = tmp_path / "embed_cache.db"
+    encoder = _Encoder()
+    EmbeddingCache("model-a|st==1", encoder, path).embed("oauth")
+    assert encoder.queries == ["oauth"]
+
+    # 別プロセス相当（メモリは空）でもディスクから読み、エンコードしない
+    reopened = EmbeddingCache("model-a|st==1", encoder, path)
+    vector = reopened.embed("oauth")
+    assert encoder.queries == ["oauth"]
+    assert reopened.stats()["disk_hits"] == 1
+    assert vector.tolist() == [[5.0, 1.0, 0.5]]
+
+    # モデル（やバージョン）が変われば使わない
+    EmbeddingCache("model-b|st==1", encoder, path).embed("oauth")
+    assert encoder.queries == ["oauth", "oauth"]
+
+
+def test_disk_tier_prunes_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr("rfc_chronicle.embedcache.PRUNE_EVERY", 2)
+    path = tmp_path / "embed_cache.db"
+    cache = EmbeddingCache("m", _Encoder(), path, disk_max_rows=2)
+    for query in ("a", "b", "c", "d"):
+        cache.embed(query)
+    rows = cache._connection().execute("SELECT query FROM query_embeddings ORDER BY query").fetchall()
+    assert rows == [("c",), ("d",)]
+
+
+def test_unusable_disk_path_falls_back_to_memory(tmp_path):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    encoder = _Encoder()
+    cache = EmbeddingCache("m", encoder, blocker / "embed_cache.db")
+    cache.embed("dns")
+    cache.embed("dns")
+    assert encoder.queries == ["dns"]
+    assert cache.stats()["disk_path"] is None
@@ -0,0 +1,220 @@
+import json
+
+import pytest
+
+from rfc_chronicle import fetch_rfc
+from rfc_chronicle.fetch_rfc import RFCClient
+
+HTML = '''
+<html><body>
+<table></table><table><tr><td>nav</td></tr></table>
+<table>
+  <tr><th>Number</th><th>Files</th><th>Title</th><th>Authors</th><th>Date</th><th>More Info</th><th>Status</th></tr>
+  <tr><td><a href="#">RFC 1</a></td><td>f</td><td>Host  Software</td><td>a</td><td>April 1969</td><td>i</td><td>Unknown</td></tr>
+  <tr><td>RFC 2</td><td>f</td><td>Title &amp; B</td><td>b</td><td>April 1969</td><td>i</td><td>Unknown</td></tr>
+</table>
+</body></html>
+'''
+
+XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<rfc-index xmlns="http://www.rfc-editor.org/rfc-index">
+  <rfc-not-issued-entry><doc-id>RFC0020</doc-id></rfc-not-issued-entry>
+  <rfc-entry>
+    <doc-id>RFC2119</doc-id>
+    <title>Key words for use in RFCs to Indicate Requirement Levels</title>
+    <author><name>S. Bradner</name></author>
+    <date><month>March</month><year>1997</year></date>
+    <abstract><p>This document defines key words.</p></abstract>
+    <current-status>BEST CURRENT PRACTICE</current-status>
+  </rfc-entry>
+</rfc-index>
+'''
+
+
+class StreamResp:
+    """iter_content で小さなチャンクを返すダミーレスポンス"""
+    def __init__(self, text, chunk=16, status_code=200, headers=None):
+        self._data = text.encode("utf-8")
+        self._chunk = chunk
+        self.encoding = "utf-8"
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self._data), self._chunk):
+            yield self._data[i:i + self._chunk]
+
+
+class StreamSession:
+    def __init__(self, text, headers=None):
+        self.text = text
+        self.headers = headers or {}
+        self.sent = []
+
+    def get(self, url, params=None, timeout=None, stream=False, headers=None):
+        assert stream
+        self.sent.append(headers or {})
+        if headers and headers.get("If-None-Match") == self.headers.get("ETag"):
+            return StreamResp("", status_code=304)
+        return StreamResp(self.text, headers=self.headers)
+
+
+def test_iter_metadata_html_rows():
+    client = RFCClient(session=StreamSession(HTML))
+    rows = list(client.iter_metadata("html"))
+    assert rows == [
+        {"number": "RFC 1", "title": "Host  Software", "date": "April 1969", "status": "Unknown"},
+        {"number": "RFC 2", "title": "Title & B", "date": "April 1969", "status": "Unknown"},
+    ]
+
+
+def test_iter_metadata_html_structure_changed():
+    client = RFCClient(session=StreamSession("<html><table></table></html>"))
+    with pytest.raises(RuntimeError):
+        list(client.iter_metadata("html"))
+
+
+def test_iter_metadata_xml_entries():
+    client = RFCClient(session=StreamSession(XML))
+    rows = list(client.iter_metadata("xml"))
+    assert len(rows) == 1
+    assert rows[0]["number"] == "RFC2119"
+    assert rows[0]["date"] == "March 1997"
+    assert rows[0]["status"] == "Best Current Practice"
+    assert rows[0]["authors"] == ["S. Bradner"]
+    assert rows[0]["abstract"] == "This document defines key words."
+
+
+@pytest.fixture
+def tmp_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch_rfc, "META_FILE", tmp_path / "metadata.json")
+    monkeypatch.setattr(fetch_rfc, "SYNC_FILE", tmp_path / "last_sync.json")
+    monkeypatch.setattr(fetch_rfc, "PENDING_FILE", tmp_path / "sync_pending.json")
+    monkeypatch.setattr(fetch_rfc, "ensure_data_dir", lambda: None)
+    return tmp_path
+
+
+def test_sync_metadata_merges_only_delta(tmp_store):
+    stored = [
+        {"number": "RFC2119", "title": "Key words", "date": "March 1997", "status": "Proposed Standard"},
+        {"number": "RFC0001", "title": "Host Software", "date": "April 1969", "status": "Unknown"},
+    ]
+    (tmp_store / "metadata.json").write_text(json.dumps(stored), encoding="utf-8")
+    xml = XML.replace("</rfc-index>", """
+  <rfc-entry><doc-id>RFC9999</doc-id><title>New</title>
+    <date><month>May</month><year>2026</year></date>
+    <current-status>INFORMATIONAL</current-status></rfc-entry>
+</rfc-index>""")
+    client = RFCClient(session=StreamSession(xml, headers={"ETag": '"v1"'}))
+    report = client.sync_metadata(source="xml")
+
+    assert report["added"] == [9999]
+    assert report["changed"] == [2119]
+    saved = json.loads((tmp_store / "metadata.json").read_text(encoding="utf-8"))
+    assert [e["number"] for e in saved] == ["RFC2119", "RFC0001", "RFC9999"]
+    assert saved[0]["status"] == "Best Current Practice"
+
+    # 2 回目は前回の ETag で条件付き GET → 304 で差分なし
+    again = client.sync_metadata(source="xml")
+    assert client.session.sent[-1]["If-None-Match"] == '"v1"'
+    assert again["not_modified"] and again["added"] == [] and again["changed"] == []
+
+
+def test_sync_metadata_updates_index_used_by_search(tmp_store, monkeypatch):
+    from rfc_chronicle import search, utils
+
+    # search は fetch / sync と同じ metadata.json（utils.META_FILE）を読む
+    monkeypatch.setattr(utils, "META_FILE", tmp_store / "metadata.json")
+    stored = [{"number": "RFC0001", "title": "Host Software", "date": "April 1969", "status": "Unknown"}]
+    (tmp_store / "metadata.json").write_text(json.dumps(stored), encoding="utf-8")
+    assert search.search_metadata("Key words") == []
+
+    client = RFCClient(session=StreamSession(XML))
+    assert client.sync_metadata(source="xml")["added"] == [2119]
+    assert search.search_metadata("Key words") == ["2119"]
+    assert (tmp_store / "metadata.idx").exists()
+
+
+def test_switching_source_does_not_mark_everything_changed(tmp_store):
+    # html で取得した一覧（番号・空白の表記が xml と違う）を xml で同期し直す
+    stored = [{"number": "RFC 2119", "title": "Key words for use in RFCs to  Indicate Requirement Levels",
+               "date": "March 1997", "status": "Best Current Practice"}]
+    (tmp_store / "metadata.json").write_text(json.dumps(stored), encoding="utf-8")
+    report = RFCClient(session=StreamSession(XML)).sync_metadata(source="xml")
+    assert report["added"] == [] and report["changed"] == []
+
+    # 本当に変わったフィールドは検出し、その値だけを更新する
+    stored[0]["status"] = "Proposed Standard"
+    (tmp_store / "metadata.json").write_text(json.dumps(stored), encoding="utf-8")
+    (tmp_store / "last_sync.json").unlink()
+    report = RFCClient(session=StreamSession(XML)).sync_metadata(source="xml")
+    assert report["changed"] == [2119]
+    saved = json.loads((tmp_store / "metadata.json").read_text(encoding="utf-8"))[0]
+    assert saved["number"] == "RFC 2119" and saved["status"] == "Best Current Practice"
+    assert saved["authors"] == ["S. Bradner"]
+
+
+def test_sync_invalidates_every_source_cache(tmp_store, monkeypatch):
+    monkeypatch.setattr(fetch_rfc, "DATA_DIR", tmp_store)
+    client = RFCClient(session=StreamSession(XML))
+    for source in fetch_rfc.METADATA_SOURCES:
+        (tmp_store / f"metadata_cache_{source}.json").write_text("{}", encoding="utf-8")
+
+    # xml で同期しても、API / fetch_metadata が読む html 側のキャッシュも捨てる
+    assert client.sync_metadata(source="xml")["added"] == [2119]
+    assert not list(tmp_store.glob("metadata_cache_*.json"))
+
+
+def test_sync_delta_stays_pending_until_consumed(tmp_store):
+    from rfc_chronicle.pending import PendingQueue
+
+    queue = PendingQueue(tmp_store / "sync_pending.json")
+    client = RFCClient(session=StreamSession(XML, headers={"ETag": '"v1"'}))
+    assert client.sync_metadata(source="xml")["added"] == [2119]
+
+    # 2 回目の同期が 304（差分なし）でも、まだ処理していない分は消えない
+    assert client.sync_metadata(source="xml")["added"] == []
+    assert queue.pending("fulltext") == [2119]
+
+    # 処理した利用者の分だけ消える
+    queue.done("texts", [2119])
+    assert queue.pending("texts") == []
+    assert queue.pending("embeddings") == [2119]
+
+
+def test_incremental_fetch_retries_failed_texts(tmp_store, monkeypatch):
+    from click.testing import CliRunner
+
+    from rfc_chronicle import utils
+    from rfc_chronicle.cli import cli
+    from rfc_chronicle.pending import PendingQueue
+
+    queue = PendingQueue(tmp_store / "sync_pending.json")
+    monkeypatch.setattr(utils, "PENDING_FILE", queue.path)
+    monkeypatch.setattr(fetch_rfc, "PENDING_FILE", queue.path)
+    requested = []
+
+    def fake_fetch_texts(numbers, *args, **kwargs):
+        requested.append(list(numbers))
+        return {"downloaded": 1, "not_modified": 0, "skipped": 0, "failed": 1, "bytes": 0, "errors": {2: "timeout"}}
+
+    monkeypatch.setattr(fetch_rfc.client, "fetch_texts", fake_fetch_texts)
+    monkeypatch.setattr(fetch_rfc.client, "sync_metadata", lambda source: (queue.add([1, 2]), {
+        "not_modified": False, "added": [1, 2], "changed": [], "total": 2})[1])
+    runner = CliRunner()
+    assert runner.invoke(cli, ["fetch", "--incremental", "--texts"]).exit_code == 0
+    # 失敗した RFC 2 は、次の同期で差分が無くても取り直す
+    monkeypatch.setattr(fetch_rfc.client, "sync_metadata", lambda source: {
+        "not_modified": True, "added": [], "changed": [], "total": 2})
+    assert runner.invoke(cli, ["fetch", "--incremental", "--texts"]).exit_code == 0
+    assert requested == [[1, 2], [2]]
+    assert queue.pending("texts") == [2]
@@ -0,0 +1,140 @@
+import threading
+
+import pytest
+from requests.models import Response
+
+from rfc_chronicle import fetch_rfc
+from rfc_chronicle.fetch_rfc import RFCClient, HostRateLimiter, _retry_after_seconds
+
+
+class DummyResponse(Response):
+    def __init__(self, status_code: int, text: str = "", headers=None):
+        super().__init__()
+        self._content = text.encode()
+        self.status_code = status_code
+        self.headers.update(headers or {})
+
+
+class DummySession:
+    """URL ごとに応答列を返すスレッドセーフなダミーセッション"""
+    def __init__(self, responses):
+        self._responses = {url: list(rs) for url, rs in responses.items()}
+        self._lock = threading.Lock()
+        self.calls = []
+        self.timeouts = []
+
+    def get(self, url, headers=None, timeout=None):
+        with self._lock:
+            self.calls.append((url, dict(headers or {})))
+            self.timeouts.append(timeout)
+            return self._responses[url].pop(0)
+
+
+def _url(num):
+    return RFCClient.BASE_TEXT_URL.format(number=num)
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    # リトライ待ちでテストが遅くならないよう sleep を無効化
+    monkeypatch.setattr(fetch_rfc.time, "sleep", lambda s: None)
+
+
+def test_fetch_texts_downloads_in_parallel(tmp_path):
+    client = RFCClient(session=DummySession({
+        _url(1): [DummyResponse(200, "one")],
+        _url(2): [DummyResponse(200, "two")],
+        _url(3): [DummyResponse(404)] * 3,
+    }))
+    stats = client.fetch_texts(["RFC 1", "2", "0003"], tmp_path, concurrency=3, rate=0)
+    assert stats["downloaded"] == 2
+    assert stats["failed"] == 1 and 3 in stats["errors"]
+    assert (tmp_path / "1.txt").read_text() == "one"
+    assert (tmp_path / "2.txt").read_text() == "two"
+
+
+def test_fetch_texts_honors_retry_after(tmp_path, monkeypatch):
+    waits = []
+    monkeypatch.setattr(fetch_rfc.time, "sleep", waits.append)
+    client = RFCClient(session=DummySession({
+        _url(7): [DummyResponse(429, headers={"Retry-After": "5"}), DummyResponse(200, "ok")],
+    }))
+    stats = client.fetch_texts([7], tmp_path, concurrency=1, rate=0)
+    assert stats["downloaded"] == 1
+    assert max(waits) >= 5
+
+
+def test_retry_after_parsing():
+    assert _retry_after_seconds(DummyResponse(429, headers={"Retry-After": "12"})) == 12.0
+    assert _retry_after_seconds(DummyResponse(429)) is None
+    past = DummyResponse(503, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+    assert _retry_after_seconds(past) == 0.0
+
+
+def test_rate_limiter_spaces_requests_per_host(monkeypatch):
+    waits = []
+    monkeypatch.setattr(fetch_rfc.time, "sleep", waits.append)
+    limiter = HostRateLimiter(rate=2.0)
+    limiter.acquire("https://example.org/a")
+    limiter.acquire("https://example.org/b")
+    limiter.acquire("https://other.example/a")
+    # 同一ホストの 2 件目のみ約 0.5 秒待つ
+    assert len(waits) == 1 and waits[0] == pytest.approx(0.5, abs=0.05)
+
+
+def test_manifest_sends_server_validators(tmp_path):
+    client = RFCClient(session=DummySession({
+        _url(5): [
+            DummyResponse(200, "body", headers={"ETag": '"abc"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+            DummyResponse(304),
+        ],
+    }))
+    client.fetch_details(5, tmp_path, use_conditional=True)
+    client.fetch_details(5, tmp_path, use_conditional=True)
+    _, headers = client.session.calls[-1]
+    assert headers["If-None-Match"] == '"abc"'
+    assert headers["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+    rec = client.manifest(tmp_path).get(5)
+    assert rec["length"] == 4 and len(rec["sha256"]) == 64
+
+
+def test_fetch_texts_resumes_from_manifest(tmp_path):
+    first = RFCClient(session=DummySession({
+        _url(1): [DummyResponse(200, "one")],
+        _url(2): [DummyResponse(500)] * 3,
+    }))
+    first.fetch_texts([1, 2], tmp_path, concurrency=2, rate=0)
+
+    # 新しいクライアント（別プロセス相当）でも完了済みの 1 は再取得しない
+    second = RFCClient(session=DummySession({_url(2): [DummyResponse(200, "two")]}))
+    stats = second.fetch_texts([1, 2], tmp_path, concurrency=2, rate=0)
+    assert stats["skipped"] == 1 and stats["downloaded"] == 1
+    assert [url for url, _ in second.session.calls] == [_url(2)]
+
+
+def test_bulk_fetch_uses_dedicated_session_with_timeout(tmp_path, monkeypatch):
+    import requests
+
+    shared = requests.Session()
+    before = shared.adapters["https://"]
+    client = RFCClient(session=shared)
+    used = []
+
+    def fake_download(num, save_dir, use_conditional=False, limiter=None, session=None):
+        used.append(session)
+        return DummyResponse(304)
+
+    monkeypatch.setattr(client, "_download_text", fake_download)
+    client.fetch_texts([1, 2], tmp_path, concurrency=4, rate=1000)
+
+    # 共有セッションのアダプタはそのまま、一括取得は専用セッション（プール 4、満杯なら待つ）
+    assert shared.adapters["https://"] is before
+    assert len(used) == 2 and used[0] is used[1] and used[0] is not shared
+    assert used[0].adapters["https://"]._pool_block is True
+    assert used[0].adapters["https://"]._pool_maxsize == 4
+
+
+def test_text_requests_have_a_timeout(tmp_path):
+    client = RFCClient(session=DummySession({_url(1): [DummyResponse(200, "one")]}))
+    client.fetch_texts([1], tmp_path, concurrency=1, rate=1000)
+    assert client.session.timeouts == [fetch_rfc.REQUEST_TIMEOUT]
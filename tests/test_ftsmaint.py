@@ -0,0 +1,62 @@
+import sqlite3
+
+import pytest
+
+from rfc_chronicle import fulltext, ftsmaint
+
+
+@pytest.fixture
+def fragmented_db(tmp_path, monkeypatch):
+    # 1 件ずつ別トランザクションで書き込み、セグメントが増えた状態を作る
+    db = tmp_path / "fulltext.db"
+    monkeypatch.setattr(fulltext, "DB_PATH", db)
+    conn = fulltext._open_writer(db)
+    fulltext._ensure_schema(conn)
+    for key, value in (("automerge", 0), ("crisismerge", 100)):
+        conn.execute(f"INSERT INTO {fulltext.TABLE_NAME} ({fulltext.TABLE_NAME}, rank) VALUES (?, ?)", (key, value))
+    for n in range(1, 21):
+        body = f"document {n} about routing"
+        conn.execute(f"INSERT INTO {fulltext.DOCS_TABLE} VALUES (?, ?, 'T', '', ?)", (n, str(n), fulltext._compress(body)))
+        conn.execute(f"INSERT INTO {fulltext.TABLE_NAME} (rowid, number, title, content) VALUES (?, ?, 'T', ?)",
+                     (n, str(n), body))
+    conn.close()
+    return db
+
+
+def test_stats_report_segments_and_sizes(fragmented_db):
+    stats = ftsmaint.fts_stats()
+    [db] = stats["databases"]
+    table = db["tables"][fulltext.TABLE_NAME]
+    assert table["segments"] == 20 == stats["segments"]
+    assert (table["automerge"], table["crisismerge"]) == (0, 100)
+    assert table["index_bytes"] is None or table["index_bytes"] > 0
+    assert db["file_bytes"] > 0 and db["pages"] > 0
+    assert set(db["cache"]) == {"cache_size_bytes", "mmap_size", "fits_in_cache", "fits_in_mmap"}
+
+
+def test_maintain_merges_sets_config_and_checkpoints(fragmented_db):
+    # 読み取り中の接続があっても保守は進む
+    reader = fulltext._connections().connection()
+    assert len(fulltext.search_fulltext("routing", limit=100)) == 20
+
+    result = ftsmaint.maintain(automerge=8, crisismerge=32)
+    done = result["databases"][0]["tables"][fulltext.TABLE_NAME]
+    assert done["segments_before"] == 20 and done["segments_after"] < 20
+    assert done["merge_steps"] >= 1 and "optimize" not in done
+    assert result["databases"][0]["checkpoint"]["mode"] == "PASSIVE"
+
+    result = ftsmaint.maintain(optimize=True, checkpoint="truncate")
+    done = result["databases"][0]["tables"][fulltext.TABLE_NAME]
+    assert done["optimize"] and done["segments_after"] == 1
+
+    table = ftsmaint.fts_stats()["databases"][0]["tables"][fulltext.TABLE_NAME]
+    assert (table["automerge"], table["crisismerge"], table["segments"]) == (8, 32, 1)
+    assert len(fulltext.search_fulltext("routing", limit=100)) == 20
+    conn = sqlite3.connect(fragmented_db)
+    fulltext.register_functions(conn)
+    conn.execute(f"INSERT INTO {fulltext.TABLE_NAME} ({fulltext.TABLE_NAME}) VALUES ('integrity-check')")
+    conn.close()
+    assert reader.execute("SELECT 1").fetchone() == (1,)
+
+    with pytest.raises(ValueError):
+        ftsmaint.maintain(checkpoint="sometimes")
@@ -0,0 +1,342 @@
+import json
+import os
+import sqlite3
+import threading
+import zlib
+
+import pytest
+
+from rfc_chronicle import fulltext
+from rfc_chronicle.dbconn import ReadOnlyConnections
+
+
+def _make_db(path, rows):
+    conn = sqlite3.connect(path)
+    fulltext.register_functions(conn)
+    fulltext._ensure_schema(conn)
+    conn.executemany(
+        f"INSERT INTO {fulltext.DOCS_TABLE} VALUES (?, ?, ?, '', ?)",
+        [(int(n), n, title, fulltext._compress(body)) for n, title, body in rows],
+    )
+    conn.executemany(
+        f"INSERT INTO {fulltext.TABLE_NAME} (rowid, number, title, content) VALUES (?, ?, ?, ?)",
+        [(int(n), n, title, body) for n, title, body in rows],
+    )
+    conn.commit()
+    conn.close()
+
+
+def _make_legacy_db(path, rows):
+    # 本文を FTS5 テーブル内に持っていた頃の形式
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE VIRTUAL TABLE {fulltext.TABLE_NAME} USING fts5(number, title, content)")
+    conn.executemany(f"INSERT INTO {fulltext.TABLE_NAME} VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def fts_db(tmp_path, monkeypatch):
+    db = tmp_path / "fulltext.db"
+    _make_db(db, [("1", "Host Software", "host software protocol"), ("2", "Other", "nothing here")])
+    monkeypatch.setattr(fulltext, "DB_PATH", db)
+    return db
+
+
+def test_search_reuses_thread_connection(fts_db):
+    assert [n for n, _ in fulltext.search_fulltext("protocol")] == ["1"]
+    pool = fulltext.readonly_connections(fts_db)
+    conn = pool.connection()
+    fulltext.search_fulltext("host")
+    assert pool.connection() is conn
+
+    # 別スレッドには別の接続
+    other = []
+    t = threading.Thread(target=lambda: other.append(pool.connection()))
+    t.start()
+    t.join()
+    assert other[0] is not conn
+
+
+def test_connection_is_read_only(fts_db):
+    conn = ReadOnlyConnections(fts_db).connection()
+    assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute(f"DELETE FROM {fulltext.TABLE_NAME}")
+
+
+def test_reopens_when_database_is_replaced(fts_db, tmp_path):
+    assert fulltext.search_fulltext("nothing")
+    # 再構築した DB を rename で差し替える
+    new_db = tmp_path / "new.db"
+    _make_db(new_db, [("3", "Replaced", "fresh content")])
+    os.replace(new_db, fts_db)
+    assert fulltext.search_fulltext("nothing") == []
+    assert [n for n, _ in fulltext.search_fulltext("fresh")] == ["3"]
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    texts = data / "texts"
+    texts.mkdir(parents=True)
+    meta = [{"number": f"RFC {n:04d}", "title": f"Title {n}"} for n in range(1, 6)]
+    (data / "metadata.json").write_text(json.dumps(meta), encoding="utf-8")
+    for n in range(1, 6):
+        (texts / f"{n}.txt").write_text(f"Header: x\n\nbody of document {n} keyword{n}\n", encoding="utf-8")
+    for name, value in [("BASE_DIR", data), ("DB_PATH", data / "fulltext.db"),
+                        ("META_PATH", data / "metadata.json"), ("TEXT_DIR", texts)]:
+        monkeypatch.setattr(fulltext, name, value)
+    return data
+
+
+def test_build_is_incremental(corpus, monkeypatch):
+    stats = fulltext.build_fulltext_db(batch_size=2)
+    assert (stats["indexed"], stats["unchanged"]) == (5, 0)
+    assert [n for n, _ in fulltext.search_fulltext("keyword3")] == ["0003"]
+
+    # 変更なしの再実行では本文を読まない
+    calls = []
+    original = fulltext.get_parsed
+    monkeypatch.setattr(fulltext, "get_parsed", lambda *a: (calls.append(a), original(*a))[1])
+    stats = fulltext.build_fulltext_db()
+    assert (stats["indexed"], stats["unchanged"]) == (0, 5)
+    assert calls == []
+
+    # 本文の変更・タイトルの変更・削除を検出
+    (corpus / "texts" / "2.txt").write_text("Header: x\n\nrewritten body\n", encoding="utf-8")
+    meta = json.loads((corpus / "metadata.json").read_text())
+    meta[2]["title"] = "Renamed"
+    del meta[4]
+    (corpus / "metadata.json").write_text(json.dumps(meta), encoding="utf-8")
+    stats = fulltext.build_fulltext_db()
+    assert (stats["indexed"], stats["unchanged"], stats["removed"]) == (2, 2, 1)
+
+    assert fulltext.search_fulltext("keyword2") == []
+    assert [n for n, _ in fulltext.search_fulltext("rewritten")] == ["0002"]
+    assert fulltext.search_fulltext("keyword5") == []
+    conn = sqlite3.connect(corpus / "fulltext.db")
+    assert conn.execute(f"SELECT title FROM {fulltext.DOCS_TABLE} WHERE rowid = 3").fetchone() == ("Renamed",)
+    assert conn.execute(f"SELECT count(*) FROM {fulltext.DOCS_TABLE}").fetchone() == (4,)
+    # 索引側にも削除・更新が反映されている（integrity-check は外部コンテンツと照合する）
+    fulltext.register_functions(conn)
+    conn.execute(f"INSERT INTO {fulltext.TABLE_NAME} ({fulltext.TABLE_NAME}) VALUES ('integrity-check')")
+    conn.close()
+
+
+def test_numbers_limit_update_scope(corpus):
+    fulltext.build_fulltext_db()
+    (corpus / "texts" / "1.txt").write_text("Header: x\n\nchanged one\n", encoding="utf-8")
+    (corpus / "texts" / "4.txt").write_text("Header: x\n\nchanged four\n", encoding="utf-8")
+    stats = fulltext.build_fulltext_db(numbers=["RFC 4"])
+    assert stats["indexed"] == 1 and stats["removed"] == 0
+    assert [n for n, _ in fulltext.search_fulltext("four")] == ["0004"]
+    assert fulltext.search_fulltext("one") == []
+
+
+def test_body_is_stored_once_compressed(corpus):
+    # 旧形式（本文を FTS5 内に持つ）の DB から移行する
+    _make_legacy_db(corpus / "fulltext.db", [("1", "Old", "old layout body")])
+    stats = fulltext.build_fulltext_db()
+    assert stats["indexed"] == 5
+
+    conn = sqlite3.connect(corpus / "fulltext.db")
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master")}
+    assert f"{fulltext.TABLE_NAME}_content" not in tables
+    body = conn.execute(f"SELECT body FROM {fulltext.DOCS_TABLE} WHERE rowid = 3").fetchone()[0]
+    assert zlib.decompress(body).decode("utf-8").strip() == "body of document 3 keyword3"
+    conn.close()
+
+    # snippet() は展開ビュー経由で本文を返す
+    assert fulltext.search_fulltext("layout") == []
+    [(num, snippet)] = fulltext.search_fulltext("keyword4")
+    assert num == "0004" and "document 4" in snippet
+
+
+def test_ranked_pages_with_cursor(tmp_path, monkeypatch):
+    db = tmp_path / "fulltext.db"
+    rows = [(str(n), "TLS" if n in (3, 7) else f"Doc {n}", "tls " * (n % 4 + 1) + "filler " * n) for n in range(1, 13)]
+    _make_db(db, rows)
+    monkeypatch.setattr(fulltext, "DB_PATH", db)
+
+    # タイトルの一致が上位に来る
+    everything = fulltext.search_fulltext_page("tls", limit=100, snippets=False)
+    numbers = [r["number"] for r in everything["results"]]
+    assert set(numbers[:2]) == {"3", "7"} and len(numbers) == 12
+    scores = [r["score"] for r in everything["results"]]
+    assert scores == sorted(scores, reverse=True)
+    assert all(r["snippet"] is None for r in everything["results"])
+    assert everything["next_cursor"] is None
+
+    # カーソルで辿ったページを繋げると一括取得と同じ順序になる
+    paged, cursor = [], None
+    while True:
+        page = fulltext.search_fulltext_page("tls", limit=5, cursor=cursor)
+        paged += [r["number"] for r in page["results"]]
+        assert all("tls" in r["snippet"] for r in page["results"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert paged == numbers
+
+    first = fulltext.search_fulltext_page("tls", limit=5)
+    with pytest.raises(ValueError):
+        fulltext.search_fulltext_page("filler", cursor=first["next_cursor"])
+    with pytest.raises(ValueError):
+        fulltext.search_fulltext_page("tls", cursor="not-a-cursor")
+
+
+def test_trigram_index_serves_substring_and_japanese_queries(corpus):
+    (corpus / "texts" / "2.txt").write_text(
+        "Header: x\n\nthe X-Forwarded-For header and OID 1.2.840.113549 暗号化方式の説明\n", encoding="utf-8"
+    )
+    stats = fulltext.build_fulltext_db()
+    assert stats["trigram"] is False
+    # trigram 索引が無ければ porter 索引のまま
+    assert fulltext.plan_query("x-forwarded", has_trigram=False) == (fulltext.TABLE_NAME, "x-forwarded")
+
+    stats = fulltext.build_fulltext_db(trigram=True)
+    assert stats["trigram"] is True and stats["indexed"] == 0
+    for query in ["x-forwarded", "840.1135", "暗号化", "forwarded-for header"]:
+        page = fulltext.search_fulltext_page(query)
+        assert page["mode"] == "substring", query
+        assert [r["number"] for r in page["results"]] == ["0002"], query
+    # 語の一部（部分文字列）は substring 指定で引ける
+    assert fulltext.search_fulltext_page("eywor", mode="substring")["results"]
+    assert fulltext.search_fulltext_page("eywor")["results"] == []
+    # 英単語だけの検索語は porter 索引
+    assert fulltext.search_fulltext_page("keyword3")["mode"] == "word"
+
+    # trigram 索引も差分更新される
+    (corpus / "texts" / "2.txt").write_text("Header: x\n\nplain text\n", encoding="utf-8")
+    fulltext.build_fulltext_db()
+    assert fulltext.search_fulltext_page("x-forwarded")["results"] == []
+    conn = sqlite3.connect(corpus / "fulltext.db")
+    fulltext.register_functions(conn)
+    conn.execute(f"INSERT INTO {fulltext.TRIGRAM_TABLE} ({fulltext.TRIGRAM_TABLE}) VALUES ('integrity-check')")
+    conn.close()
+
+    fulltext.build_fulltext_db(trigram=False)
+    with pytest.raises(ValueError):
+        fulltext.search_fulltext_page("plain text", mode="substring")
+
+
+def test_sharded_build_and_fan_out_search(corpus):
+    single = fulltext.build_fulltext_db()
+    expected = fulltext.search_fulltext_page("document", limit=100, snippets=False)
+
+    stats = fulltext.build_fulltext_db(shards=2)
+    assert stats["shards"] == 2 and stats["indexed"] == single["indexed"]
+    layout = fulltext.read_shard_layout()
+    assert len(layout["bounds"]) == 1
+    paths = fulltext.index_paths()
+    assert [p.name for p in paths] == ["fulltext.0-of-2.db", "fulltext.1-of-2.db"]
+    assert not (corpus / "fulltext.db").exists()
+
+    # 各シャードは RFC 番号の範囲で分かれている
+    owned = []
+    for path in paths:
+        conn = sqlite3.connect(path)
+        owned.append({n for (n,) in conn.execute(f"SELECT rowid FROM {fulltext.DOCS_TABLE}")})
+        conn.close()
+    assert owned[0] and owned[1] and max(owned[0]) < min(owned[1])
+
+    # マージ結果は単一 DB と同じ文書集合・ページを辿っても重複しない
+    merged = fulltext.search_fulltext_page("document", limit=100, snippets=False)
+    assert sorted(r["number"] for r in merged["results"]) == sorted(r["number"] for r in expected["results"])
+    first = fulltext.search_fulltext_page("document", limit=3)
+    rest = fulltext.search_fulltext_page("document", limit=3, cursor=first["next_cursor"])
+    assert [r["number"] for r in first["results"] + rest["results"]] == [r["number"] for r in merged["results"]]
+    assert all("document" in r["snippet"] for r in first["results"])
+
+    # 以後の差分更新はシャード構成のまま。該当シャードだけが書き換わる
+    (corpus / "texts" / "5.txt").write_text("Header: x\n\nsharded update\n", encoding="utf-8")
+    stats = fulltext.build_fulltext_db()
+    assert (stats["shards"], stats["indexed"]) == (2, 1)
+    assert [n for n, _ in fulltext.search_fulltext("sharded")] == ["0005"]
+
+    # 単一の DB に戻す
+    stats = fulltext.build_fulltext_db(shards=1)
+    assert stats["shards"] == 1 and fulltext.read_shard_layout() is None
+    assert fulltext.index_paths() == [corpus / "fulltext.db"]
+    assert not any(p.exists() for p in paths)
+    assert [n for n, _ in fulltext.search_fulltext("sharded")] == ["0005"]
+
+
+def test_search_fulltext_pages_past_max_page_size(tmp_path, monkeypatch):
+    db = tmp_path / "fulltext.db"
+    _make_db(db, [(str(n), f"Doc {n}", f"common word {n}") for n in range(1, 8)])
+    monkeypatch.setattr(fulltext, "DB_PATH", db)
+    monkeypatch.setattr(fulltext, "MAX_PAGE_SIZE", 3)
+    # 1 ページの上限を超える limit でも、カーソルをたどって limit 件まで返す
+    assert len(fulltext.search_fulltext("common", limit=5)) == 5
+    numbers = [n for n, _ in fulltext.search_fulltext("common", limit=100)]
+    assert sorted(numbers, key=int) == [str(n) for n in range(1, 8)]
+
+
+def test_index_fulltext_pending_consumes_sync_queue(corpus, monkeypatch):
+    from click.testing import CliRunner
+
+    from rfc_chronicle import utils
+    from rfc_chronicle.cli import cli
+    from rfc_chronicle.pending import PendingQueue
+
+    queue = PendingQueue(corpus / "sync_pending.json")
+    monkeypatch.setattr(utils, "PENDING_FILE", queue.path)
+    fulltext.build_fulltext_db()
+    (corpus / "texts" / "4.txt").write_text("Header: x\n\nchanged four\n", encoding="utf-8")
+    meta = json.loads((corpus / "metadata.json").read_text())
+    (corpus / "metadata.json").write_text(json.dumps(meta + [{"number": "RFC 0006", "title": "New"}]))
+    queue.add([4, 6])
+
+    result = CliRunner().invoke(cli, ["index-fulltext", "--pending"])
+    assert result.exit_code == 0, result.output
+    assert "Indexed 1," in result.output
+    assert [n for n, _ in fulltext.search_fulltext("four")] == ["0004"]
+    # 本文がまだ無い RFC 6 は次回に持ち越し、他の利用者の分はそのまま
+    assert queue.pending("fulltext") == [6]
+    assert queue.pending("embeddings") == [4, 6]
+
+
+def test_short_japanese_terms_stay_on_trigram_index(corpus):
+    (corpus / "texts" / "2.txt").write_text(
+        "Header: x\n\nthe X-Forwarded-For header 暗号化方式の説明\n", encoding="utf-8"
+    )
+    (corpus / "texts" / "3.txt").write_text("Header: x\n\n認証の説明 100% done\n", encoding="utf-8")
+    # trigram 索引が無ければ日本語は引けないので、porter 索引で 0 件にせずエラーにする
+    fulltext.build_fulltext_db()
+    with pytest.raises(ValueError, match="trigram"):
+        fulltext.search_fulltext_page("暗号")
+
+    fulltext.build_fulltext_db(trigram=True)
+    # 2 文字の語は MATCH 式に含めず、LIKE で絞り込む
+    assert fulltext.plan_query("暗号") == (fulltext.TRIGRAM_TABLE, "")
+    page = fulltext.search_fulltext_page("暗号")
+    assert page["mode"] == "substring"
+    assert [r["number"] for r in page["results"]] == ["0002"]
+    assert "…暗号…" in page["results"][0]["snippet"]
+    assert [r["number"] for r in fulltext.search_fulltext_page("説明")["results"]] == ["0002", "0003"]
+    # 3 文字以上の語と組み合わせた場合は MATCH で引いてから絞り込む
+    assert [r["number"] for r in fulltext.search_fulltext_page("説明 header")["results"]] == ["0002"]
+    assert [r["number"] for r in fulltext.search_fulltext_page("認証 header")["results"]] == []
+    # LIKE のワイルドカードは文字として扱う
+    assert [r["number"] for r in fulltext.search_fulltext_page("0%")["results"]] == ["0003"]
+    assert fulltext.search_fulltext_page("_")["results"] == []
+    # ページをたどっても重複しない
+    first = fulltext.search_fulltext_page("説明", limit=1)
+    rest = fulltext.search_fulltext_page("説明", limit=1, cursor=first["next_cursor"])
+    assert [r["number"] for r in first["results"] + rest["results"]] == ["0002", "0003"]
+
+
+def test_no_change_reindex_does_not_reread_seeded_texts(corpus, monkeypatch):
+    from rfc_chronicle.docstore import DocStore
+    from rfc_chronicle.manifest import MANIFEST_NAME
+
+    # マニフェストの無い本文も 1 回目で記録が作られ、2 回目以降は読まない
+    fulltext.build_fulltext_db()
+    assert len((corpus / "texts" / MANIFEST_NAME).read_text().splitlines()) == 5
+    reads = []
+    original = DocStore.get_bytes
+    monkeypatch.setattr(DocStore, "get_bytes", lambda self, num: (reads.append(num), original(self, num))[1])
+    assert fulltext.build_fulltext_db()["unchanged"] == 5
+    assert reads == []
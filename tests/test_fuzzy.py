@@ -0,0 +1,118 @@
+import json
+import sqlite3
+
+from rfc_chronicle.fuzzy import FuzzyIndex, QueryCorrector, fts_vocabulary, osa_distance
+from rfc_chronicle.metaindex import MetadataIndex
+
+
+def test_osa_distance():
+    assert osa_distance("kerberos", "kerberos", 2) == 0
+    assert osa_distance("kerbros", "kerberos", 2) == 1
+    assert osa_distance("kerbreos", "kerberos", 2) == 1  # 隣接文字の入れ替え
+    assert osa_distance("dnsssec", "dnssec", 2) == 1
+    # 上限を超えたら打ち切り
+    assert osa_distance("abcdef", "uvwxyz", 2) == 3
+
+
+def test_lookup_ranks_by_distance_then_frequency():
+    index = FuzzyIndex({"kerberos": 5, "dnssec": 40, "dns": 100, "ipsec": 30})
+    assert index.lookup("kerbros")[0][:2] == ("kerberos", 1)
+    # 距離 2 同士は出現数の多い順
+    assert [w for w, _, _ in index.lookup("dnsec")] == ["dnssec", "dns", "ipsec"]
+    assert index.lookup("zzzzzz") == []
+
+
+def test_corrector_uses_metadata_and_fts_vocabulary(tmp_path):
+    meta = tmp_path / "metadata.json"
+    meta.write_text(json.dumps([
+        {"number": "RFC 4120", "title": "The Kerberos Network Authentication Service (V5)"},
+        {"number": "RFC 4033", "title": "DNS Security Introduction and Requirements"},
+    ]), encoding="utf-8")
+    db = tmp_path / "fulltext.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE VIRTUAL TABLE rfc_text USING fts5(number, title, content)")
+    conn.executemany(
+        "INSERT INTO rfc_text VALUES (?, ?, ?)",
+        [(str(i), "", "dnssec validating resolver") for i in range(5)],
+    )
+    conn.commit()
+    conn.close()
+    assert fts_vocabulary(db)["dnssec"] == 5
+
+    corrector = QueryCorrector(MetadataIndex(meta), db)
+    corrected, corrections = corrector.correct("Kerbros DNSSSEC")
+    assert corrected == "kerberos dnssec"
+    assert [c["term"] for c in corrections] == ["kerbros", "dnsssec"]
+    # 語彙にある語は補正しない
+    assert corrector.correct("kerberos") == ("kerberos", [])
+
+
+def test_porter_stems_are_not_suggested(tmp_path):
+    meta = tmp_path / "metadata.json"
+    meta.write_text(json.dumps([
+        {"number": "RFC 4120", "title": "The Kerberos Network Authentication Service (V5)"},
+    ]), encoding="utf-8")
+    db = tmp_path / "fulltext.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE VIRTUAL TABLE rfc_text USING fts5(number, title, content, tokenize = 'porter')")
+    conn.executemany(
+        "INSERT INTO rfc_text VALUES (?, ?, ?)",
+        [(str(i), "", "kerberos tickets are renewable") for i in range(5)],
+    )
+    conn.commit()
+    conn.close()
+    # 語幹化された索引の語（"kerbero" "ticket" "renew"）はメタデータにある語だけ残る
+    assert "kerbero" in fts_vocabulary(db)
+    assert fts_vocabulary(db, known_words={"kerberos", "network"}) == {}
+
+    corrector = QueryCorrector(MetadataIndex(meta), db)
+    assert corrector.correct("kerbero")[0] == "kerberos"
+    assert corrector.correct("kerbros")[0] == "kerberos"
+
+
+def test_shared_corrector_is_one_per_metadata_file(tmp_path):
+    from rfc_chronicle import fuzzy
+
+    meta = tmp_path / "metadata.json"
+    meta.write_text("[]", encoding="utf-8")
+    index = MetadataIndex(meta)
+    assert fuzzy.get_corrector(index) is fuzzy.get_corrector(index)
+    before = len(fuzzy._CORRECTORS)
+    other = MetadataIndex(meta)
+    assert fuzzy.get_corrector(other).meta_index is other
+    assert len(fuzzy._CORRECTORS) == before
+
+
+def test_dictionary_is_prebuilt_and_refreshed_off_the_request_path(tmp_path, monkeypatch):
+    import time
+
+    from rfc_chronicle import fuzzy, search
+    from rfc_chronicle.metaindex import get_metadata_index
+
+    meta = tmp_path / "metadata.json"
+    meta.write_text(json.dumps([{"number": "RFC 4120", "title": "Kerberos"}]), encoding="utf-8")
+    monkeypatch.setattr(search, "FTS_DB_PATH", tmp_path / "fulltext.db")
+    # 起動時（デーモン・API）と同期後に作っておく
+    assert search.warm_metadata(meta) is True
+    corrector = fuzzy.get_corrector(get_metadata_index(meta), tmp_path / "fulltext.db")
+    assert corrector._index is not None and "kerberos" in corrector._index
+
+    # 語彙が変わっても、検索要求は前の辞書で答え、作り直しは裏で行う
+    meta.write_text(json.dumps([{"number": "RFC 4120", "title": "Kerberos"},
+                                {"number": "RFC 4033", "title": "DNSSEC"}]), encoding="utf-8")
+    built = []
+    original = fuzzy.build_vocabulary
+
+    def slow_build(*args):
+        time.sleep(0.2)
+        built.append(args)
+        return original(*args)
+
+    monkeypatch.setattr(fuzzy, "build_vocabulary", slow_build)
+    assert "dnssec" not in corrector.index()
+    deadline = time.monotonic() + 10
+    while "dnssec" not in corrector.index():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert len(built) == 1
+    assert search.warm_metadata(tmp_path / "missing.json") is False
@@ -0,0 +1,95 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from rfc_chronicle.importer import import_archive, iter_archive
+from rfc_chronicle.manifest import DownloadManifest, MANIFEST_NAME
+
+DOCS = {
+    "rfc1.txt": b"Host Software\r\n",
+    "sub/rfc2119.txt": "Key words — MUST".encode("utf-8"),
+    "rfc8.txt": b"caf\xe9",  # latin-1
+    "rfc-index.txt": b"not a document",
+}
+
+
+def _make_tar(path):
+    with tarfile.open(path, "w:gz") as tf:
+        for name, data in DOCS.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+
+
+def _make_zip(path):
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in DOCS.items():
+            zf.writestr(name, data)
+
+
+def _make_dir(path):
+    for name, data in DOCS.items():
+        (path / name).parent.mkdir(parents=True, exist_ok=True)
+        (path / name).write_bytes(data)
+
+
+@pytest.mark.parametrize("maker, name", [
+    (_make_tar, "RFC-all.tar.gz"),
+    (_make_zip, "RFC-all.zip"),
+    (_make_dir, "mirror"),
+])
+def test_import_archive_formats(tmp_path, maker, name):
+    source = tmp_path / name
+    if name == "mirror":
+        source.mkdir()
+    maker(source)
+    assert sorted(num for num, _ in iter_archive(source)) == [1, 8, 2119]
+
+    out = tmp_path / "texts"
+    stats = import_archive(source, out, workers=2)
+    assert stats == {"written": 3, "unchanged": 0, "failed": 0, "errors": {}}
+    assert (out / "1.txt").read_text(encoding="utf-8") == "Host Software\n"
+    assert (out / "8.txt").read_text(encoding="utf-8") == "café"
+    size = (out / "2119.txt").stat().st_size
+    assert DownloadManifest(out / MANIFEST_NAME).is_complete(2119, size)
+
+    # 同じ内容の再取り込みは書き込まない
+    assert import_archive(source, out, workers=2)["unchanged"] == 3
+
+
+def test_import_archive_rejects_unknown(tmp_path):
+    bogus = tmp_path / "bogus.bin"
+    bogus.write_bytes(b"\x00\x01")
+    with pytest.raises(ValueError):
+        import_archive(bogus, tmp_path / "texts")
+
+
+def test_import_records_member_mtime_and_errors(tmp_path, monkeypatch):
+    from rfc_chronicle import importer
+
+    source = tmp_path / "RFC-all.tar"
+    with tarfile.open(source, "w") as tf:
+        for name, data in [("rfc1.txt", b"Host Software\n"), ("rfc2.txt", b"broken")]:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = 784111777  # Sun, 06 Nov 1994 08:49:37 GMT
+            tf.addfile(info, io.BytesIO(data))
+
+    original = importer.normalize_document
+
+    def failing(data):
+        if data == b"broken":
+            raise UnicodeError("bad member")
+        return original(data)
+
+    monkeypatch.setattr(importer, "normalize_document", failing)
+    out = tmp_path / "texts"
+    stats = import_archive(source, out, workers=2)
+    # 失敗した RFC と理由が分かる
+    assert stats["failed"] == 1
+    assert stats["errors"] == {2: "UnicodeError('bad member')"}
+    # アーカイブ内の更新時刻を Last-Modified として記録し、後で条件付き GET で再検証できる
+    rec = DownloadManifest(out / MANIFEST_NAME).get(1)
+    assert rec["last_modified"] == "Sun, 06 Nov 1994 08:49:37 GMT"
@@ -0,0 +1,59 @@
+import threading
+import time
+
+from rfc_chronicle.metacache import MetadataCache
+
+RECORDS = [{"number": "RFC 1", "title": "Host Software"}]
+
+
+class CountingFetcher:
+    """呼び出し回数と受け取ったヘッダを記録するダミー fetcher"""
+    def __init__(self, result=(RECORDS, '"v1"', None), delay=0.0):
+        self.result = result
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, headers):
+        with self._lock:
+            self.calls.append(headers)
+        time.sleep(self.delay)
+        return self.result
+
+
+def test_fresh_cache_is_shared_between_instances(tmp_path):
+    fetcher = CountingFetcher()
+    assert MetadataCache(tmp_path / "cache.json", ttl=60).get(fetcher) == RECORDS
+    # 別インスタンス（別ワーカー相当）でもディスクから読み、上流へは行かない
+    assert MetadataCache(tmp_path / "cache.json", ttl=60).get(fetcher) == RECORDS
+    assert len(fetcher.calls) == 1
+
+
+def test_expired_cache_revalidates_with_validators(tmp_path):
+    cache = MetadataCache(tmp_path / "cache.json", ttl=60)
+    cache.get(CountingFetcher())
+    not_modified = CountingFetcher(result=None)
+    assert cache.get(not_modified, max_age=0) == RECORDS
+    assert not_modified.calls == [{"If-None-Match": '"v1"'}]
+
+
+def test_concurrent_callers_trigger_single_fetch(tmp_path):
+    cache = MetadataCache(tmp_path / "cache.json", ttl=60)
+    fetcher = CountingFetcher(delay=0.1)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(fetcher))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(fetcher.calls) == 1
+    assert results == [RECORDS] * 8
+
+
+def test_invalidate_forces_unconditional_fetch(tmp_path):
+    cache = MetadataCache(tmp_path / "cache.json", ttl=60)
+    cache.get(CountingFetcher())
+    cache.invalidate()
+    fetcher = CountingFetcher()
+    cache.get(fetcher)
+    assert fetcher.calls == [{}]
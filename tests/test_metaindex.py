@@ -0,0 +1,132 @@
+import json
+import os
+import time
+
+import pytest
+
+from rfc_chronicle.metaindex import MetadataIndex, SEARCH_FIELDS
+
+ENTRIES = [
+    {"number": "RFC 0001", "title": "Host Software", "abstract": "", "date": "April 1969"},
+    {"number": "RFC 2119", "title": "Key words", "abstract": "MUST and SHOULD", "status": "Best Current Practice"},
+    {"number": "RFC 8446", "title": "TLS 1.3", "abstract": "Transport Layer Security",
+     "status": "Proposed Standard", "authors": ["E. Rescorla"]},
+]
+
+
+def _write(path, entries):
+    path.write_text(json.dumps(entries), encoding="utf-8")
+
+
+def _linear(entries, keyword):
+    # 対象フィールドを毎回連結して部分一致させた場合と同じ結果になること
+    kw = keyword.lower()
+    out = []
+    for e in entries:
+        values = [", ".join(v) if isinstance(v, list) else str(v) for v in (e.get(f, "") for f in SEARCH_FIELDS)]
+        if kw in "\n".join(values).lower():
+            out.append(e["number"].split()[-1])
+    return out
+
+
+def test_substring_search_matches_linear_scan(tmp_path):
+    path = tmp_path / "metadata.json"
+    _write(path, ENTRIES)
+    index = MetadataIndex(path)
+    for kw in ["tls", "RFC", "standard", "must", "0001", "", "s", "rescorla", "key wo", "nothing-here", "1969"]:
+        assert index.search(kw) == _linear(ENTRIES, kw), kw
+
+
+def test_whole_word_search(tmp_path):
+    path = tmp_path / "metadata.json"
+    _write(path, ENTRIES)
+    index = MetadataIndex(path)
+    assert index.search("key", whole_word=True) == ["2119"]
+    assert index.search("ke", whole_word=True) == []
+    # 複数語はすべてを含むもの
+    assert index.search("standard proposed", whole_word=True) == ["8446"]
+    assert index.search("standard must", whole_word=True) == []
+
+
+def test_reload_only_when_file_changes(tmp_path, monkeypatch):
+    path = tmp_path / "metadata.json"
+    _write(path, ENTRIES)
+    index = MetadataIndex(path)
+    assert index.search("tls") == ["8446"]
+    assert index.last_refresh["mode"] == "full"
+
+    # 変更がなければ再構築しない（mtime だけ変わった場合も同じ）
+    calls = []
+    original = index._rebuild
+    monkeypatch.setattr(index, "_rebuild", lambda *a: (calls.append(1), original(*a)))
+    index.search("tls")
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    index.search("tls")
+    assert calls == []
+
+
+def test_incremental_update_and_persisted_index(tmp_path):
+    path = tmp_path / "metadata.json"
+    _write(path, ENTRIES)
+    MetadataIndex(path).search("x")
+    assert (tmp_path / "metadata.idx").exists()
+
+    # 別プロセス相当：保存済みインデックスをそのまま読み込む
+    loaded = MetadataIndex(path)
+    assert loaded.search("host") == ["0001"]
+    assert loaded.last_refresh["mode"] == "loaded"
+
+    # 1 件変更・1 件追加 → その 2 件だけ差分更新
+    changed = [dict(e) for e in ENTRIES]
+    changed[0]["title"] = "Host Software Revised"
+    changed.append({"number": "RFC 9000", "title": "QUIC over TLS", "abstract": ""})
+    _write(path, changed)
+    assert loaded.search("tls") == ["8446", "9000"]
+    assert loaded.search("revised") == ["0001"]
+    assert loaded.last_refresh == {"mode": "incremental", "updated": 2}
+
+    # 差分更新後に保存したインデックスも全件構築と同じ結果
+    fresh = MetadataIndex(path)
+    for kw in ["tls", "revised", "software", "quic", "best"]:
+        assert fresh.search(kw) == _linear(changed, kw), kw
+    assert fresh.last_refresh["mode"] == "loaded"
+
+    # 削除された RFC は結果から消える
+    _write(path, changed[1:])
+    assert fresh.search("software") == []
+    assert fresh.search("host", whole_word=True) == []
+
+
+FACETED = [
+    {"number": "RFC 5246", "title": "TLS 1.2", "date": "August 2008", "status": "Proposed Standard"},
+    {"number": "RFC 7540", "title": "HTTP/2", "date": "May 2015", "status": "Proposed Standard"},
+    {"number": "RFC 8446", "title": "TLS 1.3", "date": "August 2018", "status": "Proposed Standard"},
+    {"number": "RFC 8996", "title": "Deprecating TLS 1.0", "date": "March 2021", "status": "Best Current Practice"},
+    {"number": "RFC 7457", "title": "Summarizing Known Attacks on TLS", "date": "February 2015", "status": "Informational"},
+]
+
+
+def test_query_filters_sorts_and_counts_facets(tmp_path):
+    path = tmp_path / "metadata.json"
+    _write(path, FACETED)
+    index = MetadataIndex(path)
+
+    res = index.query("tls", date_from="2015", date_to="2020", sort="-date")
+    assert [r["number"] for r in res["results"]] == ["8446", "7457"]
+    assert res["total"] == 2
+    # ステータス別件数はキーワードと期間で絞った件数
+    assert res["facets"]["status"] == {"Informational": 1, "Proposed Standard": 1}
+    # 年別件数は期間の条件を外した件数
+    assert res["facets"]["year"] == {"2008": 1, "2015": 1, "2018": 1, "2021": 1}
+
+    res = index.query("tls", statuses=["proposed standard"], date_from="2015-03", limit=1)
+    assert res["total"] == 1 and res["results"][0]["title"] == "TLS 1.3"
+
+    res = index.query(sort="date", limit=2)
+    assert [r["number"] for r in res["results"]] == ["5246", "7457"]
+    assert res["total"] == 5
+
+    with pytest.raises(ValueError):
+        index.query(date_from="2015-13")
+    with pytest.raises(ValueError):
+        index.query(sort="title")
@@ -0,0 +1,156 @@
+import hashlib
+
+import pytest
+
+from rfc_chronicle.fetch_rfc import RFCClient
+from rfc_chronicle.parsed import (
+    cached_sha256,
+    index_sections,
+    load_parsed,
+    parse_document,
+    parsed_dir,
+    save_parsed,
+)
+
+RAW = "Network Working Group: Test\nCategory: Informational\n\nBody line\n\fFooter [Page 1]\nRFC 1  Header\nMore body\n"
+
+
+class OfflineSession:
+    def get(self, *args, **kwargs):
+        raise AssertionError("network must not be used")
+
+
+def test_save_and_load_parsed(tmp_path):
+    save_parsed(tmp_path, 1, "abc", {"category": "Informational"}, "body\nline")
+    assert load_parsed(tmp_path, 1, "abc") == ({"category": "Informational"}, "body\nline")
+    # ハッシュ不一致・未作成は None
+    assert load_parsed(tmp_path, 1, "other") is None
+    assert load_parsed(tmp_path, 2, "abc") is None
+
+
+def test_load_details_uses_cache_without_network(tmp_path, monkeypatch):
+    texts = tmp_path / "texts"
+    texts.mkdir()
+    (texts / "1.txt").write_text(RAW, encoding="utf-8")
+    client = RFCClient(session=OfflineSession())
+
+    first = client.load_details(1, texts)
+    assert first["category"] == "Informational"
+    assert first["body"] == "Body line\n\nMore body"
+    digest = hashlib.sha256(RAW.encode()).hexdigest()
+    assert load_parsed(parsed_dir(texts), 1, digest) is not None
+
+    # 2 回目はパースせずキャッシュから返す
+    monkeypatch.setattr("rfc_chronicle.parsed.parse_document", pytest.fail)
+    assert client.load_details(1, texts) == first
+
+
+def test_cache_invalidated_when_text_changes(tmp_path):
+    texts = tmp_path / "texts"
+    texts.mkdir()
+    (texts / "1.txt").write_text(RAW, encoding="utf-8")
+    client = RFCClient(session=OfflineSession())
+    client.load_details(1, texts)
+    (texts / "1.txt").write_text("Title: New\n\nChanged body\n", encoding="utf-8")
+    assert client.load_details(1, texts)["body"] == "Changed body"
+
+
+
+def test_same_size_edit_with_manifest_record_is_detected(tmp_path):
+    import os
+
+    from rfc_chronicle.manifest import DownloadManifest, MANIFEST_NAME
+
+    texts = tmp_path / "texts"
+    texts.mkdir()
+    path = texts / "1.txt"
+    path.write_text(RAW, encoding="utf-8")
+    manifest = DownloadManifest(texts / MANIFEST_NAME)
+    manifest.record(1, etag=None, last_modified=None, length=len(RAW.encode()),
+                    sha256=hashlib.sha256(RAW.encode()).hexdigest(), mtime_ns=path.stat().st_mtime_ns)
+    client = RFCClient(session=OfflineSession())
+    assert client.load_details(1, texts)["body"] == "Body line\n\nMore body"
+
+    # サイズが同じでも更新時刻が変われば読み直してハッシュする
+    edited = RAW.replace("Body line", "Body LINE")
+    assert len(edited) == len(RAW)
+    path.write_text(edited, encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert client.load_details(1, texts)["body"] == "Body LINE\n\nMore body"
+    # 記録は新しい内容に付け直され、次回からは読まずに済む
+    rec = DownloadManifest(texts / MANIFEST_NAME).get(1)
+    assert rec["sha256"] == hashlib.sha256(edited.encode()).hexdigest()
+    assert rec["mtime_ns"] == path.stat().st_mtime_ns
+
+
+SECTIONED = """Category: Standards Track
+
+Table of Contents
+
+   1. Introduction ........ 2
+   4.2. Encoding ......... 5
+
+1.  Introduction
+
+   Intro text.
+
+4.  Protocol
+
+   Overview.
+
+4.2.  Encoding
+
+   Bytes — and more.
+
+Appendix A.  Examples
+
+   Example.
+"""
+
+
+def test_index_sections_skips_toc_and_nests_subsections():
+    _, body = parse_document(SECTIONED)
+    sections = {s["id"]: s for s in index_sections(body)}
+    assert list(sections) == ["1", "4", "4.2", "A"]
+    data = body.encode("utf-8")
+    # 4 は下位の 4.2 を含み、付録の手前で終わる
+    four = data[sections["4"]["start"]:sections["4"]["end"]].decode("utf-8")
+    assert four.startswith("4.  Protocol") and "4.2.  Encoding" in four
+    assert "Appendix" not in four
+    assert sections["A"]["title"] == "Examples"
+
+
+def test_load_section_reads_only_slice(tmp_path, monkeypatch):
+    texts = tmp_path / "texts"
+    texts.mkdir()
+    (texts / "1.txt").write_text(SECTIONED, encoding="utf-8")
+    client = RFCClient(session=OfflineSession())
+
+    section = client.load_section(1, "4.2", texts)
+    assert section["title"] == "Encoding"
+    assert section["body"] == "4.2.  Encoding\n\n   Bytes — and more."
+
+    # キャッシュ作成後は本文全体をパースも読み込みもしない
+    monkeypatch.setattr("rfc_chronicle.parsed.parse_document", pytest.fail)
+    assert client.load_section(1, "4.2.", texts) == section
+    assert [s["id"] for s in client.list_sections(1, texts)] == ["1", "4", "4.2", "A"]
+    with pytest.raises(KeyError):
+        client.load_section(1, "9", texts)
+
+
+def test_entry_without_section_index_is_rebuilt(tmp_path):
+    # 節インデックス導入前の形式のエントリは無効扱い
+    cache = tmp_path / "parsed"
+    cache.mkdir()
+    (cache / "1.parsed").write_bytes(b'{"sha256":"abc","header":{}}\nbody')
+    assert load_parsed(cache, 1, "abc") is None
+    assert cached_sha256(cache, 1) is None
+
+
+def test_show_reads_the_texts_other_commands_write():
+    from rfc_chronicle import fulltext, show
+
+    # show / sections API は fetch・import・preprocess と同じ data/texts（と data/parsed）を使う
+    assert show.DATA_DIR == fulltext.TEXT_DIR
+    assert parsed_dir(show.DATA_DIR) == fulltext.BASE_DIR / "parsed"
@@ -0,0 +1,73 @@
+import hashlib
+
+from rfc_chronicle.docstore import pack_texts
+from rfc_chronicle.parsed import cached_sha256, iter_parsed, load_parsed, parse_document, parsed_dir
+from rfc_chronicle.preprocess import preprocess_corpus
+
+RAW = "Category: Informational\n\nBody of RFC {n}\n\fFooter [Page 1]\nRFC {n}  Header\nMore\n"
+
+
+def _make_corpus(texts, count):
+    texts.mkdir()
+    for n in range(1, count + 1):
+        (texts / f"{n}.txt").write_text(RAW.format(n=n), encoding="utf-8")
+
+
+def test_preprocess_writes_parsed_cache(tmp_path):
+    texts = tmp_path / "texts"
+    _make_corpus(texts, 5)
+    pack_texts(texts)  # パック内の文書も対象
+    (texts / "7.txt").write_text(RAW.format(n=7), encoding="utf-8")
+
+    stats = preprocess_corpus(texts, workers=2, chunk_size=2)
+    assert (stats["documents"], stats["parsed"], stats["failed"]) == (6, 6, 0)
+    assert stats["docs_per_sec"] > 0
+
+    cache = parsed_dir(texts)
+    raw = RAW.format(n=7)
+    digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    assert load_parsed(cache, 7, digest) == parse_document(raw)
+
+    # 2 回目はキャッシュが有効なので全件スキップ
+    again = preprocess_corpus(texts, workers=2, chunk_size=2)
+    assert (again["parsed"], again["skipped"]) == (0, 6)
+
+    # 元テキストが変わった文書だけ再パース
+    (texts / "3.txt").write_text("Category: Changed\n\nNew body\n", encoding="utf-8")
+    third = preprocess_corpus(texts, workers=2, chunk_size=4)
+    assert (third["parsed"], third["skipped"]) == (1, 5)
+    assert cached_sha256(cache, 3) == hashlib.sha256(b"Category: Changed\n\nNew body\n").hexdigest()
+
+
+def test_iter_parsed_reads_clean_bodies(tmp_path):
+    texts = tmp_path / "texts"
+    _make_corpus(texts, 2)
+    preprocess_corpus(texts, workers=1)
+
+    docs = {num: body for num, _, body in iter_parsed(texts)}
+    assert set(docs) == {1, 2}
+    # ページフッタ・ヘッダは除去済み
+    assert "[Page 1]" not in docs[1] and "Body of RFC 1" in docs[1]
+
+
+def test_seeded_texts_get_manifest_records_and_stay_compact(tmp_path):
+    from rfc_chronicle.manifest import DownloadManifest, MANIFEST_NAME
+
+    texts = tmp_path / "texts"
+    _make_corpus(texts, 4)  # マニフェストの無い（手で置いた）本文
+    preprocess_corpus(texts, workers=2, chunk_size=2)
+    path = texts / MANIFEST_NAME
+    rec = DownloadManifest(path).get(2)
+    assert rec["sha256"] == hashlib.sha256(RAW.format(n=2).encode("utf-8")).hexdigest()
+    assert rec["etag"] is None and rec["last_modified"] is None
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 4
+
+    # 変更なしの再実行では本文を読み直さない（記録が増えない）
+    preprocess_corpus(texts, workers=2, chunk_size=2)
+    assert path.read_text(encoding="utf-8").splitlines() == lines
+
+    # 記録を付け直しても、終了時にまとめて 1 件 1 行へ書き直す
+    (texts / "3.txt").write_text("Category: Changed\n\nNew body\n", encoding="utf-8")
+    preprocess_corpus(texts, workers=2, chunk_size=2)
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 4
@@ -0,0 +1,77 @@
+import json
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from rfc_chronicle import search
+
+
+def test_imports_do_not_load_model_libraries():
+    # 別プロセスで import し、重いライブラリが読み込まれていないことを確かめる
+    code = (
+        "import sys, rfc_chronicle.cli, rfc_chronicle.search; "
+        "print([m for m in ('torch', 'sentence_transformers', 'faiss') if m in sys.modules])"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+class _FakeModel:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.calls += 1
+        return np.array([[1.0, 0.0]], dtype="float32")
+
+
+def _write_index(tmp_path, vectors, docmap):
+    faiss = pytest.importorskip("faiss")
+    index = faiss.IndexFlatIP(2)
+    index.add(np.array(vectors, dtype="float32"))
+    faiss.write_index(index, str(tmp_path / "faiss_index.bin"))
+    (tmp_path / "docmap.json").write_text(json.dumps(docmap), encoding="utf-8")
+
+
+def test_index_loaded_once_and_reloaded_on_change(tmp_path):
+    semantic = search.SemanticIndex("dummy", tmp_path / "faiss_index.bin", tmp_path / "docmap.json")
+    with pytest.raises(RuntimeError):
+        semantic.index()
+
+    _write_index(tmp_path, [[0.0, 1.0], [1.0, 0.0]], {"0": "0001", "1": "8446"})
+    semantic._model = _FakeModel()
+
+    # 同時に呼ばれても同じインデックスを共有する
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(semantic.search("tls", topk=1))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [[(1.0, "8446")]] * 8
+    first = semantic._index
+
+    assert semantic.search("tls", topk=2)[1] == (0.0, "0001")
+    assert semantic._index is first
+
+    # インデックスを作り直したら次の検索で読み直す
+    _write_index(tmp_path, [[1.0, 0.0]], {"0": "9000"})
+    assert semantic.search("tls", topk=1) == [(1.0, "9000")]
+    assert semantic._index is not first
+
+
+def test_repeated_query_skips_encoding(tmp_path):
+    _write_index(tmp_path, [[0.0, 1.0], [1.0, 0.0]], {"0": "0001", "1": "8446"})
+    cache_path = tmp_path / "embed_cache.db"
+    semantic = search.SemanticIndex("dummy", tmp_path / "faiss_index.bin", tmp_path / "docmap.json", cache_path)
+    semantic._model = _FakeModel()
+    assert semantic.search("tls", topk=1) == semantic.search(" tls ", topk=1) == [(1.0, "8446")]
+    assert semantic._model.calls == 1
+
+    # ディスクに残っていれば、新しいインスタンスはモデルを読み込まずに検索できる
+    fresh = search.SemanticIndex("dummy", tmp_path / "faiss_index.bin", tmp_path / "docmap.json", cache_path)
+    assert fresh.search("tls", topk=1) == [(1.0, "8446")]
+    assert fresh._model is None
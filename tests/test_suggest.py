@@ -0,0 +1,71 @@
+import json
+
+from rfc_chronicle.metaindex import MetadataIndex
+from rfc_chronicle.suggest import SuggestIndex, get_suggester
+
+ENTRIES = [
+    {"number": "RFC 5246", "title": "The Transport Layer Security (TLS) Protocol Version 1.2", "date": "August 2008"},
+    {"number": "RFC 8446", "title": "The Transport Layer Security (TLS) Protocol Version 1.3", "date": "August 2018"},
+    {"number": "RFC 7540", "title": "Hypertext Transfer Protocol Version 2 (HTTP/2)", "date": "May 2015"},
+    {"number": "RFC 0791", "title": "Internet Protocol", "date": "September 1981"},
+]
+
+
+def _suggester(tmp_path):
+    path = tmp_path / "metadata.json"
+    path.write_text(json.dumps(ENTRIES), encoding="utf-8")
+    return get_suggester(MetadataIndex(path)), path
+
+
+def test_title_and_term_completion(tmp_path):
+    suggester, _ = _suggester(tmp_path)
+    # 単語の補完のあとにタイトル（新しい順）。1 件にしか出ない単語（transfer）は補完しない
+    res = suggester.suggest("tra")
+    assert [r["kind"] for r in res] == ["term", "title", "title", "title"]
+    assert res[0]["text"] == "transport"
+    assert [r["number"] for r in res if r["kind"] == "title"] == ["8446", "7540", "5246"]
+
+    # タイトル途中の単語からも一致し、1 タイトルは 1 回だけ
+    res = suggester.suggest("Transport Layer", limit=5)
+    assert [r["number"] for r in res] == ["8446", "5246"]
+    # 1〜2 文字は事前計算した上位件数から返す
+    assert [r["number"] for r in suggester.suggest("in") if r["kind"] == "title"] == ["0791"]
+    assert suggester.suggest("zz") == []
+
+
+def test_number_completion(tmp_path):
+    suggester, _ = _suggester(tmp_path)
+    assert [r["number"] for r in suggester.suggest("RFC 79")] == ["0791"]
+    assert [r["number"] for r in suggester.suggest("8", limit=1)] == ["8446"]
+
+
+def test_rebuilt_when_metadata_changes(tmp_path):
+    suggester, path = _suggester(tmp_path)
+    assert suggester.suggest("quic") == []
+    path.write_text(json.dumps(ENTRIES + [{"number": "RFC 9000", "title": "QUIC", "date": "May 2021"}]))
+    assert [r["number"] for r in suggester.suggest("quic") if r["kind"] == "title"] == ["9000"]
+
+
+def test_precomputed_matches_range_scan():
+    titles = [f"Title {i} {'abc'[i % 3]}{i}" for i in range(200)]
+    index = SuggestIndex([str(i) for i in range(1, 201)], titles, [i % 7 for i in range(200)], {})
+    # 事前計算（2 文字まで）と二分探索の結果が一致する
+    for prefix in ["t", "ti", "a", "b1"]:
+        assert index._titles.top(prefix, 10) == index._titles._best(
+            [p for p, k in enumerate(index._titles.keys) if k.startswith(prefix)], 10
+        )
+
+
+def test_shared_suggester_is_one_per_metadata_file(tmp_path):
+    from rfc_chronicle import suggest
+
+    path = tmp_path / "metadata.json"
+    path.write_text(json.dumps(ENTRIES), encoding="utf-8")
+    index = MetadataIndex(path)
+    assert get_suggester(index) is get_suggester(index)
+    before = len(suggest._SUGGESTERS)
+
+    # 同じファイルの新しいインデックスは古い Suggester を置き換える（増え続けない）
+    other = MetadataIndex(path)
+    assert get_suggester(other).meta_index is other
+    assert len(suggest._SUGGESTERS) == before